@@ -3,9 +3,10 @@
 WHY: Centralized dependency injection for consistent auth across all endpoints.
 Handles token validation, user lookup, and subscription tier checking.
 """
+import hashlib
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-from fastapi import Depends, HTTPException, status, Query
+from fastapi import Depends, HTTPException, status, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -14,6 +15,7 @@ from app.core.security import decode_token
 from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User, SubscriptionTier
+from app.services.changelog import current_seq
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
@@ -137,3 +139,43 @@ async def validate_last_pulled_at(
             status_code=status.HTTP_400_BAD_REQUEST, 
             detail="Invalid timestamp format"
         )
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """RFC 9110 weak comparison, also accepting content-coded variants
+    of ``etag`` as rewritten by the compression middleware."""
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate.removeprefix("W/").strip('"')
+        if candidate == opaque or candidate.rsplit("-", 1)[0] == opaque:
+            return True
+    return False
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> str:
+    """Tag the response with the user's data version; 304 if the client has it.
+
+    The version is the user's change-log sequence, bumped by every write to
+    sessions, hands and transactions, so the check is one primary-key read
+    made before the endpoint runs any of its own queries. The tag also
+    covers the path, query string and app version.
+    """
+    version = await current_seq(db, current_user.id)
+    digest = hashlib.sha1(
+        f"{settings.VERSION}|{request.url.path}|{sorted(request.query_params.multi_items())}".encode()
+    ).hexdigest()[:16]
+    etag = f'"{current_user.id}.{version}.{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return etag
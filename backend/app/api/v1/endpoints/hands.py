@@ -0,0 +1,138 @@
+"""Hand history endpoints."""
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.models.hand import Hand
+from app.models.user import User
+from app.models.session import Session
+from app.schemas.hand import EquityResponse, HandSearchResponse, HandSummary, HudResponse
+from app.api.deps import get_current_user
+from app.services.equity import DEFAULT_SAMPLES, compute_equity
+from app.services.evaluator import split_cards
+from app.services.hand_import import import_hands, spool_upload
+from app.services.hand_search import search_query, texture_names
+from app.services.hud import build_hud, load_hud
+from app.services.pagination import keyset_page
+
+router = APIRouter()
+
+
+@router.post("/import")
+async def import_hand_history(
+    request: Request,
+    session_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Import a PokerStars-format hand-history file sent as the raw request body.
+
+    The response is NDJSON: a ``{"hands", "imported", "duplicates",
+    "failed"}`` line per batch as it is committed, then a final line with
+    ``"done": true`` and sample parse errors. Hands already imported are
+    counted as duplicates. ``session_id`` attaches the hands to a session.
+    """
+    if session_id is not None:
+        found = await db.scalar(
+            select(Session.id).where(Session.id == session_id, Session.user_id == current_user.id)
+        )
+        if found is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    source = await spool_upload(request)
+    return StreamingResponse(
+        import_hands(db, current_user.id, source, session_id),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/hud", response_model=HudResponse)
+async def get_hud(
+    session_id: Optional[str] = None,
+    start: Optional[datetime] = Query(None, description="Hands played at or after this time"),
+    end: Optional[datetime] = Query(None, description="Hands played before this time"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The hero's VPIP, PFR, 3-bet, aggression factor and showdown stats.
+
+    Unfiltered, this reads per-user counters kept up to date on every hand
+    write; ``session_id`` and ``start``/``end`` sum the per-hand flags.
+    """
+    return build_hud(await load_hud(db, current_user.id, session_id, start, end))
+
+
+@router.get("/search", response_model=HandSearchResponse)
+async def search_hands(
+    hole: List[str] = Query([], description='Hole cards such as "AA", "AKs" or "AK" (suited or offsuit); repeat for any of several'),
+    texture: List[Literal["paired", "monotone", "connected"]] = Query([], description="Board textures the hand must all have"),
+    street: Optional[Literal["preflop", "flop", "turn", "river", "showdown"]] = Query(None, description="Reached at least this street"),
+    min_pot_bb: Optional[float] = Query(None, ge=0, description="Pot of at least this many big blinds"),
+    max_pot_bb: Optional[float] = Query(None, ge=0),
+    session_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """The user's hands matching every given filter, newest first.
+
+    Pass ``next_cursor`` back as ``cursor`` with the same filters for the
+    next page.
+    """
+    try:
+        query = search_query(current_user.id, hole, texture, street, min_pot_bb, max_pot_bb, session_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    # Leave the actions and seats JSON unread
+    query = query.options(load_only(*(getattr(Hand, name) for name in HandSummary.model_fields)))
+    hands, next_cursor = await keyset_page(db, query, Hand.played_at, Hand.id, cursor, limit)
+    items = [
+        HandSummary(**{name: getattr(hand, name) for name in HandSummary.model_fields} | {
+            "board_texture": texture_names(hand.board_texture),
+        })
+        for hand in hands
+    ]
+    return HandSearchResponse(items=items, next_cursor=next_cursor)
+
+
+@router.get("/{hand_id}/equity", response_model=EquityResponse)
+async def get_hand_equity(
+    hand_id: str,
+    villain: List[str] = Query([], description='Villain hole cards such as "KdKc", or "random"; repeat per villain'),
+    samples: int = Query(DEFAULT_SAMPLES, ge=1000, le=settings.EQUITY_MAX_SAMPLES),
+    seed: Optional[int] = Query(None, ge=0, description="Fix for reproducible Monte Carlo results"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Hero's equity on the hand's board against one or more villains.
+
+    Villains default to the hands shown down in an imported hand, else one
+    random hand. Exact when every hand is known, Monte Carlo over
+    ``samples`` deals otherwise; computed in a process pool.
+    """
+    hand = await db.scalar(select(Hand).where(Hand.id == hand_id, Hand.user_id == current_user.id))
+    if hand is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hand not found")
+    if not hand.hero_cards or len(hand.hero_cards) != 2:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="The hand has no hero cards",
+        )
+    villains = [None if text.strip().lower() == "random" else split_cards(text) for text in villain]
+    if not villains:
+        villains = [
+            seat["cards"] for seat in hand.seats or []
+            if not seat.get("hero") and seat.get("cards") and len(seat["cards"]) == 2
+        ] or [None]
+    board = list(hand.community_cards or [])
+    try:
+        result = await compute_equity(hand.hero_cards, villains, board, samples, seed)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    return {"hand_id": hand.id, "board": board, **result}
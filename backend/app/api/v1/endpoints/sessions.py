@@ -1,15 +1,21 @@
 """Session tracking endpoints."""
-from typing import List, Optional
-from datetime import date
+import uuid
+from typing import Optional
+from datetime import date, datetime, time, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select
 
 from app.db.session import get_db
 from app.models.user import User
-from app.models.session import Session
-from app.schemas.session import SessionCreate, SessionUpdate, SessionResponse
-from app.api.deps import get_current_user
+from app.models.session import Session, hours_between
+from app.schemas.session import AllInEvResponse, SessionCreate, SessionUpdate, SessionResponse, SessionListResponse
+from app.api.deps import conditional_get, get_current_user
+from app.services.all_in_ev import session_all_in_ev
+from app.services.changelog import delete_records, record_changes
+from app.services.hand_search import reprice_session_hands
+from app.services.pagination import keyset_page
+from app.services.rollup import tracking
 
 router = APIRouter()
 
@@ -21,41 +27,49 @@ async def create_session(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new poker session."""
-    session = Session(user_id=current_user.id, **session_data.model_dump())
-    db.add(session)
+    session = Session(id=str(uuid.uuid4()), user_id=current_user.id, **session_data.model_dump())
+    # Recorded times win over a typed-in duration, as on sync push
+    session.hours_played = hours_between(session.start_time, session.end_time) or session.hours_played
+    async with tracking(db, current_user.id, "sessions", [session.id]):
+        db.add(session)
+    await record_changes(db, current_user.id, "sessions", [session.id])
     await db.commit()
     await db.refresh(session)
     return session
 
 
-@router.get("/", response_model=List[SessionResponse])
+@router.get("/", response_model=SessionListResponse)
 async def get_sessions(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     location: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    _etag: str = Depends(conditional_get)
 ):
-    """Get user's sessions with optional filters."""
-    query = select(Session).where(Session.user_id == current_user.id).order_by(desc(Session.session_date))
+    """Get user's sessions, newest first, one page at a time.
+
+    Pass ``next_cursor`` back as ``cursor`` with the same filters for the
+    next page.
+    """
+    query = select(Session).where(Session.user_id == current_user.id)
     
     if start_date:
-        query = query.where(Session.session_date >= start_date)
+        query = query.where(Session.start_time >= datetime.combine(start_date, time.min))
     if end_date:
-        query = query.where(Session.session_date <= end_date)
+        query = query.where(Session.start_time < datetime.combine(end_date + timedelta(days=1), time.min))
     if location:
         query = query.where(Session.location.ilike(f"%{location}%"))
     
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    items, next_cursor = await keyset_page(db, query, Session.start_time, Session.id, cursor, limit)
+    return SessionListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
-    session_id: int,
+    session_id: str,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -69,9 +83,39 @@ async def get_session(
     return session
 
 
+@router.get("/{session_id}/all-in-ev", response_model=AllInEvResponse)
+async def get_session_all_in_ev(
+    session_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """All-in adjusted results of a session's imported hands.
+
+    Hands all-in before the river with every live hand shown down are
+    valued at the hero's equity; ``luck`` is what they actually paid minus
+    that, and comes off the session's profit. Annotations are cached per
+    hand, so only hands changed since the last call are computed.
+    """
+    result = await db.execute(
+        select(Session).where(Session.id == session_id, Session.user_id == current_user.id)
+    )
+    session = result.scalar_one_or_none()
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    summary = await session_all_in_ev(db, current_user.id, session.id)
+    if summary["computed"]:
+        await db.commit()
+    return AllInEvResponse(
+        session_id=session.id,
+        profit=session.profit,
+        all_in_adjusted_profit=float(session.profit) - summary["luck"],
+        **summary,
+    )
+
+
 @router.put("/{session_id}", response_model=SessionResponse)
 async def update_session(
-    session_id: int,
+    session_id: str,
     session_data: SessionUpdate,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -85,9 +129,14 @@ async def update_session(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     
     update_data = session_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(session, field, value)
-    
+    async with tracking(db, current_user.id, "sessions", [session.id]):
+        for field, value in update_data.items():
+            setattr(session, field, value)
+        session.hours_played = hours_between(session.start_time, session.end_time) or session.hours_played
+    if "big_blind" in update_data:
+        await reprice_session_hands(db, current_user.id, {session.id: session.big_blind})
+
+    await record_changes(db, current_user.id, "sessions", [session.id])
     await db.commit()
     await db.refresh(session)
     return session
@@ -95,7 +144,7 @@ async def update_session(
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_session(
-    session_id: int,
+    session_id: str,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -106,5 +155,5 @@ async def delete_session(
     session = result.scalar_one_or_none()
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    await db.delete(session)
+    await delete_records(db, current_user.id, "sessions", [session.id])
     await db.commit()
@@ -1,96 +1,187 @@
 """Statistics and analytics endpoints."""
-from decimal import Decimal
-from fastapi import APIRouter, Depends
+from datetime import date
+from typing import Literal, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from app.db.session import get_db
+from app.db.upsert import dialect_name
 from app.models.user import User
-from app.models.session import Session
-from app.models.transaction import Transaction, TransactionType
-from app.schemas.stats import StatsResponse
-from app.api.deps import get_current_user
+from app.schemas.stats import (
+    AdvancedStatsResponse, BenchmarkMetric, BenchmarkResponse, SimulationResponse, StatsBreakdownResponse, StatsResponse, StatsSeriesResponse,
+)
+from app.api.deps import conditional_get, get_current_user, get_premium_user
+from app.core.config import settings
+from app.services.analytics import advanced_stats, latest_big_blind, load_results
+from app.services.simulation import STEP_HANDS, simulate
+from app.services.population import load_benchmarks, own_metrics
+from app.services.sketch import QuantileSketch
+from app.services.rollup import load_totals
+from app.services.buckets import load_buckets
+from app.services.stats import breakdown_query, build_breakdown, build_series, build_stats, downsample_series
 
 router = APIRouter()
 
-HANDS_PER_HOUR = 25
+
+def _check_timezone(tz: str) -> None:
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown timezone {tz!r}")
 
 
 @router.get("/", response_model=StatsResponse)
 async def get_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _etag: str = Depends(conditional_get)
+):
+    """Get comprehensive statistics.
+
+    Derived from the user's stats rollup row, a single primary-key read
+    however many sessions they have logged. ETag-tagged with the user's
+    data version; ``If-None-Match`` gets 304 without reading the rollup.
+    """
+    return build_stats(await load_totals(db, current_user.id))
+
+
+@router.get("/series", response_model=StatsSeriesResponse)
+async def get_stats_series(
+    bucket: Literal["day", "week", "month", "year"] = "day",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    tz: str = Query("UTC", max_length=64, description="IANA timezone defining calendar days"),
+    points: Optional[int] = Query(None, ge=3, le=10000, description="Downsample to at most this many points"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _etag: str = Depends(conditional_get)
+):
+    """Cumulative bankroll and profit per day, week, month or year.
+
+    ``start`` and ``end`` are inclusive local dates in ``tz``. Read from
+    pre-aggregated daily buckets, so the cost follows the number of days in
+    range rather than the number of sessions. The first request in a new
+    timezone builds that timezone's buckets once. With ``points``, long
+    series are thinned with LTTB so peaks and drawdowns stay visible.
+    """
+    _check_timezone(tz)
+    if start and end and start > end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must not be after end")
+    opening, buckets = await load_buckets(db, current_user.id, tz, start, end)
+    series = build_series(opening, buckets, bucket, tz, start, end)
+    return downsample_series(series, points) if points else series
+
+
+@router.get("/breakdown", response_model=StatsBreakdownResponse)
+async def get_stats_breakdown(
+    group_by: Literal["stakes", "location", "game_type", "weekday", "hour"],
+    tz: str = Query("UTC", max_length=64, description="IANA timezone for weekday and hour"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    _etag: str = Depends(conditional_get)
+):
+    """Session stats per stakes, location, game type, weekday or hour.
+
+    Every group comes from one GROUP BY with the same metric definitions
+    as ``/stats``; stakes, location and game type read the matching
+    ``(user_id, column)`` index in order.
+    """
+    _check_timezone(tz)
+    rows = (await db.execute(breakdown_query(current_user.id, group_by, dialect_name(db), tz))).mappings()
+    return StatsBreakdownResponse(group_by=group_by, tz=tz, groups=build_breakdown(group_by, rows))
+
+
+@router.get("/benchmarks", response_model=BenchmarkResponse)
+async def get_benchmarks(
+    stakes: str = Query(..., max_length=20),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get comprehensive statistics."""
-    result = await db.execute(select(Session).where(Session.user_id == current_user.id))
-    sessions = result.scalars().all()
-    
-    deposits_result = await db.execute(
-        select(func.sum(Transaction.amount))
-        .where(Transaction.user_id == current_user.id, Transaction.transaction_type == TransactionType.DEPOSIT)
-    )
-    total_deposits = deposits_result.scalar() or Decimal("0")
-    
-    withdrawals_result = await db.execute(
-        select(func.sum(Transaction.amount))
-        .where(Transaction.user_id == current_user.id, Transaction.transaction_type == TransactionType.WITHDRAWAL)
-    )
-    total_withdrawals = withdrawals_result.scalar() or Decimal("0")
-    
-    initial_bankroll = total_deposits - total_withdrawals
-    
-    if not sessions:
-        return StatsResponse(
-            total_sessions=0,
-            winning_sessions=0,
-            losing_sessions=0,
-            total_profit=Decimal("0"),
-            net_profit=Decimal("0"),
-            total_tips=Decimal("0"),
-            total_expenses=Decimal("0"),
-            total_hours=Decimal("0"),
-            avg_session_hours=Decimal("0"),
-            hourly_rate=Decimal("0"),
-            net_hourly_rate=Decimal("0"),
-            bb_per_100=Decimal("0"),
-            net_bb_per_100=Decimal("0"),
-            win_rate_percentage=Decimal("0"),
-            current_bankroll=initial_bankroll,
-            initial_bankroll=initial_bankroll
+    """Where the player's bb/100 and hourly rate sit among all players at ``stakes``.
+
+    Reads the precomputed population sketches (one lookup) and the
+    player's own sessions at those stakes; no other user's data is read.
+    """
+    benchmarks = await load_benchmarks(db, stakes)
+    if not benchmarks:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No benchmark for these stakes")
+    own = await own_metrics(db, current_user.id, stakes)
+    metrics = []
+    for benchmark in sorted(benchmarks, key=lambda b: b.metric):
+        sketch = QuantileSketch.from_dict(benchmark.sketch)
+        you = own.get(benchmark.metric)
+        metrics.append(BenchmarkMetric(
+            metric=benchmark.metric,
+            players=benchmark.players,
+            p10=sketch.quantile(0.10),
+            p25=sketch.quantile(0.25),
+            p50=sketch.quantile(0.50),
+            p75=sketch.quantile(0.75),
+            p90=sketch.quantile(0.90),
+            you=you,
+            percentile=sketch.rank(you) * 100 if you is not None else None,
+        ))
+    return BenchmarkResponse(stakes=stakes, computed_at=benchmarks[0].computed_at, metrics=metrics)
+
+
+@router.get("/advanced", response_model=AdvancedStatsResponse)
+async def get_advanced_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_premium_user),
+    _etag: str = Depends(conditional_get)
+):
+    """Standard deviations, confidence intervals, drawdowns and risk of ruin.
+
+    Premium only. Cached until the user's data next changes.
+    """
+    return await advanced_stats(db, current_user.id)
+
+
+@router.get("/simulate", response_model=SimulationResponse)
+async def simulate_bankroll(
+    hands: int = Query(50000, ge=100, le=settings.SIMULATION_MAX_HANDS),
+    trajectories: int = Query(10000, ge=100, le=settings.SIMULATION_MAX_TRAJECTORIES),
+    seed: Optional[int] = Query(None, ge=0, description="Fix for reproducible results"),
+    bankroll: Optional[float] = Query(None, description="Defaults to the current bankroll"),
+    big_blind: Optional[float] = Query(None, gt=0, description="Defaults to the latest session's big blind"),
+    bb_per_100: Optional[float] = Query(None, description="Defaults to the observed win rate"),
+    std_dev_per_100: Optional[float] = Query(None, gt=0, description="Defaults to the observed deviation"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_premium_user)
+):
+    """Simulate future bankroll trajectories from the player's results.
+
+    Premium only. Percentile bands, probability of ruin and worst
+    downswings over ``hands`` future hands, computed in a process pool so
+    the server stays responsive. Any input can be overridden for what-ifs.
+    """
+    stats = await advanced_stats(db, current_user.id)
+    if big_blind is None:
+        big_blind = latest_big_blind(await load_results(db, current_user.id))
+    rate = stats.bb_per_100 if bb_per_100 is None else bb_per_100
+    std_dev = stats.std_dev_per_100 if std_dev_per_100 is None else std_dev_per_100
+    if big_blind is None or std_dev is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="At least two timed sessions with a big blind are needed to simulate",
         )
-    
-    total_profit = sum(s.profit for s in sessions)
-    total_tips = sum(s.tips for s in sessions)
-    total_expenses = sum(s.expenses for s in sessions)
-    net_profit = total_profit - total_tips - total_expenses
-    total_hours = sum(s.hours_played for s in sessions)
-    total_hands = total_hours * HANDS_PER_HOUR
-    
-    total_bb_won = sum(s.bb_won for s in sessions)
-    tips_in_bb = sum(s.tips / s.big_blind for s in sessions if s.big_blind > 0)
-    expenses_in_bb = sum(s.expenses / s.big_blind for s in sessions if s.big_blind > 0)
-    
-    bb_per_100 = (total_bb_won / total_hands * 100) if total_hands > 0 else Decimal("0")
-    net_bb_per_100 = ((total_bb_won - tips_in_bb - expenses_in_bb) / total_hands * 100) if total_hands > 0 else Decimal("0")
-    
-    winning_sessions = sum(1 for s in sessions if s.profit > 0)
-    losing_sessions = sum(1 for s in sessions if s.profit < 0)
-    
-    return StatsResponse(
-        total_sessions=len(sessions),
-        winning_sessions=winning_sessions,
-        losing_sessions=losing_sessions,
-        total_profit=total_profit,
-        net_profit=net_profit,
-        total_tips=total_tips,
-        total_expenses=total_expenses,
-        total_hours=total_hours,
-        avg_session_hours=total_hours / len(sessions) if sessions else Decimal("0"),
-        hourly_rate=total_profit / total_hours if total_hours > 0 else Decimal("0"),
-        net_hourly_rate=net_profit / total_hours if total_hours > 0 else Decimal("0"),
-        bb_per_100=bb_per_100,
-        net_bb_per_100=net_bb_per_100,
-        win_rate_percentage=Decimal(winning_sessions / len(sessions) * 100) if sessions else Decimal("0"),
-        current_bankroll=initial_bankroll + net_profit,
-        initial_bankroll=initial_bankroll
+    starting = stats.current_bankroll if bankroll is None else bankroll
+    # End any read transaction before the CPU-bound wait
+    await db.commit()
+    outcome = await simulate(rate * big_blind, std_dev * big_blind, starting, hands, trajectories, seed)
+    return SimulationResponse(
+        trajectories=trajectories,
+        hands=outcome["steps"] * STEP_HANDS,
+        seed=seed,
+        big_blind=big_blind,
+        bb_per_100=rate,
+        std_dev_per_100=std_dev,
+        starting_bankroll=starting,
+        bands=outcome["bands"],
+        probability_of_ruin=outcome["probability_of_ruin"],
+        expected_worst_downswing=outcome["expected_worst_downswing"],
+        worst_downswing_p95=outcome["worst_downswing_p95"],
+        expected_final_bankroll=outcome["expected_final_bankroll"],
     )
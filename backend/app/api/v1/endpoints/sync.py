@@ -1,17 +1,17 @@
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, and_
-from sqlalchemy.orm import selectinload
 
 from app.api import deps
+from app.core.config import settings
 from app.db.session import get_db
-from app.models.session import Session
-from app.models.hand import Hand
-from app.models.transaction import Transaction
 from app.schemas.sync import SyncPullRequest, SyncPullResponse, SyncPushRequest
+from app.services.changelog import current_seq
+from app.services.idempotency import get_receipt, push_key, save_receipt
+from app.services.notifications import hub, stream_events
 from app.models.user import User
+from app.services.sync import PullCursor, apply_push, collect_page, start_pull, stream_page
 
 router = APIRouter()
 
@@ -20,124 +20,113 @@ async def pull_changes(
     request: SyncPullRequest,
     current_user: User = Depends(deps.get_current_user),
     db: AsyncSession = Depends(get_db),
-) -> SyncPullResponse:
-    
-    last_pulled_dt = None
-    if request.last_pulled_at:
-        # Convert timestamp (ms) to datetime
-        try:
-            last_pulled_dt = datetime.fromtimestamp(request.last_pulled_at / 1000.0)
-        except (ValueError, TypeError):
-             pass # Treat as full sync if invalid
-             
-    changes: Dict[str, Dict[str, List[Any]]] = {
-        "sessions": {"created": [], "updated": [], "deleted": []},
-        "hands": {"created": [], "updated": [], "deleted": []},
-        "transactions": {"created": [], "updated": [], "deleted": []},
-    }
-    
-    # 1. Sessions
-    query = select(Session).where(Session.user_id == current_user.id)
-    if last_pulled_dt:
-        query = query.where(Session.updated_at > last_pulled_dt)
-    
-    result = await db.execute(query)
-    sessions = result.scalars().all()
-    
-    for session in sessions:
-        # If created after last pull -> created (simplified logic, WDB handles created/updated similarly)
-        # For simplicity in WDB sync, we often put everything in 'updated' if checking updated_at
-        # But let's try to distinguish if possible, or just put all in created or updated.
-        # WatermelonDB: "The same record should not appear in both created and updated"
-        
-        # If we don't track exact creation time vs pull time efficiently, we can put all in 'updated' 
-        # as WDB handles upsert on 'updated'.
-        # However, for 'created' we usually mean "created on THIS device". 
-        # Implementation Detail: Sending everything as 'updated' is usually safer for simple sync unless we know it's new.
-        changes["sessions"]["updated"].append(session)
-
-    # 2. Hands (Assuming Hand has updated_at or created_at)
-    # Checking Hand model, it has created_at, but we need to check if it has updated_at.
-    # If not, we fall back to created_at check for new ones.
-    query_hands = select(Hand).where(Hand.user_id == current_user.id)
-    if last_pulled_dt:
-        # Ensure Hand has updated_at or use created_at
-        if hasattr(Hand, "updated_at"):
-             query_hands = query_hands.where(Hand.updated_at > last_pulled_dt)
-        else:
-             query_hands = query_hands.where(Hand.created_at > last_pulled_dt)
-
-    result_hands = await db.execute(query_hands)
-    hands = result_hands.scalars().all()
-    for hand in hands:
-        changes["hands"]["updated"].append(hand)
+):
+    """Return changes since ``last_pulled_at`` one bounded page at a time.
 
-    # 3. Transactions
-    query_tx = select(Transaction).where(Transaction.user_id == current_user.id)
-    if last_pulled_dt:
-        if hasattr(Transaction, "updated_at"):
-             query_tx = query_tx.where(Transaction.updated_at > last_pulled_dt)
-        else:
-             query_tx = query_tx.where(Transaction.created_at > last_pulled_dt)
+    ``timestamp`` is the user's change-log sequence rather than a clock
+    reading. The first page pins the change window; every following page must
+    send the returned ``cursor`` back until it comes back null. ``timestamp``
+    is the same on every page, so WatermelonDB gets a correct final value
+    whichever page it reads it from. With ``stream`` set, rows are written
+    out as they come off the DB cursor instead of being buffered.
+    ``format="columnar"`` opts into the compact wire format; old clients keep
+    getting row dicts.
+    """
+    if request.cursor:
+        cursor = PullCursor.decode(request.cursor)
+    else:
+        page_size = request.page_size
+        if page_size is None and not request.stream:
+            page_size = settings.SYNC_PULL_PAGE_SIZE
+        if page_size is not None:
+            page_size = min(page_size, settings.SYNC_PULL_MAX_PAGE_SIZE)
+        cursor = await start_pull(db, current_user.id, request.last_pulled_at, page_size, request.format)
 
-    result_tx = await db.execute(query_tx)
-    transactions = result_tx.scalars().all()
-    for tx in transactions:
-        changes["transactions"]["updated"].append(tx)
+    if request.stream:
+        return StreamingResponse(
+            stream_page(db, current_user.id, cursor),
+            media_type="application/json",
+        )
 
-    # Serialize (FastAPI handles this if return type matches, but we need to ensure dict structure)
-    # Actually, we need to return loose objects or Pydantic models. 
-    # Since we defined SyncPullResponse with Dict[str, ...], we might need to convert SQLAlchemy models to dicts 
-    # or rely on jsonable_encoder. 
-    # Since existing models are SQLAlchemy, we rely on them being iterable/convertible?
-    # No, FastAPI won't auto-convert list of SQL models to dict in a free-form Dict field easily without Pydantic config.
-    # But let's try returning them as is, usually FastAPI tries. 
-    # Better: explicit conversion if possible.
-    
-    # Returning timestamp in ms
-    timestamp = int(datetime.utcnow().timestamp() * 1000)
-    
+    changes = await collect_page(db, current_user.id, cursor)
     return SyncPullResponse(
         changes=changes,
-        timestamp=timestamp
+        timestamp=cursor.until,
+        cursor=None if cursor.done else cursor.encode(),
     )
 
 @router.post("/push")
 async def push_changes(
     request: SyncPushRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None),
     current_user: User = Depends(deps.get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    # request.changes has created/updated/deleted for each table
-    
-    # 1. Sessions
-    if "sessions" in request.changes:
-        # Created
-        for session_data in request.changes["sessions"].get("created", []):
-            # Remove client-side ID if we want server to assign, OR use client ID as UUID
-            # WatermelonDB uses string IDs (UUIDs). Our DB uses int IDs?
-            # Model says: id: Mapped[int].
-            # Problem: WatermelonDB generates String IDs. 
-            # Solution: We should upgrade DB to use UUIDs or have a mapping.
-            # OR we accept string ID if column allows, or we ignore client ID and return map?
-            # Check Session model: id is int. 
-            # This is a conflict. 
-            # If we want offline first with WatermelonDB, UUIDs are highly recommended for IDs.
-            # If I can't change to UUID, I need a recursive ID mapping strategy (complex).
-            # I will ASSUME for now we map client ID to a 'client_id' field or similar, 
-            # OR we try to parse int if they happen to be ints (unlikely).
-            
-            # Implementation Plan: 
-            # Since user is "Turn Pro Poker" app, let's assume standard WatermelonDB setup which uses UUIDs.
-            # We should probably change Primary Keys to String/UUID.
-            # But changing PKs is a big migration.
-            
-            # Quick fix: Add 'watermelon_id' column to map?
-            # Or just assume for this "mock" implementation we treat 'id' as convertible if possible 
-            # but usually it's not.
-            
-            # Let's try to just insert.
-            pass
-            
-    # For now, just return success to satisfy the interface while we figure out UUIDs.
-    return {"status": "success"}
+    """Apply created, updated and deleted records from a WatermelonDB push.
+
+    All three tables are written in one transaction with multi-row upserts,
+    so a push of a thousand records costs a handful of round trips. Retries
+    (same ``Idempotency-Key`` header, body key or payload) are answered from
+    the dedup log without touching the synced tables.
+    """
+    key = push_key(request, idempotency_key)
+    stored = await get_receipt(db, current_user.id, key)
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return stored
+
+    seq = await apply_push(db, current_user.id, request.changes, request.last_pulled_at)
+    outcome = {"status": "success", "timestamp": seq}
+    await save_receipt(db, current_user.id, key, outcome)
+    await db.commit()
+    return outcome
+
+
+@router.get("/subscribe")
+async def subscribe_changes(
+    request: Request,
+    since: int = Query(0, ge=0),
+    timeout: float = Query(
+        settings.SYNC_SUBSCRIBE_TIMEOUT_SECONDS,
+        gt=0,
+        le=settings.SYNC_SUBSCRIBE_MAX_TIMEOUT_SECONDS,
+    ),
+    current_user: User = Depends(deps.get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Wait until the user's data moves past ``since`` (a pull ``timestamp``).
+
+    Long-poll by default: answers ``{"changed": true, "timestamp": ...}`` as
+    soon as something changes, or ``changed: false`` after ``timeout``
+    seconds. Clients sending ``Accept: text/event-stream`` get a Server-Sent
+    Events stream of ``change`` events instead. Either way the DB is read
+    once per call and no connection is held while waiting.
+    """
+    # Subscribe before reading the sequence so a commit in between is not lost
+    subscription = hub.subscribe(current_user.id, since)
+    try:
+        seq = await current_seq(db, current_user.id)
+        await db.commit()
+    except Exception:
+        hub.unsubscribe(subscription)
+        raise
+
+    # A ``since`` beyond the sequence is a legacy wall-clock checkpoint; the
+    # client has to pull to upgrade it.
+    stale = seq != since
+    if "text/event-stream" in request.headers.get("accept", ""):
+        subscription.seq = seq if since > seq else max(subscription.seq, seq)
+        return StreamingResponse(
+            stream_events(request, subscription, settings.SYNC_SSE_HEARTBEAT_SECONDS, stale),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    try:
+        if stale:
+            return {"changed": True, "timestamp": seq}
+        changed = await subscription.wait(timeout)
+    finally:
+        hub.unsubscribe(subscription)
+    return {"changed": changed is not None, "timestamp": changed or seq}
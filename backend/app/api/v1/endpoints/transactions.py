@@ -1,14 +1,18 @@
 """Bankroll transaction endpoints."""
-from typing import List
+import uuid
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select
 
 from app.db.session import get_db
 from app.models.user import User
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionResponse
-from app.api.deps import get_current_user
+from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionListResponse
+from app.api.deps import conditional_get, get_current_user
+from app.services.changelog import delete_records, record_changes
+from app.services.pagination import keyset_page
+from app.services.rollup import tracking
 
 router = APIRouter()
 
@@ -20,34 +24,38 @@ async def create_transaction(
     current_user: User = Depends(get_current_user)
 ):
     """Create a new bankroll transaction."""
-    transaction = Transaction(user_id=current_user.id, **transaction_data.model_dump())
-    db.add(transaction)
+    transaction = Transaction(id=str(uuid.uuid4()), user_id=current_user.id, **transaction_data.model_dump())
+    async with tracking(db, current_user.id, "transactions", [transaction.id]):
+        db.add(transaction)
+    await record_changes(db, current_user.id, "transactions", [transaction.id])
     await db.commit()
     await db.refresh(transaction)
     return transaction
 
 
-@router.get("/", response_model=List[TransactionResponse])
+@router.get("/", response_model=TransactionListResponse)
 async def get_transactions(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    _etag: str = Depends(conditional_get)
 ):
-    """Get user's transactions."""
-    result = await db.execute(
-        select(Transaction)
-        .where(Transaction.user_id == current_user.id)
-        .order_by(desc(Transaction.created_at))
-        .offset(skip)
-        .limit(limit)
+    """Get user's transactions, newest first, one page at a time."""
+    items, next_cursor = await keyset_page(
+        db,
+        select(Transaction).where(Transaction.user_id == current_user.id),
+        Transaction.created_at,
+        Transaction.id,
+        cursor,
+        limit,
     )
-    return result.scalars().all()
+    return TransactionListResponse(items=items, next_cursor=next_cursor)
 
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transaction(
-    transaction_id: int,
+    transaction_id: str,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -61,5 +69,5 @@ async def delete_transaction(
     transaction = result.scalar_one_or_none()
     if not transaction:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transaction not found")
-    await db.delete(transaction)
+    await delete_records(db, current_user.id, "transactions", [transaction.id])
     await db.commit()
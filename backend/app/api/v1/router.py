@@ -1,11 +1,15 @@
 """API v1 Router - aggregates all endpoint routers."""
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, users, sync, webhooks
+from app.api.v1.endpoints import auth, users, sessions, transactions, hands, sync, stats, webhooks
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["Users"])
+api_router.include_router(sessions.router, prefix="/sessions", tags=["Sessions"])
+api_router.include_router(transactions.router, prefix="/transactions", tags=["Transactions"])
+api_router.include_router(hands.router, prefix="/hands", tags=["Hands"])
 api_router.include_router(sync.router, prefix="/sync", tags=["Sync"])
+api_router.include_router(stats.router, prefix="/stats", tags=["Statistics"])
 api_router.include_router(webhooks.router, prefix="/webhooks", tags=["Webhooks"])
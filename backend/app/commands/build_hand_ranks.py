@@ -0,0 +1,24 @@
+"""Build the hand-evaluator lookup table.
+
+WHY: The table (see ``app.services.evaluator``) takes seconds to build and
+is otherwise built by the first request that needs it; run this at deploy
+or image build time instead.
+
+    python -m app.commands.build_hand_ranks
+"""
+import argparse
+import logging
+
+from app.core.config import settings
+from app.services.evaluator import write_table
+
+logger = logging.getLogger(__name__)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Build the hand-evaluator lookup table.")
+    parser.add_argument("--path", default=settings.HAND_RANKS_PATH)
+    args = parser.parse_args()
+    write_table(args.path)
+    logger.info("Wrote hand rank table to %s", args.path)
@@ -0,0 +1,32 @@
+"""Recompute anonymized population benchmarks.
+
+WHY: Benchmarks are a batch product (see ``app.services.population``);
+schedule this nightly. Scans run in worker processes.
+
+    python -m app.commands.compute_benchmarks
+    python -m app.commands.compute_benchmarks --workers 8
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.population import compute_benchmarks
+
+logger = logging.getLogger(__name__)
+
+
+async def main(workers: int = 0) -> None:
+    async with AsyncSessionLocal() as db:
+        stored = await compute_benchmarks(db, settings.DATABASE_URL, workers)
+        await db.commit()
+    logger.info("Stored %d population benchmarks", stored)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Recompute anonymized population benchmarks.")
+    parser.add_argument("--workers", type=int, default=settings.BENCHMARK_WORKERS, help="0 = one per CPU")
+    args = parser.parse_args()
+    asyncio.run(main(args.workers))
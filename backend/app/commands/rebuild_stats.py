@@ -0,0 +1,33 @@
+"""Rebuild stats rollups, daily chart buckets, HUD stats and hand search
+columns from the source tables.
+
+WHY: All of these are maintained on write; anything that writes sessions,
+transactions or hands behind the API's back (manual SQL, restores) makes
+them drift, and hands stored before a derived column existed lack it.
+
+    python -m app.commands.rebuild_stats            # every user
+    python -m app.commands.rebuild_stats --user-id 42
+"""
+import argparse
+import asyncio
+import logging
+
+from app.db.session import AsyncSessionLocal
+from app.services.rollup import rebuild_rollups
+
+logger = logging.getLogger(__name__)
+
+
+async def main(user_id: int = None) -> None:
+    async with AsyncSessionLocal() as db:
+        rebuilt = await rebuild_rollups(db, user_id)
+        await db.commit()
+    logger.info("Rebuilt %d stats rollups", rebuilt)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rebuild stats rollups from the source tables.")
+    parser.add_argument("--user-id", type=int, help="Only rebuild this user's rollup and buckets")
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id))
@@ -0,0 +1,200 @@
+"""HTTP body compression for large sync payloads.
+
+WHY: Sync pulls and pushes for long-time players run to megabytes of highly
+repetitive JSON. Responses are compressed with zstd when the client accepts
+it (and the optional ``zstandard`` package is installed), otherwise gzip.
+Request bodies sent with ``Content-Encoding: gzip|zstd`` are decoded before
+they reach FastAPI, so clients can compress pushes too. Decoding is
+incremental and stops with 413 past ``MAX_DECODED_BODY_BYTES``: a few
+kilobytes can otherwise expand to gigabytes in memory.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # Optional: gzip only
+    zstandard = None
+
+# Bodies smaller than this are not worth the compression overhead
+MINIMUM_SIZE = 500
+# Compressed bytes fed to zstd at a time. Its decompressor has no output
+# limit, and an RLE block turns 4 bytes into 128 KiB, so this bounds the
+# overshoot past the limit to about 8 MiB.
+ZSTD_INPUT_STEP = 256
+
+
+def supported_encodings() -> tuple:
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an ``Accept-Encoding`` header."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token.lower()] = quality
+    for encoding in supported_encodings():
+        if accepted.get(encoding, 0) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=3).compressobj()
+            self._sync = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            self._finish = zstandard.COMPRESSOBJ_FLUSH_FINISH
+        else:
+            self._obj = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self._sync = zlib.Z_SYNC_FLUSH
+            self._finish = zlib.Z_FINISH
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Streamed chunks are flushed so they reach the client immediately
+        return self._obj.compress(data) + self._obj.flush(self._finish if final else self._sync)
+
+
+class _Decompressor:
+    """Decodes a request body, refusing to produce more than ``limit`` bytes."""
+
+    def __init__(self, encoding: str, limit: int):
+        self.encoding = encoding
+        self.limit = limit
+        self.size = 0
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            self._obj = zlib.decompressobj(31)
+
+    def _count(self, piece: bytes) -> bytes:
+        self.size += len(piece)
+        if self.size > self.limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Decompressed request bodies are limited to {self.limit} bytes",
+            )
+        return piece
+
+    def decompress(self, data: bytes, final: bool) -> bytes:
+        pieces = []
+        if self.encoding == "zstd":
+            view = memoryview(data)
+            for start in range(0, len(view), ZSTD_INPUT_STEP):
+                pieces.append(self._count(self._obj.decompress(view[start:start + ZSTD_INPUT_STEP])))
+        else:
+            while data:
+                # At most one byte past the limit, so exceeding it is detected
+                pieces.append(self._count(self._obj.decompress(data, self.limit - self.size + 1)))
+                data = self._obj.unconsumed_tail
+            if final:
+                pieces.append(self._count(self._obj.flush()))
+        return b"".join(pieces)
+
+
+class CompressionMiddleware:
+    """Negotiate zstd/gzip for responses and decode compressed requests."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "").lower()
+        if content_encoding and content_encoding != "identity":
+            if content_encoding not in supported_encodings():
+                response = PlainTextResponse(
+                    f"Unsupported Content-Encoding: {content_encoding}", status_code=415
+                )
+                await response(scope, receive, send)
+                return
+            scope, receive = self._decoding(scope, receive, content_encoding)
+
+        encoding = choose_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self.minimum_size))
+
+    @staticmethod
+    def _decoding(scope: Scope, receive: Receive, encoding: str):
+        decoder = _Decompressor(encoding, settings.MAX_DECODED_BODY_BYTES)
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value)
+            for name, value in scope["headers"]
+            if name not in (b"content-encoding", b"content-length")
+        ]
+
+        async def decoding_receive() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body = decoder.decompress(message.get("body", b""), final=not message.get("more_body", False))
+                message = {**message, "body": body}
+            return message
+
+        return scope, decoding_receive
+
+
+class _CompressingSend:
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if "content-encoding" in headers or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            del headers["content-length"]
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # A strong tag names exact bytes; the encoded body gets its own
+                headers["etag"] = f'{headers["etag"][:-1]}-{self.encoding}"'
+            await self.send(start)
+
+        await self.send({
+            "type": "http.response.body",
+            "body": self.compressor.compress(body, final=not more_body),
+            "more_body": more_body,
+        })
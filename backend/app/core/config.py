@@ -24,6 +24,36 @@ class Settings(BaseSettings):
     PREMIUM_SESSION_LIMIT: int = 500
     PRO_SESSION_LIMIT: int = -1
     
+    SYNC_PULL_PAGE_SIZE: int = 500
+    SYNC_PULL_MAX_PAGE_SIZE: int = 5000
+    TOMBSTONE_RETENTION_DAYS: int = 90
+    COMPACTION_INTERVAL_MINUTES: int = 60
+    PUSH_DEDUP_TTL_HOURS: int = 24
+    PUSH_DEDUP_MAX_PER_USER: int = 20
+    SYNC_NOTIFY_BACKEND: str = "memory"  # "memory" or "postgres"
+    SYNC_SUBSCRIBE_TIMEOUT_SECONDS: int = 25
+    SYNC_SUBSCRIBE_MAX_TIMEOUT_SECONDS: int = 60
+    SYNC_SSE_HEARTBEAT_SECONDS: int = 15
+    ANALYTICS_CACHE_SIZE: int = 1024
+    SIMULATION_WORKERS: int = 0  # 0 = one per CPU
+    SIMULATION_MAX_TRAJECTORIES: int = 100000
+    SIMULATION_MAX_HANDS: int = 1000000
+    BENCHMARK_WORKERS: int = 0  # 0 = one per CPU
+    BENCHMARK_MIN_PLAYERS: int = 20
+    BENCHMARK_MIN_HOURS: int = 20
+    HAND_IMPORT_CHUNK_BYTES: int = 1024 * 1024
+    HAND_IMPORT_WORKERS: int = 0  # 0 = one per CPU
+    HAND_IMPORT_SPOOL_BYTES: int = 1024 * 1024
+    HAND_IMPORT_MAX_BYTES: int = 200 * 1024 * 1024
+    # Decoded size of a compressed request body; room for a full hand import
+    MAX_DECODED_BODY_BYTES: int = 256 * 1024 * 1024
+    HAND_RANKS_PATH: str = f"{BASE_DIR}/hand_ranks.npy"
+    EQUITY_WORKERS: int = 0  # 0 = one per CPU
+    EQUITY_EXACT_MAX_BOARDS: int = 2000000
+    EQUITY_MAX_SAMPLES: int = 1000000
+    ALL_IN_EV_SAMPLES: int = 20000
+    ALL_IN_EV_EXACT_MAX_BOARDS: int = 50000
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
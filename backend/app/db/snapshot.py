@@ -0,0 +1,51 @@
+"""Concurrent reads inside one shared Postgres snapshot.
+
+WHY: Independent queries issued one after another on a single connection
+cost one network round trip each. Postgres lets a REPEATABLE READ
+transaction export its snapshot (``pg_export_snapshot()``) and other
+transactions import it (``SET TRANSACTION SNAPSHOT``), so the queries can
+run in parallel on pooled connections and still see exactly the same data.
+"""
+import asyncio
+import re
+from typing import Awaitable, Callable, List, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+T = TypeVar("T")
+
+Reader = Callable[[AsyncConnection], Awaitable[T]]
+
+# e.g. 00000003-0000001B-1; checked because SET cannot take bind parameters
+_SNAPSHOT_ID = re.compile(r"^[0-9A-F]+(-[0-9A-F]+)+$")
+
+
+async def _repeatable_read(conn: AsyncConnection) -> AsyncConnection:
+    return await conn.execution_options(isolation_level="REPEATABLE READ")
+
+
+async def gather_in_snapshot(engine: AsyncEngine, readers: List[Reader]) -> List[T]:
+    """Run each reader on its own connection, all in one snapshot.
+
+    The first reader runs on the exporting connection itself, so ``n``
+    readers hold ``n`` pooled connections. The exporting transaction stays
+    open until every reader is done, which keeps the snapshot importable.
+    """
+    async with engine.connect() as exporter:
+        await _repeatable_read(exporter)
+        snapshot_id = await exporter.scalar(text("SELECT pg_export_snapshot()"))
+        if not _SNAPSHOT_ID.match(snapshot_id):
+            raise RuntimeError(f"Unexpected snapshot id {snapshot_id!r}")
+
+        async def run_imported(reader: Reader) -> T:
+            async with engine.connect() as conn:
+                await _repeatable_read(conn)
+                # Must be the first statement of the transaction
+                await conn.execute(text(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'"))
+                return await reader(conn)
+
+        return list(await asyncio.gather(
+            readers[0](exporter),
+            *(run_imported(reader) for reader in readers[1:]),
+        ))
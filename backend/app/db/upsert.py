@@ -0,0 +1,40 @@
+"""Dialect-aware INSERT ... ON CONFLICT support.
+
+WHY: Postgres (prod) and SQLite (dev/tests) both support upserts with the
+same SQLAlchemy API, but through dialect-specific ``insert`` constructs.
+"""
+from typing import Any, Iterator, List
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.bind.dialect.name
+
+
+def upsert(db: AsyncSession, table: Any):
+    """Return an ``insert()`` for ``table`` that supports ``on_conflict_*``."""
+    try:
+        return _INSERTS[dialect_name(db)](table)
+    except KeyError:
+        raise NotImplementedError(f"Upserts are not supported on {dialect_name(db)}")
+
+
+# Bind parameters per statement; below SQLite's 32766 and asyncpg's 32767
+MAX_BIND_PARAMS = 30000
+
+
+def chunked(items: List[Any], max_params: int = MAX_BIND_PARAMS) -> Iterator[List[Any]]:
+    """Split multi-row VALUES (dicts) or IN lists (scalars) to fit the bind-param limit."""
+    if not items:
+        return
+    width = len(items[0]) if isinstance(items[0], dict) else 1
+    size = max(1, max_params // max(1, width))
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -2,23 +2,38 @@
 
 WHY: Central app configuration with lifespan management for DB setup.
 """
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
 from app.db.base import Base
 from app.db.session import engine
 from app.models import User, Session, Transaction, Hand
 from app.api.v1.router import api_router
+from app.services.maintenance import compaction_loop
+from app.services.notifications import configure_hub, hub
+from app.services import equity, hand_import, simulation
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Create database tables on startup."""
+    """Create database tables and start background services on startup."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    configure_hub(settings.SYNC_NOTIFY_BACKEND, engine)
+    await hub.start()
+    compaction = asyncio.create_task(compaction_loop())
     yield
+    compaction.cancel()
+    with suppress(asyncio.CancelledError):
+        await compaction
+    await hub.stop()
+    simulation.shutdown_pool()
+    hand_import.shutdown_pool()
+    equity.shutdown_pool()
     await engine.dispose()
 
 
@@ -35,6 +50,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
 
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
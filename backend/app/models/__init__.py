@@ -2,5 +2,8 @@ from app.models.user import User, SubscriptionTier
 from app.models.session import Session
 from app.models.transaction import Transaction
 from app.models.hand import Hand
+from app.models.sync import SyncState, ChangeLog, Tombstone, PushReceipt
+from app.models.stats import StatsRollup, StatsBucket, StatsBucketZone, HandStats, HudCounters
+from app.models.benchmark import PopulationBenchmark
 
-__all__ = ["User", "SubscriptionTier", "Session", "Transaction", "Hand"]
+__all__ = ["User", "SubscriptionTier", "Session", "Transaction", "Hand", "SyncState", "ChangeLog", "Tombstone", "PushReceipt", "StatsRollup", "StatsBucket", "StatsBucketZone", "HandStats", "HudCounters", "PopulationBenchmark"]
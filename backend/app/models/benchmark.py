@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PopulationBenchmark(Base):
+    """Distribution of one metric across players at one stakes.
+
+    Written wholesale by the nightly ``compute_benchmarks`` job; holds only
+    a quantile sketch of per-player values, never per-user rows. Stakes
+    with fewer than ``BENCHMARK_MIN_PLAYERS`` players are left out.
+    """
+    __tablename__ = "population_benchmarks"
+
+    stakes: Mapped[str] = mapped_column(String(20), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(20), primary_key=True)
+    players: Mapped[int] = mapped_column(Integer)
+    sketch: Mapped[dict] = mapped_column(JSON)
+    computed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
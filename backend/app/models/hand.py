@@ -4,7 +4,7 @@ from datetime import datetime
 import uuid
 from decimal import Decimal
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, DateTime, ForeignKey, Numeric, Text, JSON
+from sqlalchemy import String, DateTime, ForeignKey, Index, Numeric, SmallInteger, Text, JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -26,6 +26,23 @@ class Hand(Base):
     hero_cards: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     community_cards: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    # Filled by hand-history imports (app.services.hand_history); hands
+    # recorded on the device leave them empty, except ``played_at`` which
+    # they take from ``created_at``
+    external_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    played_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    small_blind: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    big_blind: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    rake: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    seats: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    pots: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    # Search columns derived on write (app.services.hand_search)
+    hole_class: Mapped[Optional[str]] = mapped_column(String(3), nullable=True)
+    board_texture: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    pot_bb: Mapped[Optional[Decimal]] = mapped_column(Numeric(10, 2), nullable=True)
+    # Cached by app.services.all_in_ev, with a digest of the inputs it used
+    all_in_ev: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
     
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(
@@ -33,3 +50,15 @@ class Hand(Base):
     )
 
     user: Mapped["User"] = relationship("User", back_populates="hands")
+
+    # Re-importing a file skips hands already stored; a session's hands are
+    # repriced when its big blind changes; the rest serve hand search,
+    # newest first
+    __table_args__ = (
+        Index("ux_hands_user_external", "user_id", "external_id", unique=True),
+        Index("ix_hands_user_session", "user_id", "session_id"),
+        Index("ix_hands_user_played", "user_id", "played_at", "id"),
+        Index("ix_hands_user_hole_class", "user_id", "hole_class", "played_at", "id"),
+        Index("ix_hands_user_texture", "user_id", "board_texture", "played_at", "id"),
+        Index("ix_hands_user_pot_bb", "user_id", "pot_bb"),
+    )
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timezone
 import uuid
 from decimal import Decimal
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, DateTime, ForeignKey, Numeric, Integer, Text
+from sqlalchemy import String, DateTime, ForeignKey, Index, Numeric, Integer, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -13,6 +13,23 @@ if TYPE_CHECKING:
     from app.models.user import User
 
 
+def hours_between(start_time: Optional[datetime], end_time: Optional[datetime]) -> Optional[Decimal]:
+    """Hours played from ``start_time`` to ``end_time``, to the hundredth.
+
+    None unless both are set and the end is later. Shared by every path
+    that writes sessions so they store the same hours for the same times.
+    """
+    if start_time is None or end_time is None:
+        return None
+    start, end = (
+        value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+        for value in (start_time, end_time)
+    )
+    if end <= start:
+        return None
+    return round(Decimal((end - start).total_seconds()) / Decimal(3600), 2)
+
+
 class Session(Base):
     __tablename__ = "sessions"
 
@@ -26,6 +43,8 @@ class Session(Base):
     
     buy_in: Mapped[Decimal] = mapped_column(Numeric(10, 2))
     cash_out: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0"))
+    tips: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0"))
+    expenses: Mapped[Decimal] = mapped_column(Numeric(10, 2), default=Decimal("0"))
     
     location: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
     table_info: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
@@ -43,6 +62,15 @@ class Session(Base):
 
     user: Mapped["User"] = relationship("User", back_populates="sessions")
 
+    # Listing pages seek on (start_time, id); per-user breakdowns read each
+    # group's rows in index order
+    __table_args__ = (
+        Index("ix_sessions_user_start", "user_id", "start_time", "id"),
+        Index("ix_sessions_user_stakes", "user_id", "stakes"),
+        Index("ix_sessions_user_location", "user_id", "location"),
+        Index("ix_sessions_user_game_type", "user_id", "game_type"),
+    )
+
     @property
     def profit(self) -> Decimal:
         return self.cash_out - self.buy_in
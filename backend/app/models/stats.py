@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, ForeignKey, Index, Integer, Numeric, SmallInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class StatsRollup(Base):
+    """Running per-user totals behind ``/stats``.
+
+    Kept in step with sessions and transactions by ``app.services.rollup``
+    in the same transaction as each write. Column names match the labels of
+    ``app.services.stats.totals_query``, which rebuilds a row from scratch.
+    """
+    __tablename__ = "stats_rollups"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_sessions: Mapped[int] = mapped_column(Integer, default=0)
+    winning_sessions: Mapped[int] = mapped_column(Integer, default=0)
+    losing_sessions: Mapped[int] = mapped_column(Integer, default=0)
+    total_profit: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    total_tips: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    total_expenses: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    total_hours: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"))
+    bb_won: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    tips_bb: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    expenses_bb: Mapped[Decimal] = mapped_column(Numeric(18, 6), default=Decimal("0"))
+    total_deposits: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    total_withdrawals: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class StatsBucketZone(Base):
+    """A timezone whose daily buckets are kept for a user.
+
+    Registered (and its buckets built) on the first ``/stats/series``
+    request in that timezone; from then on every write updates it.
+    """
+    __tablename__ = "stats_bucket_zones"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tz: Mapped[str] = mapped_column(String(64), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+
+
+class StatsBucket(Base):
+    """Per-user totals of one local calendar day in one timezone.
+
+    Sessions count on the day of ``start_time``, transactions on the day of
+    ``created_at``. Kept in step by ``app.services.buckets`` alongside the
+    stats rollup.
+    """
+    __tablename__ = "stats_buckets"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    tz: Mapped[str] = mapped_column(String(64), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    sessions: Mapped[int] = mapped_column(Integer, default=0)
+    profit: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    tips: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    expenses: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    hours: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"))
+    deposits: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+    withdrawals: Mapped[Decimal] = mapped_column(Numeric(14, 2), default=Decimal("0"))
+
+
+class HandStats(Base):
+    """The hero's HUD flags for one hand, derived from its ``actions``.
+
+    Kept in step with ``hands`` by ``app.services.hud``. ``flags`` holds the
+    ``app.services.hud`` bits; the covering index lets filtered HUD totals
+    be summed from the index alone.
+    """
+    __tablename__ = "hand_stats"
+
+    hand_id: Mapped[str] = mapped_column(ForeignKey("hands.id", ondelete="CASCADE"), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    session_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True)
+    played_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    flags: Mapped[int] = mapped_column(SmallInteger, default=0)
+    # Postflop bets and raises, and calls, for the aggression factor
+    aggressive: Mapped[int] = mapped_column(SmallInteger, default=0)
+    calls: Mapped[int] = mapped_column(SmallInteger, default=0)
+
+    __table_args__ = (
+        Index("ix_hand_stats_user_played", "user_id", "played_at", "flags", "aggressive", "calls"),
+        Index("ix_hand_stats_user_session", "user_id", "session_id", "flags", "aggressive", "calls"),
+    )
+
+
+class HudCounters(Base):
+    """Running per-user HUD totals over every hand, behind an unfiltered HUD."""
+    __tablename__ = "hud_counters"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    hands: Mapped[int] = mapped_column(Integer, default=0)
+    vpip: Mapped[int] = mapped_column(Integer, default=0)
+    pfr: Mapped[int] = mapped_column(Integer, default=0)
+    three_bet_opportunities: Mapped[int] = mapped_column(Integer, default=0)
+    three_bets: Mapped[int] = mapped_column(Integer, default=0)
+    saw_flop: Mapped[int] = mapped_column(Integer, default=0)
+    went_to_showdown: Mapped[int] = mapped_column(Integer, default=0)
+    won_at_showdown: Mapped[int] = mapped_column(Integer, default=0)
+    aggressive: Mapped[int] = mapped_column(Integer, default=0)
+    calls: Mapped[int] = mapped_column(Integer, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow
+    )
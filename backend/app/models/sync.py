@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, JSON, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SyncState(Base):
+    """Per-user change counter.
+
+    ``seq`` only moves forward and is bumped (row-locked) in the same
+    transaction as every mutation, so commits become visible in seq order.
+    ``tombstone_floor`` is the highest tombstone seq purged by compaction;
+    clients that last pulled before it can no longer sync incrementally.
+    """
+    __tablename__ = "sync_state"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger, default=0)
+    tombstone_floor: Mapped[int] = mapped_column(BigInteger, default=0)
+
+
+class ChangeLog(Base):
+    """Latest change sequence per synced record.
+
+    One row per record: a new change overwrites ``seq`` rather than appending,
+    so the log stays as small as the data it tracks.
+    """
+    __tablename__ = "change_log"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(20), primary_key=True)
+    record_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger)
+
+    __table_args__ = (
+        Index("ix_change_log_user_seq", "user_id", "seq"),
+    )
+
+
+class Tombstone(Base):
+    """Deleted record marker so deletions reach other devices incrementally.
+
+    Purged after ``TOMBSTONE_RETENTION_DAYS`` by the compaction job.
+    """
+    __tablename__ = "tombstones"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(20), primary_key=True)
+    record_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        Index("ix_tombstones_user_seq", "user_id", "seq"),
+    )
+
+
+class PushReceipt(Base):
+    """Stored outcome of an applied push, keyed by its idempotency key.
+
+    Lets a retried push be answered with one primary-key lookup. Entries
+    expire after ``PUSH_DEDUP_TTL_HOURS`` and are capped per user.
+    """
+    __tablename__ = "push_receipts"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    response: Mapped[dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, index=True)
@@ -4,7 +4,7 @@ from datetime import datetime
 import uuid
 from decimal import Decimal
 from typing import Optional, TYPE_CHECKING
-from sqlalchemy import String, DateTime, ForeignKey, Numeric, Text, Enum as SQLEnum
+from sqlalchemy import String, DateTime, ForeignKey, Index, Numeric, Text, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -36,3 +36,8 @@ class Transaction(Base):
     )
 
     user: Mapped["User"] = relationship("User", back_populates="transactions")
+
+    # Listing pages seek on (created_at, id)
+    __table_args__ = (
+        Index("ix_transactions_user_created", "user_id", "created_at", "id"),
+    )
@@ -0,0 +1,55 @@
+"""Hand schemas for hand histories, equity, HUD stats and search."""
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel
+
+
+class EquityPlayer(BaseModel):
+    """One player's share of the pot; ``cards`` is None for a random hand."""
+    cards: Optional[List[str]] = None
+    equity: float
+    win: float
+    tie: float
+
+
+class EquityResponse(BaseModel):
+    """Hero first, then the villains in the order given."""
+    hand_id: str
+    board: List[str]
+    method: Literal["exact", "monte_carlo"]
+    boards: int
+    players: List[EquityPlayer]
+
+
+class HudResponse(BaseModel):
+    """Percentages are None until their denominator is non-zero."""
+    hands: int
+    vpip: Optional[float] = None
+    pfr: Optional[float] = None
+    three_bet: Optional[float] = None
+    aggression_factor: Optional[float] = None
+    went_to_showdown: Optional[float] = None
+    won_at_showdown: Optional[float] = None
+    counts: Dict[str, int]
+
+
+class HandSummary(BaseModel):
+    """A hand as listed by search, without its actions and seats."""
+    id: str
+    session_id: Optional[str] = None
+    played_at: datetime
+    hero_cards: Optional[List[str]] = None
+    community_cards: Optional[List[str]] = None
+    hole_class: Optional[str] = None
+    board_texture: List[str] = []
+    street: str
+    pot: Decimal
+    pot_bb: Optional[Decimal] = None
+
+
+class HandSearchResponse(BaseModel):
+    """One page of matching hands, newest first."""
+    items: List[HandSummary]
+    # Pass back as ``cursor`` for the next page; None on the last page
+    next_cursor: Optional[str] = None
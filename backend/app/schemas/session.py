@@ -1,22 +1,25 @@
 """Session schemas for request/response validation."""
-from datetime import date, datetime
+from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
 class SessionBase(BaseModel):
     """Base session schema."""
-    session_date: date
-    location: str = Field(..., max_length=255)
     game_type: str = Field(default="cash", max_length=50)
+    stakes: str = Field(..., max_length=20)
     small_blind: Decimal = Field(default=Decimal("1.00"), ge=0)
     big_blind: Decimal = Field(..., gt=0)
     buy_in: Decimal = Field(..., gt=0)
     cash_out: Decimal = Field(..., ge=0)
     tips: Decimal = Field(default=Decimal("0.00"), ge=0)
     expenses: Decimal = Field(default=Decimal("0.00"), ge=0)
-    hours_played: Decimal = Field(..., gt=0)
+    location: Optional[str] = Field(None, max_length=100)
+    table_info: Optional[str] = Field(None, max_length=100)
+    start_time: datetime
+    end_time: Optional[datetime] = None
+    hours_played: Optional[Decimal] = Field(None, gt=0)
     notes: Optional[str] = None
 
 
@@ -27,30 +30,63 @@ class SessionCreate(SessionBase):
 
 class SessionUpdate(BaseModel):
     """Schema for updating a session."""
-    session_date: Optional[date] = None
-    location: Optional[str] = Field(None, max_length=255)
     game_type: Optional[str] = Field(None, max_length=50)
+    stakes: Optional[str] = Field(None, max_length=20)
     small_blind: Optional[Decimal] = Field(None, ge=0)
     big_blind: Optional[Decimal] = Field(None, gt=0)
     buy_in: Optional[Decimal] = Field(None, gt=0)
     cash_out: Optional[Decimal] = Field(None, ge=0)
     tips: Optional[Decimal] = Field(None, ge=0)
     expenses: Optional[Decimal] = Field(None, ge=0)
+    location: Optional[str] = Field(None, max_length=100)
+    table_info: Optional[str] = Field(None, max_length=100)
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
     hours_played: Optional[Decimal] = Field(None, gt=0)
     notes: Optional[str] = None
 
 
 class SessionResponse(SessionBase):
     """Schema for session response."""
-    id: int
+    id: str
     user_id: int
     profit: Decimal
-    net_profit: Decimal
-    bb_won: Decimal
-    hourly_rate: Decimal
-    estimated_hands: int
+    hourly_rate: Optional[Decimal]
+    bb_per_100: Optional[Decimal]
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class SessionListResponse(BaseModel):
+    """One page of sessions, newest first."""
+    items: List[SessionResponse]
+    # Pass back as ``cursor`` for the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+
+class AllInHand(BaseModel):
+    """One hand that was all-in before the river; chips are the hero's net."""
+    hand_id: str
+    street: str
+    equity: float
+    pot: float
+    actual: float
+    expected: float
+
+
+class AllInEvResponse(BaseModel):
+    """A session's results with all-in luck taken out."""
+    session_id: str
+    profit: Decimal
+    hands: int
+    # Hands annotated by this request rather than read from the cache
+    computed: int
+    all_in_hands: int
+    actual: float
+    expected: float
+    luck: float
+    all_in_adjusted_profit: float
+    all_ins: List[AllInHand]
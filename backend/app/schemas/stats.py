@@ -1,10 +1,12 @@
 """Statistics schemas for analytics responses."""
+from datetime import date, datetime
 from decimal import Decimal
+from typing import List, Literal, Optional
 from pydantic import BaseModel
 
 
-class StatsResponse(BaseModel):
-    """Comprehensive stats response."""
+class SessionStats(BaseModel):
+    """Session results and rates."""
     total_sessions: int
     winning_sessions: int
     losing_sessions: int
@@ -19,5 +21,119 @@ class StatsResponse(BaseModel):
     bb_per_100: Decimal
     net_bb_per_100: Decimal
     win_rate_percentage: Decimal
+
+
+class StatsResponse(SessionStats):
+    """Comprehensive stats response."""
     current_bankroll: Decimal
     initial_bankroll: Decimal
+
+
+class StatsBreakdownRow(SessionStats):
+    """Session stats of one group; ``group`` is None for sessions without a value."""
+    group: Optional[str] = None
+
+
+class StatsBreakdownResponse(BaseModel):
+    group_by: Literal["stakes", "location", "game_type", "weekday", "hour"]
+    tz: str
+    groups: List[StatsBreakdownRow]
+
+
+class StatsSeriesPoint(BaseModel):
+    """Totals of one chart period plus running totals at its end."""
+    period_start: date
+    sessions: int
+    profit: Decimal
+    net_profit: Decimal
+    hours: Decimal
+    deposits: Decimal
+    withdrawals: Decimal
+    cumulative_profit: Decimal
+    cumulative_net_profit: Decimal
+    bankroll: Decimal
+
+
+class StatsSeriesResponse(BaseModel):
+    """Bankroll and profit series bucketed by calendar period."""
+    bucket: Literal["day", "week", "month", "year"]
+    tz: str
+    start: Optional[date] = None
+    end: Optional[date] = None
+    # Running totals from before ``start``; the line's starting point
+    opening_profit: Decimal
+    opening_net_profit: Decimal
+    opening_bankroll: Decimal
+    # Periods without any session or transaction are omitted
+    points: List[StatsSeriesPoint]
+    # Periods in range before downsampling to the requested point budget
+    total_points: int = 0
+
+
+class AdvancedStatsResponse(BaseModel):
+    """Variance and risk measures; None where there are too few sessions."""
+    sessions: int
+    total_hours: float
+    hourly_rate: float
+    hourly_std_dev: Optional[float] = None
+    # 95% confidence interval on the true hourly rate
+    hourly_rate_ci_low: Optional[float] = None
+    hourly_rate_ci_high: Optional[float] = None
+    bb_per_100: float
+    std_dev_per_100: Optional[float] = None
+    bb_per_100_ci_low: Optional[float] = None
+    bb_per_100_ci_high: Optional[float] = None
+    # Largest peak-to-trough fall of the bankroll, and the longest time under a peak
+    max_drawdown: float
+    longest_downswing_sessions: int
+    longest_downswing_hours: float
+    current_bankroll: float
+    # Chance of going broke from the current bankroll at the observed rate and deviation
+    risk_of_ruin: Optional[float] = None
+
+
+class SimulationBand(BaseModel):
+    """Bankroll percentiles across trajectories after ``hands`` hands."""
+    hands: int
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+
+
+class SimulationResponse(BaseModel):
+    """Monte Carlo bankroll outlook; money in the player's currency."""
+    trajectories: int
+    hands: int
+    seed: Optional[int] = None
+    big_blind: float
+    bb_per_100: float
+    std_dev_per_100: float
+    starting_bankroll: float
+    bands: List[SimulationBand]
+    probability_of_ruin: float
+    expected_worst_downswing: float
+    worst_downswing_p95: float
+    expected_final_bankroll: float
+
+
+class BenchmarkMetric(BaseModel):
+    """Population percentiles of one metric and where the player sits."""
+    metric: Literal["bb_per_100", "hourly_rate"]
+    players: int
+    p10: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+    # The player's own value and the share of players at or below it
+    you: Optional[float] = None
+    percentile: Optional[float] = None
+
+
+class BenchmarkResponse(BaseModel):
+    """Anonymized benchmarks for one stakes, from the nightly batch job."""
+    stakes: str
+    computed_at: datetime
+    metrics: List[BenchmarkMetric]
@@ -1,15 +1,29 @@
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
 
 class SyncPullRequest(BaseModel):
     last_pulled_at: Optional[int] = None
     schema_version: Optional[int] = None
     migration: Optional[Any] = None
+    # Continuation token from the previous page; omit on the first request
+    cursor: Optional[str] = None
+    # Max rows per table in this page; defaults to SYNC_PULL_PAGE_SIZE
+    page_size: Optional[int] = Field(None, ge=1)
+    # Stream rows as they are read instead of buffering the page
+    stream: bool = False
+    # "columnar" sends one column header per table plus row arrays
+    format: Literal["rows", "columnar"] = "rows"
 
 class SyncPullResponse(BaseModel):
-    changes: Dict[str, Dict[str, List[Any]]]
+    # Per table: created/updated as row lists, or {"columns", "rows"} blocks
+    changes: Dict[str, Dict[str, Any]]
     timestamp: int
+    # Present while more pages remain; pass it back to continue the pull
+    cursor: Optional[str] = None
 
 class SyncPushRequest(BaseModel):
-    changes: Dict[str, Dict[str, List[Any]]]
+    # Same shapes as SyncPullResponse.changes
+    changes: Dict[str, Dict[str, Any]]
     last_pulled_at: int
+    # Client-chosen retry key; derived from the payload hash when omitted
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=64)
@@ -1,7 +1,7 @@
 """Transaction schemas for bankroll management."""
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 from app.models.transaction import TransactionType
@@ -9,19 +9,26 @@ from app.models.transaction import TransactionType
 
 class TransactionCreate(BaseModel):
     """Schema for creating a new transaction."""
-    transaction_type: TransactionType
+    type: TransactionType
     amount: Decimal = Field(..., gt=0)
-    note: Optional[str] = None
+    description: Optional[str] = None
 
 
 class TransactionResponse(BaseModel):
     """Schema for transaction response."""
-    id: int
+    id: str
     user_id: int
-    transaction_type: TransactionType
+    type: TransactionType
     amount: Decimal
-    note: Optional[str]
+    description: Optional[str]
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class TransactionListResponse(BaseModel):
+    """One page of transactions, newest first."""
+    items: List[TransactionResponse]
+    # Pass back as ``cursor`` for the next page; None on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,189 @@
+"""All-in EV annotation of a session's hands.
+
+WHY: When the money goes in before the river the outcome is mostly luck;
+"all-in adjusted" results replace what a hand actually paid with what the
+hero's equity at that moment was worth. Each hand's all-in point is found
+by replaying its ``actions``; the pots contested then (side pots
+included) are valued at the hero's equity against the hands shown down.
+Hands are annotated in batches across the equity process pool, and the
+result is cached in ``hands.all_in_ev`` with a digest of the inputs, so a
+session is only recomputed for hands that changed since.
+
+Enumeration covers flop and turn all-ins exactly; preflop has too many
+boards for a session-sized batch, so it is sampled (``ALL_IN_EV_SAMPLES``
+deals, seeded from the digest so the cached value is reproducible).
+"""
+import asyncio
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.hand import Hand
+from app.services.equity import equity, get_pool, pool_workers
+
+# Bump when the annotation changes so cached values are recomputed
+VERSION = 1
+BOARD_CARDS = {"preflop": 0, "flop": 3, "turn": 4, "river": 5}
+# Hands per pool task, at most; sessions are split over every worker
+BATCH_SIZE = 50
+
+
+def digest(hand: Dict[str, Any]) -> str:
+    """Fingerprint of everything the annotation of ``hand`` depends on."""
+    inputs = [VERSION] + [hand.get(name) for name in ("actions", "seats", "hero_cards", "community_cards", "street")]
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _replay(actions: List[Dict[str, Any]]) -> Tuple[Dict[str, float], set, set, Optional[str]]:
+    """Chips each player put in (net of uncalled bets), who folded, who is
+    all-in, and the street of the last voluntary action."""
+    invested: Dict[str, float] = defaultdict(float)
+    folded, all_in = set(), set()
+    street, last_street = None, None
+    on_street: Dict[str, float] = defaultdict(float)
+    for action in actions:
+        if action.get("street") != street:
+            street, on_street = action.get("street"), defaultdict(float)
+        player, kind, amount = action.get("player"), action.get("action"), float(action.get("amount") or 0)
+        if kind == "uncalled":
+            invested[player] -= amount
+            continue
+        if kind == "fold":
+            folded.add(player)
+        elif kind == "raise":
+            # A raise's amount is the street total it raises to
+            invested[player] += amount - on_street[player]
+            on_street[player] = amount
+        elif kind in ("post", "call", "bet"):
+            invested[player] += amount
+            # Antes are dead money, not part of the player's bet
+            if action.get("blind") != "ante":
+                on_street[player] += amount
+        if action.get("all_in"):
+            all_in.add(player)
+        if kind != "post":
+            last_street = street
+    return invested, folded, all_in, last_street
+
+
+def _pots(invested: Dict[str, float], live: List[str]) -> List[Tuple[float, List[str]]]:
+    """Main and side pots as (amount, live players eligible), main first."""
+    pots, previous = [], 0.0
+    for level in sorted({invested[player] for player in live}):
+        amount = sum(max(0.0, min(put, level) - previous) for put in invested.values())
+        if amount > 0:
+            pots.append((amount, [player for player in live if invested[player] >= level]))
+        previous = level
+    return pots
+
+
+def annotate(hand: Dict[str, Any]) -> Dict[str, Any]:
+    """The all-in EV annotation of one hand (``all_in`` False when there is none).
+
+    Needs an imported hand: seats with the hero marked and the other live
+    hands shown down. ``actual`` and ``expected`` are the hero's net result
+    in chips; the pots are valued after rake in the proportion the hand
+    actually paid out.
+    """
+    result: Dict[str, Any] = {"digest": digest(hand), "all_in": False}
+    seats = {seat["player"]: seat for seat in hand.get("seats") or []}
+    hero = next((name for name, seat in seats.items() if seat.get("hero")), None)
+    if hero is None or hand.get("street") != "showdown":
+        return result
+    invested, folded, all_in, street = _replay(hand.get("actions") or [])
+    live = [player for player in seats if player in invested and player not in folded]
+    board = list(hand.get("community_cards") or [])[:BOARD_CARDS.get(street, 5)]
+    if hero not in live or len(live) < 2 or not all_in & set(live) or len(board) >= 5:
+        return result
+    if any(len(seats[player].get("cards") or []) != 2 for player in live):
+        return result
+
+    paid = sum(seat.get("won") or 0.0 for seat in seats.values())
+    total = sum(invested.values())
+    payout = paid / total if total > 0 else 1.0
+    seed = int(result["digest"][:8], 16)
+    expected, hero_equity = 0.0, None
+    for amount, eligible in _pots(invested, live):
+        if hero not in eligible:
+            continue
+        if len(eligible) == 1:
+            share = 1.0
+        else:
+            villains = [seats[player]["cards"] for player in eligible if player != hero]
+            share = equity(
+                seats[hero]["cards"], villains, board, settings.ALL_IN_EV_SAMPLES, seed, settings.ALL_IN_EV_EXACT_MAX_BOARDS
+            )["players"][0]["equity"]
+        if hero_equity is None:
+            hero_equity = share
+        expected += amount * payout * share
+    result.update(
+        all_in=True,
+        street=street,
+        equity=hero_equity,
+        pot=total,
+        actual=(seats[hero].get("won") or 0.0) - invested[hero],
+        expected=expected - invested[hero],
+    )
+    return result
+
+
+def annotate_batch(hands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Annotate hands (runs in a worker process)."""
+    return [annotate(hand) for hand in hands]
+
+
+async def session_all_in_ev(db: AsyncSession, user_id: int, session_id: str) -> Dict[str, Any]:
+    """All-in EV of a session's hands, annotating those not cached yet.
+
+    Writes the new annotations in the caller's transaction, without
+    touching ``updated_at``: they are derived data, not edits.
+    """
+    columns = (Hand.id, Hand.actions, Hand.seats, Hand.hero_cards, Hand.community_cards, Hand.street, Hand.all_in_ev)
+    rows = (await db.execute(
+        select(*columns).where(Hand.user_id == user_id, Hand.session_id == session_id)
+    )).all()
+    annotations: Dict[str, Dict[str, Any]] = {}
+    stale: List[Dict[str, Any]] = []
+    for row in rows:
+        hand = {name: getattr(row, name) for name in ("actions", "seats", "hero_cards", "community_cards", "street")}
+        if row.all_in_ev and row.all_in_ev.get("digest") == digest(hand):
+            annotations[row.id] = row.all_in_ev
+        else:
+            stale.append({"id": row.id, **hand})
+
+    if stale:
+        pool = get_pool()
+        size = min(BATCH_SIZE, -(-len(stale) // pool_workers()))
+        batches = [stale[start:start + size] for start in range(0, len(stale), size)]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(pool, annotate_batch, batch) for batch in batches))
+        fresh = {hand["id"]: found for batch, annotated in zip(batches, results) for hand, found in zip(batch, annotated)}
+        table = Hand.__table__
+        await db.execute(
+            update(table)
+            .where(table.c.id == bindparam("hand_id"))
+            .values(all_in_ev=bindparam("annotation", type_=table.c.all_in_ev.type), updated_at=table.c.updated_at),
+            [{"hand_id": hand_id, "annotation": found} for hand_id, found in fresh.items()],
+        )
+        annotations.update(fresh)
+
+    all_ins = [{"hand_id": hand_id, **found} for hand_id, found in annotations.items() if found["all_in"]]
+    actual = sum(found["actual"] for found in all_ins)
+    expected = sum(found["expected"] for found in all_ins)
+    return {
+        "hands": len(rows),
+        "computed": len(stale),
+        "all_in_hands": len(all_ins),
+        "actual": actual,
+        "expected": expected,
+        "luck": actual - expected,
+        "all_ins": [
+            {name: found[name] for name in ("hand_id", "street", "equity", "pot", "actual", "expected")}
+            for found in all_ins
+        ],
+    }
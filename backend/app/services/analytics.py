@@ -0,0 +1,160 @@
+"""Variance and risk analytics over a player's session results.
+
+WHY: Means alone (hourly rate, bb/100) say nothing about how far results
+swing around them. Session columns are read once into NumPy arrays and
+every measure is a vectorized pass over them; results are cached per user
+against the change-log sequence, which moves with every write, so a repeat
+request costs one sequence lookup.
+"""
+import math
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Numeric, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.session import Session
+from app.schemas.stats import AdvancedStatsResponse
+from app.services.changelog import current_seq
+from app.services.rollup import load_totals
+from app.services.stats import HANDS_PER_HOUR, build_stats
+
+# Two-sided 95% normal quantile
+Z_95 = 1.959964
+
+# user_id -> (data version, result), least recently used first
+cache: "OrderedDict[int, Tuple[int, AdvancedStatsResponse]]" = OrderedDict()
+
+
+def _float(column: Any) -> Any:
+    return type_coerce(column, Numeric(asdecimal=False))
+
+
+async def load_results(db: AsyncSession, user_id: int) -> Dict[str, np.ndarray]:
+    """Profit, tips plus expenses, hours and big blind per session, by start time."""
+    result = await db.execute(
+        select(
+            _float(Session.cash_out - Session.buy_in),
+            _float(Session.tips + Session.expenses),
+            _float(Session.hours_played),
+            _float(Session.big_blind),
+        )
+        .where(Session.user_id == user_id)
+        .order_by(Session.start_time, Session.id)
+    )
+    columns = np.array(result.all(), dtype=np.float64).reshape(-1, 4)
+    columns = np.nan_to_num(columns)
+    return {
+        "profit": columns[:, 0],
+        "costs": columns[:, 1],
+        "hours": columns[:, 2],
+        "big_blind": columns[:, 3],
+    }
+
+
+def rate_and_std_dev(results: np.ndarray, volume: np.ndarray) -> Tuple[float, Optional[float]]:
+    """Win rate per unit of volume and its standard deviation per unit.
+
+    Each session is a sample whose variance grows with its volume, so the
+    squared residuals are weighted by ``1 / volume``.
+    """
+    total = volume.sum()
+    if total <= 0:
+        return 0.0, None
+    rate = results.sum() / total
+    if len(results) < 2:
+        return float(rate), None
+    variance = np.sum((results - rate * volume) ** 2 / volume) / (len(results) - 1)
+    return float(rate), float(math.sqrt(variance))
+
+
+def longest_run(mask: np.ndarray, weights: np.ndarray) -> float:
+    """Largest sum of ``weights`` over a run of consecutive True in ``mask``."""
+    if not mask.any():
+        return 0.0
+    totals = np.cumsum(weights)
+    # Running total at the last False position before each element
+    resets = np.maximum.accumulate(np.where(mask, 0.0, totals))
+    return float(np.max(np.where(mask, totals - resets, 0.0)))
+
+
+def risk_of_ruin(rate: float, std_dev: Optional[float], bankroll: float) -> Optional[float]:
+    """Chance of losing ``bankroll`` playing forever at ``rate`` +/- ``std_dev``.
+
+    The diffusion approximation ``exp(-2 * rate * bankroll / variance)``.
+    """
+    if std_dev is None or std_dev <= 0:
+        return None
+    if rate <= 0 or bankroll <= 0:
+        return 1.0
+    return float(math.exp(-2 * rate * bankroll / std_dev ** 2))
+
+
+def _interval(mean: float, std_dev: Optional[float], volume: float) -> Tuple[Optional[float], Optional[float]]:
+    if std_dev is None or volume <= 0:
+        return None, None
+    margin = Z_95 * std_dev / math.sqrt(volume)
+    return mean - margin, mean + margin
+
+
+def analyze(columns: Dict[str, np.ndarray], bankroll: float) -> AdvancedStatsResponse:
+    """Every advanced measure from the session arrays."""
+    profit, hours, big_blind = columns["profit"], columns["hours"], columns["big_blind"]
+
+    timed = hours > 0
+    hourly_rate, hourly_std_dev = rate_and_std_dev(profit[timed], hours[timed])
+    hourly_low, hourly_high = _interval(hourly_rate, hourly_std_dev, float(hours[timed].sum()))
+
+    # Per 100 hands, in big blinds, over sessions with both a blind and a duration
+    counted = timed & (big_blind > 0)
+    hundreds = hours[counted] * HANDS_PER_HOUR / 100
+    bb_rate, bb_std_dev = rate_and_std_dev(profit[counted] / big_blind[counted], hundreds)
+    bb_low, bb_high = _interval(bb_rate, bb_std_dev, float(hundreds.sum()))
+
+    # Drawdowns follow the bankroll: results after tips and expenses, from zero
+    cumulative = np.cumsum(profit - columns["costs"])
+    peaks = np.maximum.accumulate(np.maximum(cumulative, 0.0))
+    underwater = cumulative < peaks
+
+    return AdvancedStatsResponse(
+        sessions=len(profit),
+        total_hours=float(hours.sum()),
+        hourly_rate=hourly_rate,
+        hourly_std_dev=hourly_std_dev,
+        hourly_rate_ci_low=hourly_low,
+        hourly_rate_ci_high=hourly_high,
+        bb_per_100=bb_rate,
+        std_dev_per_100=bb_std_dev,
+        bb_per_100_ci_low=bb_low,
+        bb_per_100_ci_high=bb_high,
+        max_drawdown=float(np.max(peaks - cumulative)) if len(cumulative) else 0.0,
+        longest_downswing_sessions=int(longest_run(underwater, np.ones(len(underwater)))),
+        longest_downswing_hours=longest_run(underwater, hours),
+        current_bankroll=bankroll,
+        risk_of_ruin=risk_of_ruin(hourly_rate, hourly_std_dev, bankroll),
+    )
+
+
+def latest_big_blind(columns: Dict[str, np.ndarray]) -> Optional[float]:
+    """Big blind of the most recent session that has one."""
+    blinds = columns["big_blind"][columns["big_blind"] > 0]
+    return float(blinds[-1]) if len(blinds) else None
+
+
+async def advanced_stats(db: AsyncSession, user_id: int) -> AdvancedStatsResponse:
+    """The user's advanced stats, recomputed only when their data changed."""
+    version = await current_seq(db, user_id)
+    cached = cache.get(user_id)
+    if cached is not None and cached[0] == version:
+        cache.move_to_end(user_id)
+        return cached[1]
+
+    bankroll = float(build_stats(await load_totals(db, user_id)).current_bankroll)
+    stats = analyze(await load_results(db, user_id), bankroll)
+    cache[user_id] = (version, stats)
+    cache.move_to_end(user_id)
+    while len(cache) > settings.ANALYTICS_CACHE_SIZE:
+        cache.popitem(last=False)
+    return stats
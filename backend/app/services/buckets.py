@@ -0,0 +1,202 @@
+"""Daily stats buckets behind the chart series.
+
+WHY: Charting a bankroll from every session makes each chart render cost
+O(sessions). Instead each write adds its delta to one ``stats_buckets`` row
+per affected local day, in the same transaction, and a series is read as a
+range of days and folded into weeks, months or years: O(buckets). Calendar
+days depend on the timezone, so buckets are kept per timezone; a timezone's
+buckets are built from the source tables the first time a series is asked
+for in it and maintained incrementally from then on.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import chunked, upsert
+from app.models.session import Session
+from app.models.stats import StatsBucket, StatsBucketZone
+from app.models.transaction import Transaction, TransactionType
+
+# Timestamp placing each record on a calendar day, per tracked table
+BUCKET_TIMES = {"sessions": Session.start_time, "transactions": Transaction.created_at}
+
+BUCKET_SOURCES = {
+    "sessions": (Session, (
+        Session.start_time, Session.buy_in, Session.cash_out, Session.tips,
+        Session.expenses, Session.hours_played,
+    )),
+    "transactions": (Transaction, (Transaction.created_at, Transaction.type, Transaction.amount)),
+}
+
+BUCKET_COLUMNS = ("sessions", "profit", "tips", "expenses", "hours", "deposits", "withdrawals")
+
+PERIODS = ("day", "week", "month", "year")
+
+
+def _value(value: Any) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def local_day(value: datetime, tz: ZoneInfo) -> date:
+    """Calendar day of ``value`` in ``tz``; naive values (SQLite) are UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(tz).date()
+
+
+def contribution(table: str, row: Mapping[str, Any]) -> Counter:
+    """What one session or transaction adds to its day's bucket."""
+    totals: Counter = Counter()
+    if table == "sessions":
+        totals.update(
+            sessions=1,
+            profit=_value(row["cash_out"]) - _value(row["buy_in"]),
+            tips=_value(row["tips"]),
+            expenses=_value(row["expenses"]),
+            hours=_value(row["hours_played"]),
+        )
+    elif table == "transactions":
+        if row["type"] == TransactionType.DEPOSIT:
+            totals["deposits"] = _value(row["amount"])
+        elif row["type"] == TransactionType.WITHDRAWAL:
+            totals["withdrawals"] = _value(row["amount"])
+    return totals
+
+
+async def _zones(db: AsyncSession, user_id: int) -> List[str]:
+    result = await db.execute(select(StatsBucketZone.tz).where(StatsBucketZone.user_id == user_id))
+    return list(result.scalars())
+
+
+async def _add(
+    db: AsyncSession, user_id: int, deltas: Dict[Tuple[str, date], Counter]
+) -> None:
+    """Add per-(timezone, day) deltas to the buckets, creating missing ones."""
+    rows = [
+        {"user_id": user_id, "tz": tz, "day": day, **{name: delta[name] for name in BUCKET_COLUMNS}}
+        for (tz, day), delta in deltas.items()
+        if any(delta.values())
+    ]
+    columns = StatsBucket.__table__.c
+    for chunk in chunked(rows):
+        stmt = upsert(db, StatsBucket).values(chunk)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "tz", "day"],
+            set_={name: columns[name] + stmt.excluded[name] for name in BUCKET_COLUMNS},
+        ))
+
+
+async def apply_changes(
+    db: AsyncSession,
+    user_id: int,
+    table: str,
+    before: Iterable[Mapping[str, Any]],
+    after: Iterable[Mapping[str, Any]],
+) -> None:
+    """Move the difference between ``after`` and ``before`` rows into buckets.
+
+    A record whose timestamp changed leaves its old day and joins its new
+    one. Only the user's registered timezones are updated.
+    """
+    zones = await _zones(db, user_id)
+    if not zones:
+        return
+    stamp = BUCKET_TIMES[table]
+    deltas: Dict[Tuple[str, date], Counter] = {}
+    for rows, sign in ((after, 1), (before, -1)):
+        for row in rows:
+            totals = contribution(table, row)
+            if sign < 0:
+                totals = Counter({name: -value for name, value in totals.items()})
+            for name in zones:
+                key = (name, local_day(row[stamp.key], ZoneInfo(name)))
+                deltas.setdefault(key, Counter()).update(totals)
+    await _add(db, user_id, deltas)
+
+
+async def _build_zone(db: AsyncSession, user_id: int, tz: str) -> None:
+    """Fill one timezone's buckets from the source tables."""
+    zone = ZoneInfo(tz)
+    deltas: Dict[Tuple[str, date], Counter] = {}
+    for table, (model, columns) in BUCKET_SOURCES.items():
+        stamp = BUCKET_TIMES[table]
+        result = await db.stream(select(*columns).where(model.user_id == user_id))
+        async for row in result.mappings():
+            deltas.setdefault((tz, local_day(row[stamp.key], zone)), Counter()).update(contribution(table, row))
+    await _add(db, user_id, deltas)
+
+
+async def ensure_zone(db: AsyncSession, user_id: int, tz: str) -> None:
+    """Register ``tz`` for the user, building its buckets on first use.
+
+    Only the request whose insert registers the zone builds it: a
+    concurrent first request waits on the row, inserts nothing and skips
+    the build, which would otherwise add the whole history a second time.
+    """
+    exists = await db.scalar(
+        select(StatsBucketZone.tz).where(StatsBucketZone.user_id == user_id, StatsBucketZone.tz == tz)
+    )
+    if exists is not None:
+        return
+    claimed = await db.scalar(
+        upsert(db, StatsBucketZone).values(user_id=user_id, tz=tz)
+        .on_conflict_do_nothing()
+        .returning(StatsBucketZone.tz)
+    )
+    if claimed is not None:
+        await _build_zone(db, user_id, tz)
+
+
+async def rebuild_buckets(db: AsyncSession, user_id: int) -> None:
+    """Recompute every registered timezone's buckets from the source tables."""
+    await db.execute(delete(StatsBucket).where(StatsBucket.user_id == user_id))
+    for tz in await _zones(db, user_id):
+        await _build_zone(db, user_id, tz)
+
+
+def period_start(day: date, period: str) -> date:
+    """First day of the week (Monday), month or year containing ``day``."""
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    if period == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+async def load_buckets(
+    db: AsyncSession,
+    user_id: int,
+    tz: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Tuple[Dict[str, Decimal], List[Mapping[str, Any]]]:
+    """Totals of the days before ``start`` and the day buckets in range.
+
+    Both are reads over the user's buckets in ``tz``; no session or
+    transaction row is touched once the timezone has been built.
+    """
+    await ensure_zone(db, user_id, tz)
+    scope = (StatsBucket.user_id == user_id, StatsBucket.tz == tz)
+    columns = [getattr(StatsBucket, name) for name in BUCKET_COLUMNS]
+
+    opening = {name: Decimal("0") for name in BUCKET_COLUMNS}
+    if start is not None:
+        row = (await db.execute(
+            select(*(func.coalesce(func.sum(column), 0).label(column.key) for column in columns))
+            .where(*scope, StatsBucket.day < start)
+        )).mappings().one()
+        opening = {name: _value(row[name]) for name in BUCKET_COLUMNS}
+
+    query = select(StatsBucket.day, *columns).where(*scope).order_by(StatsBucket.day)
+    if start is not None:
+        query = query.where(StatsBucket.day >= start)
+    if end is not None:
+        query = query.where(StatsBucket.day <= end)
+    return opening, (await db.execute(query)).mappings().all()
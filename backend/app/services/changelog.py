@@ -0,0 +1,217 @@
+"""Per-user change log backing WatermelonDB sync.
+
+WHY: Every mutation of a synced table takes the next value of the user's
+sequence in the same transaction, so pull becomes an indexed range read on
+``(user_id, seq)`` instead of ``updated_at`` scans that are sensitive to
+clock skew and in-flight transactions. Deletions leave tombstones carrying
+their own sequence so they sync incrementally too.
+"""
+from datetime import datetime, timedelta
+from typing import Iterable, List
+
+from sqlalchemy import String, delete, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import chunked, upsert
+from app.models.sync import ChangeLog, SyncState, Tombstone
+from app.models.session import Session
+from app.models.hand import Hand
+from app.models.transaction import Transaction
+from app.services.hud import refresh_hand_stats, remove_hand_stats
+from app.services.notifications import hub
+from app.services.rollup import CONTRIBUTING_COLUMNS, apply_changes, ensure_rollup
+
+SYNCED_MODELS = {
+    "sessions": Session,
+    "hands": Hand,
+    "transactions": Transaction,
+}
+
+
+async def current_seq(db: AsyncSession, user_id: int) -> int:
+    """Return the user's latest sequence, backfilling the log on first use."""
+    seq = await db.scalar(select(SyncState.seq).where(SyncState.user_id == user_id))
+    if seq is None:
+        seq = await _backfill(db, user_id)
+    return seq
+
+
+async def _backfill(db: AsyncSession, user_id: int) -> int:
+    """Seed the log with rows written before the user had a sync state.
+
+    Each existing record gets its own sequence number (ordered by id within
+    each table) so paging by seq stays exact.
+    """
+    seq = 0
+    for table_name, model in SYNCED_MODELS.items():
+        numbered = select(
+            model.user_id,
+            literal(table_name, String),
+            model.id,
+            func.row_number().over(order_by=model.id) + seq,
+        ).where(model.user_id == user_id)
+        await db.execute(
+            upsert(db, ChangeLog)
+            .from_select(["user_id", "table_name", "record_id", "seq"], numbered)
+            .on_conflict_do_nothing()
+        )
+        seq += await db.scalar(
+            select(func.count()).select_from(model).where(model.user_id == user_id)
+        ) or 0
+    await db.execute(
+        upsert(db, SyncState)
+        .values(user_id=user_id, seq=seq)
+        .on_conflict_do_nothing()
+    )
+    return await db.scalar(select(SyncState.seq).where(SyncState.user_id == user_id))
+
+
+async def allocate_seq(db: AsyncSession, user_id: int, count: int) -> int:
+    """Reserve ``count`` sequence numbers and return the last one.
+
+    The UPDATE row-locks the user's counter until commit, so concurrent
+    writers for the same user commit in sequence order. Subscribers are
+    notified once the transaction commits.
+    """
+    result = await db.execute(
+        update(SyncState)
+        .where(SyncState.user_id == user_id)
+        .values(seq=SyncState.seq + count)
+        .returning(SyncState.seq)
+    )
+    last = result.scalar_one_or_none()
+    if last is None:
+        await current_seq(db, user_id)
+        return await allocate_seq(db, user_id, count)
+    await hub.announce(db, user_id, last)
+    return last
+
+
+async def record_changes(
+    db: AsyncSession, user_id: int, table_name: str, record_ids: Iterable[str]
+) -> int:
+    """Stamp created/updated records with fresh sequence numbers.
+
+    Must run in the same transaction as the mutation itself. Returns the
+    user's new sequence value.
+    """
+    record_ids = list(dict.fromkeys(record_ids))
+    if not record_ids:
+        return await current_seq(db, user_id)
+    last = await allocate_seq(db, user_id, len(record_ids))
+    first = last - len(record_ids) + 1
+    rows = [
+        {"user_id": user_id, "table_name": table_name, "record_id": record_id, "seq": first + i}
+        for i, record_id in enumerate(record_ids)
+    ]
+    # Executemany: compiled once and batched by the driver layer, which is
+    # much cheaper than compiling a multi-row VALUES for large writes
+    stmt = upsert(db, ChangeLog)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "table_name", "record_id"],
+            set_={"seq": stmt.excluded.seq},
+        ),
+        rows,
+    )
+    return last
+
+
+async def delete_records(
+    db: AsyncSession, user_id: int, table_name: str, record_ids: Iterable[str]
+) -> int:
+    """Hard-delete records and leave tombstones so other devices see it.
+
+    Hands of deleted sessions are detached (``session_id`` set to NULL, as
+    the foreign key does) and logged as updated. Stats rollups lose the
+    deleted rows' contributions, and HUD counters those of deleted hands.
+    Must run in the caller's transaction. Returns the user's new sequence
+    value.
+    """
+    record_ids = list(dict.fromkeys(record_ids))
+    if not record_ids:
+        return await current_seq(db, user_id)
+    model = SYNCED_MODELS[table_name]
+
+    detached: List[str] = []
+    if table_name == "sessions":
+        for chunk in chunked(record_ids):
+            result = await db.execute(
+                update(Hand)
+                .where(Hand.user_id == user_id, Hand.session_id.in_(chunk))
+                .values(session_id=None, updated_at=datetime.utcnow())
+                .returning(Hand.id)
+            )
+            detached.extend(result.scalars())
+        await refresh_hand_stats(db, user_id, detached)
+    elif table_name == "hands":
+        await remove_hand_stats(db, user_id, record_ids)
+
+    rolled_up = table_name in CONTRIBUTING_COLUMNS
+    if rolled_up:
+        await ensure_rollup(db, user_id)
+    deleted: List[str] = []
+    removed = []
+    for chunk in chunked(record_ids):
+        result = await db.execute(
+            delete(model)
+            .where(model.user_id == user_id, model.id.in_(chunk))
+            .returning(model.id, *CONTRIBUTING_COLUMNS.get(table_name, ()))
+        )
+        rows = result.mappings().all()
+        deleted.extend(row["id"] for row in rows)
+        removed.extend(rows)
+        await db.execute(
+            delete(ChangeLog).where(
+                ChangeLog.user_id == user_id,
+                ChangeLog.table_name == table_name,
+                ChangeLog.record_id.in_(chunk),
+            )
+        )
+
+    if rolled_up:
+        await apply_changes(db, user_id, table_name, before=removed, after=[])
+
+    seq = await record_changes(db, user_id, "hands", detached) if detached else None
+    if not deleted:
+        return seq if seq is not None else await current_seq(db, user_id)
+
+    last = await allocate_seq(db, user_id, len(deleted))
+    first = last - len(deleted) + 1
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": user_id, "table_name": table_name, "record_id": record_id, "seq": first + i, "deleted_at": now}
+        for i, record_id in enumerate(deleted)
+    ]
+    for chunk in chunked(rows):
+        stmt = upsert(db, Tombstone).values(chunk)
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "table_name", "record_id"],
+                set_={"seq": stmt.excluded.seq, "deleted_at": stmt.excluded.deleted_at},
+            )
+        )
+    return last
+
+
+async def purge_tombstones(db: AsyncSession, retention: timedelta) -> int:
+    """Drop tombstones older than ``retention``; returns the number purged.
+
+    Each affected user's ``tombstone_floor`` is raised to the highest purged
+    seq first, so clients that last pulled before it are told to resync
+    instead of silently missing deletions.
+    """
+    cutoff = datetime.utcnow() - retention
+    floors = await db.execute(
+        select(Tombstone.user_id, func.max(Tombstone.seq))
+        .where(Tombstone.deleted_at < cutoff)
+        .group_by(Tombstone.user_id)
+    )
+    for user_id, floor in floors:
+        await db.execute(
+            update(SyncState)
+            .where(SyncState.user_id == user_id, SyncState.tombstone_floor < floor)
+            .values(tombstone_floor=floor)
+        )
+    result = await db.execute(delete(Tombstone).where(Tombstone.deleted_at < cutoff))
+    return result.rowcount or 0
@@ -0,0 +1,70 @@
+"""Chart downsampling.
+
+WHY: A long history charted per day runs to thousands of points, more than
+a phone can draw or usefully show, yet every one is downloaded and parsed.
+Largest-Triangle-Three-Buckets keeps a requested number of points chosen
+for visual significance, so peaks and drawdowns survive the cut.
+"""
+from typing import Sequence
+
+import numpy as np
+
+
+def extremes(y: np.ndarray) -> np.ndarray:
+    """Indices of the peak and trough of the largest drawdown, then of the
+    highest and lowest points, without repeats."""
+    y = np.asarray(y, dtype=np.float64)
+    if not len(y):
+        return np.empty(0, dtype=np.int64)
+    trough = int(np.argmax(np.maximum.accumulate(y) - y))
+    peak = int(np.argmax(y[:trough + 1]))
+    return np.array(list(dict.fromkeys([peak, trough, int(np.argmax(y)), int(np.argmin(y))])), dtype=np.int64)
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int, keep: Sequence[int] = ()) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets.
+
+    ``x`` must be increasing. The first and last points are always kept;
+    every other kept point is the one in its bucket forming the largest
+    triangle with the previously kept point and the next bucket's mean.
+    Each pick depends on the previous one, so buckets are walked in order
+    but the triangle areas within a bucket are one vectorized pass.
+    Indices in ``keep`` replace their bucket's pick, the first one listed
+    winning when two share a bucket.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges over the interior points; bucket i is [edges[i], edges[i + 1])
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    edges[-1] = n - 1
+    # Mean of each bucket, plus the last point as the final "next bucket"
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.append(sums_y / counts, y[-1])
+
+    pinned = {}
+    for index in keep:
+        if 0 < index < n - 1:
+            pinned.setdefault(int(np.searchsorted(edges, index, side="right")) - 1, int(index))
+
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        if bucket in pinned:
+            previous = kept[bucket + 1] = pinned[bucket]
+            continue
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = mean_x[bucket + 1], mean_y[bucket + 1]
+        # Twice the triangle area; the constant factor doesn't change the argmax
+        areas = np.abs((ax - cx) * (y[start:stop] - ay) - (ax - x[start:stop]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
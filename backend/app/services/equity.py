@@ -0,0 +1,197 @@
+"""Hold'em equity by exact enumeration or Monte Carlo.
+
+WHY: "How often was I ahead when the money went in" is the question the
+replayer can't answer. With every hole card known, the remaining boards
+are few enough to enumerate (at most C(48, 5) = 1.7M heads-up preflop):
+they are generated as index arrays and evaluated in NumPy batches of
+``BLOCK_SIZE``, the board's part of each hand summed once and shared by
+all players (see ``app.services.evaluator``). Unknown villain hands or too
+many boards fall back to sampling: each batch deals random boards and
+hands at once with a vectorized partial shuffle. Requests run in a process
+pool so the event loop keeps serving.
+"""
+import asyncio
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.evaluator import CARD_BIT, CARD_KEY, key_sums, parse_cards, strengths
+
+# Boards per evaluated batch; keeps temporaries in cache-sized arrays
+BLOCK_SIZE = 1 << 16
+DEFAULT_SAMPLES = 100000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_workers = 0
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool, _workers
+    if _pool is None:
+        _workers = settings.EQUITY_WORKERS or os.cpu_count() or 1
+        _pool = ProcessPoolExecutor(max_workers=_workers)
+    return _pool
+
+
+def pool_workers() -> int:
+    """How many processes ``get_pool`` runs."""
+    get_pool()
+    return _workers
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def combinations(n: int, k: int) -> np.ndarray:
+    """Every k-subset of ``range(n)`` as rows, in lexicographic order."""
+    if k == 0:
+        return np.zeros((1, 0), dtype=np.int8)
+    combos = np.arange(n - k + 1, dtype=np.int8).reshape(-1, 1)
+    for width in range(1, k):
+        # Extend each row by every larger value that still leaves room for the rest
+        last = combos[:, -1].astype(np.int64)
+        counts = np.maximum(n - k + width - last, 0)
+        total = int(counts.sum())
+        step = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        combos = np.column_stack([np.repeat(combos, counts, axis=0), (np.repeat(last + 1, counts) + step).astype(np.int8)])
+    return combos
+
+
+def deal(rng: np.random.Generator, deck: np.ndarray, rows: int, k: int) -> np.ndarray:
+    """``rows`` independent draws of ``k`` distinct cards from ``deck``.
+
+    A partial Fisher-Yates shuffle run on every row at once.
+    """
+    cards = np.broadcast_to(deck, (rows, len(deck))).copy()
+    index = np.arange(rows)
+    for position in range(k):
+        swap = position + (rng.random(rows) * (len(deck) - position)).astype(np.intp)
+        picked = cards[index, swap]
+        cards[index, swap] = cards[:, position]
+        cards[:, position] = picked
+    return cards[:, :k]
+
+
+def showdown(boards: np.ndarray, holes: np.ndarray) -> np.ndarray:
+    """Each player's strength on each board.
+
+    ``boards`` is (boards, 5) card indices; ``holes`` is (players, 2) for
+    fixed hands or (boards, players, 2) for hands dealt per board. Returns
+    (players, boards).
+    """
+    board_keys = key_sums(boards)
+    found = np.empty((holes.shape[-2], len(boards)), dtype=np.uint16)
+    for player in range(holes.shape[-2]):
+        hole = holes[..., player, :]
+        if hole.ndim == 1:
+            keys = board_keys + int(CARD_KEY[hole].sum())
+            bits = lambda rows, hole=hole: CARD_BIT[boards[rows]].sum(axis=1) + int(CARD_BIT[hole].sum())
+        else:
+            keys = board_keys + key_sums(hole)
+            bits = lambda rows, hole=hole: CARD_BIT[boards[rows]].sum(axis=1) + CARD_BIT[hole[rows]].sum(axis=1)
+        found[player] = strengths(keys, bits)
+    return found
+
+
+def _tally(found: np.ndarray, shares: np.ndarray, wins: np.ndarray, ties: np.ndarray) -> None:
+    """Add one batch's pot shares, outright wins and split pots per player."""
+    winners = found == found.max(axis=0)
+    counts = winners.sum(axis=0)
+    shares += (winners / counts).sum(axis=1)
+    wins += (winners & (counts == 1)).sum(axis=1)
+    ties += (winners & (counts > 1)).sum(axis=1)
+
+
+def equity(
+    hero: Sequence[str],
+    villains: Sequence[Optional[Sequence[str]]],
+    board: Sequence[str] = (),
+    samples: int = DEFAULT_SAMPLES,
+    seed: Optional[int] = None,
+    exact_max_boards: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Equity of ``hero`` against ``villains`` on a partial ``board``.
+
+    A villain of None holds a random hand. Every board is enumerated when
+    all hands are known and there are at most ``exact_max_boards``
+    (default ``EQUITY_EXACT_MAX_BOARDS``); otherwise ``samples`` random
+    deals are drawn. A player's ``equity`` is their expected share of the
+    pot.
+    """
+    known = [list(hero)] + [list(hand) for hand in villains if hand is not None]
+    if any(len(hand) != 2 for hand in known):
+        raise ValueError("Hands have two hole cards")
+    if len(board) > 5:
+        raise ValueError("A board has at most five cards")
+    if not villains:
+        raise ValueError("At least one villain is needed")
+    dead = parse_cards([card for hand in known for card in hand] + list(board))
+    deck = np.array([card for card in range(52) if card not in dead], dtype=np.int8)
+    board_cards = np.array(dead[2 * len(known):], dtype=np.int8)
+    missing = 5 - len(board_cards)
+    unknown = [index + 1 for index, hand in enumerate(villains) if hand is None]
+    if len(deck) < missing + 2 * len(unknown):
+        raise ValueError("Not enough cards left to deal")
+
+    players = 1 + len(villains)
+    fixed = np.zeros((players, 2), dtype=np.int8)
+    fixed[[0] + [index + 1 for index, hand in enumerate(villains) if hand is not None]] = (
+        np.array(dead[:2 * len(known)], dtype=np.int8).reshape(-1, 2)
+    )
+    shares, wins, ties = np.zeros(players), np.zeros(players, dtype=np.int64), np.zeros(players, dtype=np.int64)
+
+    boards = math.comb(len(deck), missing)
+    if exact_max_boards is None:
+        exact_max_boards = settings.EQUITY_EXACT_MAX_BOARDS
+    exact = not unknown and boards <= exact_max_boards
+    if exact:
+        completions = deck[combinations(len(deck), missing)]
+        for start in range(0, boards, BLOCK_SIZE):
+            block = completions[start:start + BLOCK_SIZE]
+            block = np.column_stack([np.broadcast_to(board_cards, (len(block), len(board_cards))), block])
+            _tally(showdown(block, fixed), shares, wins, ties)
+    else:
+        rng = np.random.default_rng(seed)
+        boards = samples
+        for start in range(0, samples, BLOCK_SIZE):
+            rows = min(BLOCK_SIZE, samples - start)
+            dealt = deal(rng, deck, rows, missing + 2 * len(unknown))
+            block = np.column_stack([np.broadcast_to(board_cards, (rows, len(board_cards))), dealt[:, :missing]])
+            holes = np.broadcast_to(fixed, (rows, players, 2)).copy()
+            holes[:, unknown] = dealt[:, missing:].reshape(rows, len(unknown), 2)
+            _tally(showdown(block, holes), shares, wins, ties)
+
+    return {
+        "method": "exact" if exact else "monte_carlo",
+        "boards": boards,
+        "players": [
+            {
+                "cards": list(hero) if index == 0 else (list(villains[index - 1]) if villains[index - 1] else None),
+                "equity": float(shares[index] / boards),
+                "win": float(wins[index] / boards),
+                "tie": float(ties[index] / boards),
+            }
+            for index in range(players)
+        ],
+    }
+
+
+async def compute_equity(
+    hero: Sequence[str],
+    villains: Sequence[Optional[Sequence[str]]],
+    board: Sequence[str] = (),
+    samples: int = DEFAULT_SAMPLES,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """``equity`` run in the process pool."""
+    loop = asyncio.get_running_loop()
+    villains = [None if hand is None else list(hand) for hand in villains]
+    return await loop.run_in_executor(get_pool(), equity, list(hero), villains, list(board), samples, seed)
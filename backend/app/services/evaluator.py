@@ -0,0 +1,248 @@
+"""Table-driven 5- to 7-card poker hand evaluator.
+
+WHY: Equity needs millions of showdowns per request, far beyond what
+comparing hands card by card in Python can do. Every card gets an integer
+whose sum over a hand identifies its ranks (the rank keys below give each
+multiset of up to seven ranks a distinct sum, a perfect hash) and counts
+its suits. Evaluating a hand is then one gather-and-sum and one lookup in
+a precomputed strength table, which NumPy does for whole batches at once;
+flushes take a second lookup on the flush suit's rank bits. Sums are
+additive, so the board's share is computed once and reused for every
+player. The table is built once into ``HAND_RANKS_PATH`` and memory-mapped,
+so worker processes share its pages instead of building their own.
+
+Strengths are dense: 1 is the worst five-card hand (7-5-4-3-2) and 7462 a
+royal flush; equal strengths are split pots.
+"""
+import itertools
+import os
+import re
+from typing import Callable, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+# The mobile replayer writes "10♠"
+_SUIT_SYMBOLS = {"♣": "c", "♦": "d", "♥": "h", "♠": "s"}
+_CARD_TEXT = re.compile(r"(?:10|[2-9TJQKA])[cdhs♣♦♥♠]", re.IGNORECASE)
+
+# Distinct sums for every multiset of up to seven ranks with at most four
+# of each (the 7-card keys of Kenneth Shackleton's SpecialK evaluator)
+RANK_KEYS = (0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181)
+# Suit counts are packed above the rank-key sum, four bits per suit
+SUIT_SHIFT = 32
+RANK_KEY_MASK = (1 << SUIT_SHIFT) - 1
+FLUSH_MASKS = 1 << 13
+
+CATEGORIES = (
+    "high_card", "pair", "two_pair", "three_of_a_kind", "straight",
+    "flush", "full_house", "four_of_a_kind", "straight_flush",
+)
+# Distinct strengths per category, weakest category first
+CATEGORY_SIZES = (1277, 2860, 858, 858, 10, 1277, 156, 156, 10)
+CATEGORY_STARTS = np.cumsum((1,) + CATEGORY_SIZES[:-1])
+
+# Card i is RANKS[i // 4] + SUITS[i % 4]: its rank key plus one in its suit's count
+CARD_KEY = np.array(
+    [RANK_KEYS[card // 4] + (1 << (SUIT_SHIFT + 4 * (card % 4))) for card in range(52)], dtype=np.int64
+)
+# Its rank as a bit in a 16-bit lane per suit, summed only for flushes
+CARD_BIT = np.array([1 << (16 * (card % 4) + card // 4) for card in range(52)], dtype=np.int64)
+
+
+def _section_sizes() -> List[int]:
+    """Table entries per hand size 5, 6, 7: up to the largest rank-key sum."""
+    # The largest sum takes four of the highest key, then four of the next...
+    keys = [key for key in sorted(RANK_KEYS, reverse=True) for _ in range(4)]
+    return [sum(keys[:size]) + 1 for size in (5, 6, 7)]
+
+
+SECTION_SIZES = _section_sizes()
+# Where each hand size's rank-key section starts, after the flush section
+SECTION_STARTS = {5: FLUSH_MASKS}
+SECTION_STARTS[6] = SECTION_STARTS[5] + SECTION_SIZES[0]
+SECTION_STARTS[7] = SECTION_STARTS[6] + SECTION_SIZES[1]
+TABLE_SIZE = SECTION_STARTS[7] + SECTION_SIZES[2]
+
+
+def _suit_tables() -> tuple:
+    """By packed suit counts: the flush suit (-1 for none) and the section start."""
+    fields = np.arange(1 << 16)
+    counts = np.stack([(fields >> (4 * suit)) & 0xF for suit in range(4)])
+    flush = np.where(counts.max(axis=0) >= 5, counts.argmax(axis=0), -1).astype(np.int8)
+    sizes = counts.sum(axis=0)
+    starts = np.zeros(1 << 16, dtype=np.int64)
+    for size, start in SECTION_STARTS.items():
+        starts[sizes == size] = start
+    return flush, starts
+
+
+FLUSH_SUIT, SECTION_START = _suit_tables()
+
+_table: Optional[np.ndarray] = None
+
+
+def card_index(card: str) -> int:
+    """``"Ah"`` (or ``"A♥"``, ``"10h"``) -> its index 0..51."""
+    text = str(card).strip()
+    rank, suit = text[:-1].upper().replace("10", "T"), _SUIT_SYMBOLS.get(text[-1:], text[-1:].lower())
+    if len(rank) != 1 or rank not in RANKS or len(suit) != 1 or suit not in SUITS:
+        raise ValueError(f"Invalid card {card!r}")
+    return RANKS.index(rank) * 4 + SUITS.index(suit)
+
+
+def split_cards(text: str) -> List[str]:
+    """The cards written run together in ``text``, e.g. ``"KdKc"`` or ``"10♠ 9♠"``."""
+    return _CARD_TEXT.findall(text)
+
+
+def parse_cards(cards: Iterable[str]) -> List[int]:
+    """Card indices of ``cards``, which must all be different."""
+    indices = [card_index(card) for card in cards]
+    if len(set(indices)) != len(indices):
+        raise ValueError("Duplicate card")
+    return indices
+
+
+def _straight_high(ranks: set) -> int:
+    """The top rank of the best straight in ``ranks``, or -1."""
+    for high in range(12, 3, -1):
+        if all(rank in ranks for rank in range(high - 4, high + 1)):
+            return high
+    # The wheel: A-2-3-4-5 plays as five-high
+    return 3 if {12, 0, 1, 2, 3} <= ranks else -1
+
+
+def _value(category: int, ranks: Sequence[int]) -> int:
+    """A comparable value of a category and its ranks, most significant first."""
+    value = category
+    for rank in list(ranks) + [0] * (5 - len(ranks)):
+        value = value * 13 + rank
+    return value
+
+
+def _unsuited_value(counts: Sequence[int]) -> int:
+    """Value of the best five cards of a rank multiset, ignoring flushes."""
+    by_count = sorted((rank for rank in range(13) if counts[rank]), key=lambda rank: (counts[rank], rank), reverse=True)
+    present = sorted(by_count, reverse=True)
+    top = by_count[0]
+    if counts[top] == 4:
+        return _value(7, [top, max(rank for rank in present if rank != top)])
+    if counts[top] == 3 and counts[by_count[1]] >= 2:
+        return _value(6, [top, by_count[1]])
+    high = _straight_high(set(present))
+    if high >= 0:
+        return _value(4, [high])
+    if counts[top] == 3:
+        return _value(3, [top] + [rank for rank in present if rank != top][:2])
+    if counts[top] == 2 and counts[by_count[1]] == 2:
+        pairs = by_count[:2]
+        return _value(2, pairs + [max(rank for rank in present if rank not in pairs)])
+    if counts[top] == 2:
+        return _value(1, [top] + [rank for rank in present if rank != top][:3])
+    return _value(0, present[:5])
+
+
+def _flush_value(mask: int) -> int:
+    """Value of the best five cards of one suit with rank bits ``mask``."""
+    ranks = {rank for rank in range(13) if mask >> rank & 1}
+    high = _straight_high(ranks)
+    if high >= 0:
+        return _value(8, [high])
+    return _value(5, sorted(ranks, reverse=True)[:5])
+
+
+def build_table() -> np.ndarray:
+    """Every hand's dense strength, indexed by flush rank bits or rank-key sum."""
+    values = np.zeros(TABLE_SIZE, dtype=np.int64)
+    for mask in range(FLUSH_MASKS):
+        if bin(mask).count("1") >= 5:
+            values[mask] = _flush_value(mask)
+    for size in (5, 6, 7):
+        for combo in itertools.combinations_with_replacement(range(13), size):
+            counts = [0] * 13
+            for rank in combo:
+                counts[rank] += 1
+            if max(counts) <= 4:
+                key = sum(RANK_KEYS[rank] for rank in combo)
+                values[SECTION_STARTS[size] + key] = _unsuited_value(counts)
+    distinct, dense = np.unique(values, return_inverse=True)
+    if len(distinct) != sum(CATEGORY_SIZES) + 1:
+        raise RuntimeError("Hand rank table is inconsistent")
+    # Unused slots held 0, which is below every value and becomes strength 0
+    return dense.astype(np.uint16)
+
+
+def write_table(path: str) -> None:
+    """Build the table into ``path``, replacing it atomically."""
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as out:
+        np.save(out, build_table())
+    os.replace(partial, path)
+
+
+def load_table() -> np.ndarray:
+    """The strength table, memory-mapped from ``HAND_RANKS_PATH`` (built if missing)."""
+    global _table
+    if _table is None:
+        path = settings.HAND_RANKS_PATH
+        try:
+            table = np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            table = None
+        if table is None or table.shape != (TABLE_SIZE,):
+            write_table(path)
+            table = np.load(path, mmap_mode="r")
+        _table = table.view(np.ndarray)
+    return _table
+
+
+def key_sums(cards: np.ndarray) -> np.ndarray:
+    """Summed ``CARD_KEY`` of each row of card indices.
+
+    Column by column: one gather per card over the whole batch is several
+    times faster than gathering the rows and summing along them.
+    """
+    columns = np.ascontiguousarray(np.asarray(cards, dtype=np.int8).T)
+    keys = CARD_KEY[columns[0]]
+    for column in columns[1:]:
+        keys += CARD_KEY[column]
+    return keys
+
+
+def strengths(keys: np.ndarray, flush_bits: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """Strengths of hands given their summed ``CARD_KEY``.
+
+    ``flush_bits(rows)`` returns the summed ``CARD_BIT`` of the hands at
+    those positions; it is only called for the few hands with a flush.
+    """
+    table = load_table()
+    suits = keys >> SUIT_SHIFT
+    found = table[(keys & RANK_KEY_MASK) + SECTION_START[suits]]
+    flush_suit = FLUSH_SUIT[suits]
+    flushed = np.flatnonzero(flush_suit >= 0)
+    if flushed.size:
+        lanes = flush_bits(flushed) >> (16 * flush_suit[flushed].astype(np.int64))
+        found[flushed] = table[lanes & (FLUSH_MASKS - 1)]
+    return found
+
+
+def evaluate(cards: np.ndarray) -> np.ndarray:
+    """Strengths of a batch of hands, one row of 5 to 7 card indices each."""
+    cards = np.asarray(cards)
+    if cards.ndim != 2 or not 5 <= cards.shape[1] <= 7:
+        raise ValueError("Hands must be rows of 5 to 7 cards")
+    return strengths(key_sums(cards), lambda rows: CARD_BIT[cards[rows]].sum(axis=1))
+
+
+def evaluate_hand(cards: Sequence[str]) -> int:
+    """Strength of one hand given as card strings."""
+    return int(evaluate(np.array([parse_cards(cards)]))[0])
+
+
+def category(strength: int) -> str:
+    """The category name of a strength, e.g. ``"full_house"``."""
+    return CATEGORIES[int(np.searchsorted(CATEGORY_STARTS, strength, side="right")) - 1]
@@ -0,0 +1,300 @@
+"""PokerStars hand-history parsing.
+
+WHY: Players keep years of hands as PokerStars-format ``.txt`` exports
+(the replayer writes the same format), and nothing could read them back.
+Files run to many megabytes, so they are consumed line by line and cut
+into one text block per hand; each block is parsed on its own into a
+``hands`` row (seats, blinds, actions, cards, pot and side pots). Parsing
+is pure, so batches of blocks can run in worker processes.
+"""
+import re
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+SITE = "PokerStars"
+
+_AMOUNT = r"[$€£]?[\d,]+(?:\.\d+)?"
+
+_HEADER = re.compile(r"^PokerStars (?:Zoom )?(?:Hand|Game) #(\d+):")
+_BLINDS = re.compile(rf"\(({_AMOUNT})/({_AMOUNT})(?: [A-Z]{{3}})?\)")
+_TIME = re.compile(r"(\d{4})/(\d{1,2})/(\d{1,2}) (\d{1,2}):(\d{2}):(\d{2})(?: ([A-Z]{2,4}))?")
+_BUTTON = re.compile(r"Seat #(\d+) is the button")
+_SEAT = re.compile(rf"^Seat (\d+): (.+) \(({_AMOUNT}) in chips(?:, {_AMOUNT} bounty)?\)(.*)$")
+_STREET = re.compile(r"^\*\*\* (HOLE CARDS|FLOP|TURN|RIVER|SHOW ?DOWN|SUMMARY) \*\*\*(.*)$")
+_DEALT = re.compile(r"^Dealt to (.+?) \[([^\]]+)\]")
+_COLLECTED = re.compile(rf"^(.+?) collected ({_AMOUNT}) from (?:(main pot|side pot(?:-(\d+))?|pot))")
+_TOTAL = re.compile(rf"^Total pot ({_AMOUNT})(.*?)\| Rake ({_AMOUNT})")
+_SIDE_POTS = re.compile(rf"(Main pot|Side pot(?:-(\d+))?) ({_AMOUNT})")
+_SUMMARY_CARDS = re.compile(r"^Seat \d+: (.+?)(?: \([^)]*\))? (?:showed|mucked) \[([^\]]+)\]")
+
+_POSTS = {
+    "small blind": "small_blind",
+    "big blind": "big_blind",
+    "small & big blinds": "dead_blinds",
+    "the ante": "ante",
+    "straddle": "straddle",
+}
+
+_ALL_IN = " and is all-in"
+
+# Zones of the clock abbreviations PokerStars prints; anything else is read as UTC
+_ZONES = {
+    "ET": "America/New_York",
+    "CET": "Europe/Paris",
+    "CEST": "Europe/Paris",
+    "WET": "Europe/Lisbon",
+    "MSK": "Europe/Moscow",
+    "AEST": "Australia/Sydney",
+    "UTC": "UTC",
+    "GMT": "UTC",
+}
+
+
+class HandHistoryError(ValueError):
+    """A hand block that can't be read as a PokerStars hand."""
+
+
+def amount(text: str) -> Decimal:
+    try:
+        return Decimal(text.lstrip("$€£").replace(",", ""))
+    except InvalidOperation:
+        raise HandHistoryError(f"Invalid amount {text!r}")
+
+
+def _chips(text: str) -> float:
+    """An amount as a float, for the JSON columns."""
+    try:
+        return float(text.lstrip("$€£").replace(",", ""))
+    except ValueError:
+        raise HandHistoryError(f"Invalid amount {text!r}")
+
+
+def split_hands(lines: Iterable[str]) -> Iterator[str]:
+    """Cut a hand-history stream into one text block per hand.
+
+    Only the current hand is held in memory; anything before the first
+    hand header is skipped.
+    """
+    block: List[str] = []
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        if line.startswith("PokerStars ") and _HEADER.match(line):
+            if block:
+                yield "\n".join(block)
+            block = [line]
+        elif block:
+            block.append(line)
+    if block:
+        yield "\n".join(block)
+
+
+def _played_at(header: str) -> Optional[datetime]:
+    """Start time in UTC, preferring the ET clock Stars prints alongside local time."""
+    found = _TIME.findall(header)
+    if not found:
+        return None
+    *stamp, zone = next((stamp for stamp in found if stamp[-1] == "ET"), found[0])
+    local = datetime(*map(int, stamp), tzinfo=ZoneInfo(_ZONES.get(zone, "UTC")))
+    return local.astimezone(timezone.utc)
+
+
+def positions(seat_numbers: List[int], button: Optional[int]) -> Dict[int, str]:
+    """Position names of the dealt-in seats, given the button seat.
+
+    Heads-up the button is the small blind and is named ``BTN``.
+    """
+    ordered = sorted(seat_numbers)
+    if not ordered:
+        return {}
+    # Clockwise from the first seat after the button, ending on the button
+    after = [seat for seat in ordered if button is not None and seat > button]
+    ordered = after + [seat for seat in ordered if seat not in after]
+    if len(ordered) == 2:
+        return {ordered[1]: "BTN", ordered[0]: "BB"}
+    early = len(ordered) - 3
+    names = ["SB", "BB"]
+    if early > 0:
+        names += ["UTG"] + [f"UTG+{i}" for i in range(1, early - 4)] + ["MP", "LJ", "HJ", "CO"][max(0, 5 - early):]
+    names.append("BTN")
+    return dict(zip(ordered, names))
+
+
+def parse_hand(text: str) -> Dict[str, Any]:
+    """One hand block as ``hands`` column values (without id, user or session).
+
+    Amounts in ``seats``, ``actions`` and ``pots`` are floats so they
+    serialise as JSON numbers. A raise's ``amount`` is the total it raises
+    to, as in the replayer's action records.
+    """
+    lines = text.split("\n")
+    header = _HEADER.match(lines[0])
+    if header is None:
+        raise HandHistoryError("Missing PokerStars hand header")
+    blinds = _BLINDS.search(lines[0])
+    if blinds is None:
+        raise HandHistoryError("Missing blinds in hand header")
+
+    button = None
+    seats: Dict[str, Dict[str, Any]] = {}
+    actions: List[Dict[str, Any]] = []
+    board: List[str] = []
+    hero = hero_cards = None
+    # Pot index (0 = main, n = side pot n) -> amount, and -> winners
+    pots: Dict[int, float] = {}
+    winners: Dict[int, List[str]] = {}
+    total = rake = None
+    street = section = "preflop"
+
+    for line in lines[1:]:
+        if not line:
+            continue
+        marker = _STREET.match(line)
+        if marker is not None:
+            name = marker.group(1)
+            if name in ("FLOP", "TURN", "RIVER"):
+                street = section = name.lower()
+                board = re.findall(r"\[([^\]]+)\]", marker.group(2))
+                board = " ".join(board).split()
+            elif name == "SUMMARY":
+                section = "summary"
+            elif name != "HOLE CARDS":
+                street = section = "showdown"
+            continue
+
+        if section == "summary":
+            total_line = _TOTAL.match(line)
+            if total_line is not None:
+                total, rake = amount(total_line.group(1)), amount(total_line.group(3))
+                for label, number, value in _SIDE_POTS.findall(total_line.group(2)):
+                    pots[0 if label == "Main pot" else int(number or 1)] = _chips(value)
+                continue
+            if line.startswith("Board ["):
+                board = line[7:].rstrip("]").split()
+                continue
+            summary = _SUMMARY_CARDS.match(line)
+            if summary is not None and summary.group(1) in seats and not seats[summary.group(1)]["cards"]:
+                seats[summary.group(1)]["cards"] = summary.group(2).split()
+            continue
+
+        if button is None and line.startswith("Table "):
+            found = _BUTTON.search(line)
+            button = int(found.group(1)) if found else None
+            continue
+        seat = _SEAT.match(line)
+        if seat is not None and section == "preflop" and not actions:
+            seats[seat.group(2)] = {
+                "seat": int(seat.group(1)),
+                "player": seat.group(2),
+                "stack": _chips(seat.group(3)),
+                "position": None,
+                "hero": False,
+                "cards": None,
+                "won": 0.0,
+                "sitting_out": "sitting out" in seat.group(4) or "out of hand" in seat.group(4),
+            }
+            continue
+        if line.startswith("Dealt to "):
+            dealt = _DEALT.match(line)
+            if dealt is not None:
+                hero, hero_cards = dealt.group(1), dealt.group(2).split()
+            continue
+        if line.startswith("Uncalled bet ("):
+            returned, _, player = line[14:].partition(") returned to ")
+            actions.append({
+                "player": player, "action": "uncalled", "amount": _chips(returned), "street": street, "all_in": False,
+            })
+            continue
+
+        # "<player>: <verb> ..."; names may themselves contain ": "
+        colon = line.find(": ")
+        while colon > 0 and line[:colon] not in seats:
+            colon = line.find(": ", colon + 2)
+        if colon > 0:
+            player, rest = line[:colon], line[colon + 2:]
+            all_in = rest.endswith(_ALL_IN)
+            if all_in:
+                rest = rest[:-len(_ALL_IN)]
+            verb, _, tail = rest.partition(" ")
+            if verb == "folds" or verb == "checks":
+                record = {"player": player, "action": verb[:-1]}
+            elif verb == "calls" or verb == "bets":
+                record = {"player": player, "action": verb[:-1], "amount": _chips(tail)}
+            elif verb == "raises":
+                record = {"player": player, "action": "raise", "amount": _chips(tail.rpartition(" to ")[2])}
+            elif verb == "posts":
+                kind, _, posted = tail.rpartition(" ")
+                if kind not in _POSTS:
+                    continue
+                record = {"player": player, "action": "post", "blind": _POSTS[kind], "amount": _chips(posted)}
+            elif verb == "shows":
+                seats[player]["cards"] = tail[1:tail.find("]")].split()
+                continue
+            else:
+                continue
+            record["street"] = street
+            record["all_in"] = all_in
+            actions.append(record)
+            continue
+
+        collected = _COLLECTED.match(line) if " collected " in line else None
+        if collected is not None and collected.group(1) in seats:
+            seats[collected.group(1)]["won"] += _chips(collected.group(2))
+            index = int(collected.group(4) or 1) if collected.group(3).startswith("side") else 0
+            pot_winners = winners.setdefault(index, [])
+            if collected.group(1) not in pot_winners:
+                pot_winners.append(collected.group(1))
+
+    if not seats:
+        raise HandHistoryError("Hand has no seats")
+    if total is None:
+        raise HandHistoryError("Hand has no summary")
+
+    if hero is not None and hero in seats:
+        seats[hero]["hero"] = True
+        seats[hero]["cards"] = hero_cards
+    dealt_in = [info["seat"] for info in seats.values() if not info["sitting_out"]]
+    named = positions(dealt_in, button)
+    for info in seats.values():
+        info["position"] = named.get(info["seat"])
+
+    # Without side pots the one pot is what was collected after rake
+    pots = pots or {0: float(total - rake)}
+    return {
+        "external_id": f"{SITE}:{header.group(1)}",
+        "played_at": _played_at(lines[0]),
+        "small_blind": amount(blinds.group(1)),
+        "big_blind": amount(blinds.group(2)),
+        "seats": sorted(seats.values(), key=lambda info: info["seat"]),
+        "actions": actions,
+        "hero_cards": hero_cards,
+        "community_cards": board,
+        "pot": total,
+        "rake": rake,
+        "pots": [{"amount": pots[index], "winners": winners.get(index, [])} for index in sorted(pots)],
+        "street": street,
+    }
+
+
+def last_hand_start(data: bytes) -> int:
+    """Offset of the last hand header past the start of ``data``, or -1."""
+    position = len(data)
+    while True:
+        position = data.rfind(b"\nPokerStars ", 1, position)
+        if position < 0:
+            return -1
+        if _HEADER.match(data[position + 1:position + 64].decode("utf-8", "replace")):
+            return position + 1
+
+
+def parse_batch(blocks: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Parse hand blocks, collecting a message per unreadable hand."""
+    hands, errors = [], []
+    for block in blocks:
+        try:
+            hands.append(parse_hand(block))
+        except (ValueError, KeyError) as exc:
+            header = block.partition("\n")[0]
+            errors.append(f"{header[:80]}: {exc}")
+    return hands, errors
@@ -0,0 +1,201 @@
+"""Streaming bulk import of hand-history files.
+
+WHY: A 50k-hand export is tens of megabytes. The upload is spooled to a
+temporary file (memory stays bounded, disk beyond
+``HAND_IMPORT_SPOOL_BYTES``) and read back in chunks of about
+``HAND_IMPORT_CHUNK_BYTES`` cut at hand boundaries; spool reads and writes
+run in the thread pool, as they are file I/O once it rolls over.
+Everything per hand (decoding, splitting, parsing, JSON encoding) runs on
+the chunks in worker processes, up to one chunk per worker ahead of the
+database, so the event loop only moves bytes and already-encoded rows.
+Each chunk is written with one batched insert and committed, and the
+client gets a progress line per chunk. Hands are keyed on ``(user_id,
+external_id)``, so re-uploading a file skips what is stored.
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from tempfile import SpooledTemporaryFile
+from typing import Any, AsyncIterator, BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import JSON, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import settings
+from app.db.upsert import upsert
+from app.models.hand import Hand
+from app.services.changelog import record_changes
+from app.services.hand_history import last_hand_start, parse_batch, split_hands
+from app.services.hand_search import search_columns
+from app.services.hud import add_hand_stats, hand_flags, stats_row
+
+# Per-hand error messages reported back; the count covers the rest
+MAX_REPORTED_ERRORS = 20
+
+JSON_COLUMNS = ("seats", "actions", "hero_cards", "community_cards", "pots")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_workers = 0
+
+
+class _EncodedJSON(TypeDecorator):
+    """A JSON column bound from text the worker already encoded."""
+    impl = JSON
+    cache_ok = True
+
+    def bind_processor(self, dialect: Any) -> None:
+        return None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool, _workers
+    if _pool is None:
+        _workers = settings.HAND_IMPORT_WORKERS or os.cpu_count() or 1
+        _pool = ProcessPoolExecutor(max_workers=_workers)
+    return _pool
+
+
+def pool_workers() -> int:
+    """How many processes ``get_pool`` runs."""
+    get_pool()
+    return _workers
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def spool_upload(request: Request) -> BinaryIO:
+    """Copy the request body to a temporary file, rejecting oversized uploads."""
+    spool = SpooledTemporaryFile(max_size=settings.HAND_IMPORT_SPOOL_BYTES)
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > settings.HAND_IMPORT_MAX_BYTES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Hand history files are limited to {settings.HAND_IMPORT_MAX_BYTES} bytes",
+                )
+            # Past HAND_IMPORT_SPOOL_BYTES the spool is a file on disk
+            await run_in_threadpool(spool.write, chunk)
+    except BaseException:
+        await run_in_threadpool(spool.close)
+        raise
+    await run_in_threadpool(spool.seek, 0)
+    return spool
+
+
+def read_chunks(source: BinaryIO, size: int) -> Iterator[bytes]:
+    """``source`` in pieces of at least ``size`` bytes that each end where a hand starts."""
+    buffer = b""
+    while True:
+        data = source.read(size)
+        buffer += data
+        cut = last_hand_start(buffer) if data else len(buffer)
+        if cut > 0:
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+        if not data:
+            return
+
+
+def prepare_rows(data: bytes) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Parse a chunk into insert-ready rows and error messages (runs in a worker process).
+
+    Rows get their ids and search columns here, their JSON columns as
+    encoded text and their HUD flags under ``"hud"``.
+    """
+    hands, errors = parse_batch(split_hands(data.decode("utf-8", "replace").splitlines()))
+    for hand in hands:
+        hand["id"] = str(uuid.uuid4())
+        hand["hud"] = hand_flags(hand)
+        hand.update(search_columns(hand))
+        for name in JSON_COLUMNS:
+            hand[f"{name}_json"] = json.dumps(hand.pop(name))
+    return hands, errors
+
+
+async def _store(
+    db: AsyncSession, user_id: int, session_id: Optional[str], rows: List[Dict[str, Any]]
+) -> int:
+    """Insert prepared rows, skipping hands already imported; returns how many were new."""
+    if not rows:
+        return 0
+    now = datetime.now(timezone.utc)
+    flags = {}
+    for row in rows:
+        flags[row["id"]] = row.pop("hud", None)
+        row.update(user_id=user_id, session_id=session_id, notes=None, created_at=now, updated_at=now)
+    # A parameter list rather than .values(rows): the statement is compiled
+    # once and sent as multi-row batches, instead of compiling a bind
+    # parameter per value
+    stmt = (
+        upsert(db, Hand.__table__)
+        .values({name: bindparam(f"{name}_json", type_=_EncodedJSON()) for name in JSON_COLUMNS})
+        .on_conflict_do_nothing(index_elements=["user_id", "external_id"])
+        .returning(Hand.__table__.c.id)
+    )
+    inserted = list((await db.execute(stmt, rows)).scalars())
+    await record_changes(db, user_id, "hands", inserted)
+    by_id = {row["id"]: row for row in rows}
+    stats = (stats_row(user_id, hand_id, by_id[hand_id], flags[hand_id]) for hand_id in inserted)
+    await add_hand_stats(db, user_id, [row for row in stats if row])
+    return len(inserted)
+
+
+async def import_hands(
+    db: AsyncSession, user_id: int, source: BinaryIO, session_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """Import every hand in ``source``, yielding an NDJSON progress line per chunk.
+
+    Each chunk is committed on its own, so an interrupted upload keeps the
+    hands already written and can simply be sent again. The last line has
+    ``"done": true`` and up to ``MAX_REPORTED_ERRORS`` parse errors.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    workers = pool_workers()
+    progress = {"hands": 0, "imported": 0, "duplicates": 0, "failed": 0}
+    errors: List[str] = []
+    # Parsing runs up to one chunk per worker ahead of the writes
+    pending: Deque[asyncio.Future] = deque()
+    chunks = read_chunks(source, settings.HAND_IMPORT_CHUNK_BYTES)
+    try:
+        while True:
+            # Reads from a spool rolled over to disk block, so run them off the loop
+            data = await run_in_threadpool(next, chunks, None)
+            if data is not None:
+                pending.append(loop.run_in_executor(pool, prepare_rows, data))
+                if len(pending) < workers:
+                    continue
+            if not pending:
+                break
+            rows, failed = await pending.popleft()
+            imported = await _store(db, user_id, session_id, rows)
+            await db.commit()
+            progress["hands"] += len(rows) + len(failed)
+            progress["imported"] += imported
+            progress["duplicates"] += len(rows) - imported
+            progress["failed"] += len(failed)
+            errors.extend(failed[:MAX_REPORTED_ERRORS - len(errors)])
+            yield json.dumps(progress).encode() + b"\n"
+    finally:
+        for future in pending:
+            future.cancel()
+        await run_in_threadpool(source.close)
+        # The request-scoped session has already been handed back by the time
+        # the body is sent, so release the connection (rolling back a chunk
+        # cut short by a disconnect) explicitly.
+        await db.close()
+    yield json.dumps({**progress, "done": True, "errors": errors}).encode() + b"\n"
@@ -0,0 +1,235 @@
+"""Hand search by hole cards, board texture, street and pot size.
+
+WHY: Questions like "my pocket aces on a paired board over 100bb" used to
+mean downloading every hand and filtering its JSON on the device. The
+searchable facts are extracted when a hand is written, into plain
+indexed ``hands`` columns:
+
+- ``hole_class``: the hero's starting hand as ``"AA"``, ``"AKs"`` or ``"T9o"``
+- ``board_texture``: bits for a paired board and a monotone or connected flop
+- ``pot_bb``: the pot in big blinds (the hand's own, else its session's)
+
+Hole class and texture are indexed as ``(user_id, <column>, played_at,
+id)``, so an equality or ``IN`` filter reads its matches already in page
+order; texture bits are searched as the short list of values that contain
+them rather than with a bitwise scan. Results are keyset-paginated newest
+first on ``(played_at, id)``; hands recorded on the device are "played"
+when they were created.
+"""
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import Numeric, Select, bindparam, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.hand import Hand
+from app.models.session import Session
+from app.services.evaluator import RANKS, card_index
+
+PAIRED = 1
+MONOTONE = 2
+CONNECTED = 4
+TEXTURES = {"paired": PAIRED, "monotone": MONOTONE, "connected": CONNECTED}
+STREETS = ("preflop", "flop", "turn", "river", "showdown")
+SEARCH_COLUMNS = ("hole_class", "board_texture", "pot_bb")
+
+_HOLE_CLASS = re.compile(r"^([2-9TJQKA])([2-9TJQKA])([SO]?)$")
+_CENT = Decimal("0.01")
+# SQLite stores whole NUMERIC values as integers and would floor-divide them
+_ONE = literal(Decimal("1"), Numeric(10, 2))
+
+
+def hole_class(cards: Optional[Iterable[str]]) -> Optional[str]:
+    """``["Kd", "Ad"]`` -> ``"AKs"``; None unless exactly two valid cards."""
+    try:
+        indices = [card_index(card) for card in cards or []]
+    except ValueError:
+        return None
+    if len(indices) != 2 or indices[0] == indices[1]:
+        return None
+    (high, high_suit), (low, low_suit) = sorted((divmod(index, 4) for index in indices), reverse=True)
+    if high == low:
+        return RANKS[high] * 2
+    return RANKS[high] + RANKS[low] + ("s" if high_suit == low_suit else "o")
+
+
+def board_texture(cards: Optional[Iterable[str]]) -> Optional[int]:
+    """Texture bits of a board, or None before the flop.
+
+    Paired looks at every card dealt; monotone (one suit) and connected
+    (three ranks within a five-rank straight window, ace low too) describe
+    the flop.
+    """
+    try:
+        indices = [card_index(card) for card in cards or []]
+    except ValueError:
+        return None
+    if len(indices) < 3:
+        return None
+    ranks = [index // 4 for index in indices]
+    texture = PAIRED if len(set(ranks)) < len(ranks) else 0
+    flop = indices[:3]
+    if len({index % 4 for index in flop}) == 1:
+        texture |= MONOTONE
+    flop_ranks = {index // 4 for index in flop}
+    if len(flop_ranks) == 3:
+        wheel = {-1 if rank == len(RANKS) - 1 else rank for rank in flop_ranks}
+        if max(flop_ranks) - min(flop_ranks) <= 4 or max(wheel) - min(wheel) <= 4:
+            texture |= CONNECTED
+    return texture
+
+
+def street_reached(hand: Mapping[str, Any]) -> str:
+    """The last street of a hand recorded on the device, from its board and actions."""
+    # Three community cards are the flop, four the turn, five the river
+    reached = max(0, min(len(hand.get("community_cards") or []), 5) - 2)
+    for action in hand.get("actions") or []:
+        if action.get("street") in STREETS:
+            reached = max(reached, STREETS.index(action["street"]))
+    return STREETS[reached]
+
+
+def pot_in_big_blinds(pot: Any, big_blind: Any) -> Optional[Decimal]:
+    if pot is None or not big_blind:
+        return None
+    return (Decimal(str(pot)) / Decimal(str(big_blind))).quantize(_CENT, ROUND_HALF_UP)
+
+
+def search_columns(hand: Mapping[str, Any], big_blind: Any = None) -> Dict[str, Any]:
+    """The search columns of a hand; ``big_blind`` defaults to the hand's own."""
+    return {
+        "hole_class": hole_class(hand.get("hero_cards")),
+        "board_texture": board_texture(hand.get("community_cards")),
+        "pot_bb": pot_in_big_blinds(hand.get("pot"), hand.get("big_blind") or big_blind),
+    }
+
+
+def parse_hole_classes(values: Iterable[str]) -> List[str]:
+    """Search terms to hole classes: ``"AKs"``, ``"KA"`` (suited and offsuit), ``"TT"``.
+
+    Raises ValueError for anything else.
+    """
+    classes: List[str] = []
+    for value in values:
+        match = _HOLE_CLASS.match(value.strip().upper().replace("10", "T"))
+        if match is None:
+            raise ValueError(f"Invalid hole cards {value!r}")
+        first, second, suited = match.groups()
+        high, low = sorted((first, second), key=RANKS.index, reverse=True)
+        if high == low:
+            if suited:
+                raise ValueError(f"A pair can't be {'suited' if suited == 'S' else 'offsuit'}: {value!r}")
+            classes.append(high + low)
+        else:
+            classes.extend(high + low + kind for kind in (suited.lower() or "so"))
+    return list(dict.fromkeys(classes))
+
+
+def texture_values(names: Iterable[str]) -> List[int]:
+    """Every ``board_texture`` value that has all the named bits."""
+    mask = 0
+    for name in names:
+        mask |= TEXTURES[name]
+    return [value for value in range(sum(TEXTURES.values()) + 1) if value & mask == mask]
+
+
+def texture_names(texture: Optional[int]) -> List[str]:
+    return [name for name, bit in TEXTURES.items() if texture and texture & bit]
+
+
+def search_query(
+    user_id: int,
+    hole: Iterable[str] = (),
+    texture: Iterable[str] = (),
+    street: Optional[str] = None,
+    min_pot_bb: Optional[float] = None,
+    max_pot_bb: Optional[float] = None,
+    session_id: Optional[str] = None,
+) -> Select:
+    """The user's hands matching every given filter, for ``keyset_page``.
+
+    ``street`` matches hands that got at least that far. Hands written
+    before search columns existed have no ``played_at`` until
+    ``rebuild_stats`` fills them in, and are left out.
+    """
+    query = select(Hand).where(Hand.user_id == user_id, Hand.played_at.is_not(None))
+    classes = parse_hole_classes(hole)
+    if classes:
+        query = query.where(Hand.hole_class.in_(classes))
+    texture = list(texture)
+    if texture:
+        query = query.where(Hand.board_texture.in_(texture_values(texture)))
+    if street is not None:
+        query = query.where(Hand.street.in_(STREETS[STREETS.index(street):]))
+    if min_pot_bb is not None:
+        query = query.where(Hand.pot_bb >= min_pot_bb)
+    if max_pot_bb is not None:
+        query = query.where(Hand.pot_bb <= max_pot_bb)
+    if session_id is not None:
+        query = query.where(Hand.session_id == session_id)
+    return query
+
+
+async def reprice_session_hands(db: AsyncSession, user_id: int, big_blinds: Mapping[str, Any]) -> None:
+    """Recompute ``pot_bb`` of the hands of sessions whose big blind is
+    ``big_blinds[session_id]``, for hands without a big blind of their own."""
+    params = [
+        {"target_session": session_id, "session_big_blind": big_blind}
+        for session_id, big_blind in big_blinds.items() if big_blind
+    ]
+    if not params:
+        return
+    table = Hand.__table__
+    await db.execute(
+        update(table)
+        .where(
+            table.c.user_id == user_id,
+            table.c.session_id == bindparam("target_session"),
+            table.c.big_blind.is_(None),
+        )
+        .values(
+            pot_bb=table.c.pot * _ONE / bindparam("session_big_blind", type_=table.c.pot.type),
+            updated_at=table.c.updated_at,
+        ),
+        params,
+    )
+
+
+async def rebuild_search_columns(db: AsyncSession, user_id: int) -> int:
+    """Re-derive every hand's search columns, and the street and
+    ``played_at`` of device hands, without touching ``updated_at``.
+    Returns the number of hands."""
+    table = Hand.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("hand_id"))
+        .values(
+            played_at=bindparam("new_played_at"), street=bindparam("new_street"), updated_at=table.c.updated_at,
+            **{name: bindparam(f"new_{name}") for name in SEARCH_COLUMNS},
+        )
+    )
+    result = await db.stream(
+        select(
+            Hand.id, Hand.external_id, Hand.hero_cards, Hand.community_cards, Hand.actions, Hand.street, Hand.pot,
+            Hand.big_blind, Hand.played_at, Hand.created_at, Session.big_blind.label("session_big_blind"),
+        )
+        .outerjoin(Session, Session.id == Hand.session_id)
+        .where(Hand.user_id == user_id)
+        .execution_options(yield_per=1000)
+    )
+    count = 0
+    async for hands in result.mappings().partitions():
+        params = []
+        for hand in hands:
+            device = hand["external_id"] is None
+            found = search_columns(hand, hand["session_big_blind"])
+            params.append({
+                "hand_id": hand["id"],
+                "new_played_at": hand["played_at"] or hand["created_at"],
+                "new_street": street_reached(hand) if device else hand["street"],
+                **{f"new_{name}": value for name, value in found.items()},
+            })
+        await db.execute(stmt, params)
+        count += len(params)
+    return count
@@ -0,0 +1,315 @@
+"""HUD stats (VPIP, PFR, 3-bet, aggression, showdown) from hand actions.
+
+WHY: HUD percentages need every hand's action list, and re-parsing that
+JSON for each request grows with the player's history. Each hand's
+actions are walked once when the hand is written, into a ``hand_stats``
+row of bit flags and two small counts. Per-user ``hud_counters`` take the
+difference of every write (as stats rollups do), so the unfiltered HUD is
+a primary-key read; filtered HUDs (a session, a date range) sum the flag
+bits of a covering index without touching ``hands``.
+
+Only the hero's play is counted: the seat marked ``hero`` in imported
+hands, or the player named ``hero`` in hands recorded on the device.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import chunked, upsert
+from app.models.hand import Hand
+from app.models.stats import HandStats, HudCounters
+
+VPIP = 1
+PFR = 2
+THREE_BET_OPPORTUNITY = 4
+THREE_BET = 8
+SAW_FLOP = 16
+WENT_TO_SHOWDOWN = 32
+WON_AT_SHOWDOWN = 64
+
+# Counter column -> the flag it counts
+COUNTED_FLAGS = {
+    "vpip": VPIP,
+    "pfr": PFR,
+    "three_bet_opportunities": THREE_BET_OPPORTUNITY,
+    "three_bets": THREE_BET,
+    "saw_flop": SAW_FLOP,
+    "went_to_showdown": WENT_TO_SHOWDOWN,
+    "won_at_showdown": WON_AT_SHOWDOWN,
+}
+COUNTER_COLUMNS = ("hands", *COUNTED_FLAGS, "aggressive", "calls")
+POSTFLOP = ("flop", "turn", "river")
+# Columns a hand's stats are derived from
+SOURCE_COLUMNS = (
+    Hand.id, Hand.session_id, Hand.played_at, Hand.created_at, Hand.actions, Hand.seats, Hand.street,
+)
+
+
+def find_hero(hand: Mapping[str, Any]) -> Optional[str]:
+    for seat in hand.get("seats") or []:
+        if seat.get("hero"):
+            return seat.get("player")
+    for action in hand.get("actions") or []:
+        if str(action.get("player", "")).lower() == "hero":
+            return action["player"]
+    return None
+
+
+def hand_flags(hand: Mapping[str, Any]) -> Optional[Tuple[int, int, int]]:
+    """The hero's ``(flags, aggressive, calls)`` in one hand, or None without a hero.
+
+    A 3-bet opportunity is a preflop decision facing exactly one raise. The
+    hero saw the flop when the hand got there without their preflop fold;
+    showdown flags also need them not to have folded later.
+    """
+    hero = find_hero(hand)
+    if hero is None:
+        return None
+    flags = aggressive = calls = raises = 0
+    folded = postflop = False
+    for action in hand.get("actions") or []:
+        street, kind = action.get("street") or "preflop", action.get("action")
+        if kind in ("post", "uncalled", "shows"):
+            continue
+        mine = action.get("player") == hero
+        if street == "preflop":
+            if mine:
+                if raises == 1:
+                    flags |= THREE_BET_OPPORTUNITY
+                    if kind in ("raise", "bet"):
+                        flags |= THREE_BET
+                if kind in ("call", "raise", "bet"):
+                    flags |= VPIP
+                if kind in ("raise", "bet"):
+                    flags |= PFR
+            if kind in ("raise", "bet"):
+                raises += 1
+        elif street in POSTFLOP:
+            postflop = True
+            if mine and kind in ("bet", "raise"):
+                aggressive += 1
+            elif mine and kind == "call":
+                calls += 1
+        if mine and kind == "fold":
+            folded = True
+            if street == "preflop":
+                return flags, aggressive, calls
+
+    # Hands recorded on the device may not set ``street``
+    street = hand.get("street")
+    if postflop or street in POSTFLOP or street == "showdown":
+        flags |= SAW_FLOP
+        if street == "showdown" and not folded:
+            flags |= WENT_TO_SHOWDOWN
+            won = next((seat.get("won") for seat in hand.get("seats") or [] if seat.get("player") == hero), None)
+            if won:
+                flags |= WON_AT_SHOWDOWN
+    return flags, aggressive, calls
+
+
+def stats_row(user_id: int, hand_id: str, hand: Mapping[str, Any], found: Optional[Tuple[int, int, int]]) -> Optional[Dict[str, Any]]:
+    """The ``hand_stats`` row of a hand given its ``hand_flags``."""
+    if found is None:
+        return None
+    flags, aggressive, calls = found
+    return {
+        "hand_id": hand_id,
+        "user_id": user_id,
+        "session_id": hand.get("session_id"),
+        "played_at": hand.get("played_at") or hand.get("created_at") or datetime.utcnow(),
+        "flags": flags,
+        "aggressive": aggressive,
+        "calls": calls,
+    }
+
+
+def contribution(rows: Iterable[Mapping[str, Any]]) -> Counter:
+    """What ``hand_stats`` rows add to the counters."""
+    totals: Counter = Counter()
+    for row in rows:
+        totals["hands"] += 1
+        for name, bit in COUNTED_FLAGS.items():
+            if row["flags"] & bit:
+                totals[name] += 1
+        totals["aggressive"] += row["aggressive"]
+        totals["calls"] += row["calls"]
+    return totals
+
+
+async def _has_counters(db: AsyncSession, user_id: int) -> bool:
+    return await db.scalar(select(HudCounters.user_id).where(HudCounters.user_id == user_id)) is not None
+
+
+async def _claim_counters(db: AsyncSession, user_id: int) -> bool:
+    """Insert the user's zeroed counters row; False if it already exists.
+
+    Only the request whose insert creates the row builds the stats: a
+    concurrent first request waits on the row, inserts nothing and counts
+    its own writes incrementally instead of adding the history twice.
+    """
+    claimed = await db.scalar(
+        upsert(db, HudCounters).values(user_id=user_id)
+        .on_conflict_do_nothing()
+        .returning(HudCounters.user_id)
+    )
+    return claimed is not None
+
+
+async def _ensure_counters(db: AsyncSession, user_id: int) -> bool:
+    """Build the user's stats on first use; True if this call built them."""
+    if not await _claim_counters(db, user_id):
+        return False
+    await _build(db, user_id)
+    return True
+
+
+async def _insert(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    if rows:
+        await db.execute(HandStats.__table__.insert(), rows)
+
+
+async def _apply(db: AsyncSession, user_id: int, before: Iterable[Mapping[str, Any]], after: Iterable[Mapping[str, Any]]) -> None:
+    delta = contribution(after)
+    delta.subtract(contribution(before))
+    delta = {name: value for name, value in delta.items() if value}
+    if not delta:
+        return
+    columns = HudCounters.__table__.c
+    stmt = upsert(db, HudCounters).values(user_id=user_id, updated_at=datetime.utcnow(), **delta)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={**{name: columns[name] + stmt.excluded[name] for name in delta}, "updated_at": stmt.excluded.updated_at},
+    ))
+
+
+async def _build(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    """Derive ``hand_stats`` rows and counters from the user's hands.
+
+    Stats rows are only written alongside the counters row, so a user
+    without counters has none to clear.
+    """
+    totals: Counter = Counter()
+    result = await db.stream(
+        select(*SOURCE_COLUMNS).where(Hand.user_id == user_id).execution_options(yield_per=1000)
+    )
+    async for hands in result.mappings().partitions():
+        rows = [row for row in (stats_row(user_id, hand["id"], hand, hand_flags(hand)) for hand in hands) if row]
+        await _insert(db, rows)
+        totals.update(contribution(rows))
+    counters = {name: totals[name] for name in COUNTER_COLUMNS}
+    stmt = upsert(db, HudCounters).values(user_id=user_id, updated_at=datetime.utcnow(), **counters)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={name: stmt.excluded[name] for name in (*COUNTER_COLUMNS, "updated_at")},
+    ))
+    return counters
+
+
+async def rebuild_hud(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    """Re-derive the user's ``hand_stats`` and counters from their hands."""
+    await db.execute(delete(HandStats).where(HandStats.user_id == user_id))
+    return await _build(db, user_id)
+
+
+async def add_hand_stats(db: AsyncSession, user_id: int, rows: List[Dict[str, Any]]) -> None:
+    """Store the stats rows of newly inserted hands and count them."""
+    if await _ensure_counters(db, user_id):
+        # The build read the new hands too
+        return
+    await _insert(db, rows)
+    await _apply(db, user_id, [], rows)
+
+
+async def refresh_hand_stats(db: AsyncSession, user_id: int, hand_ids: Iterable[str]) -> None:
+    """Re-derive the stats of hands just written or deleted, in the caller's transaction."""
+    hand_ids = list(dict.fromkeys(hand_ids))
+    if not hand_ids:
+        return
+    if await _ensure_counters(db, user_id):
+        return
+    for chunk in chunked(hand_ids):
+        before = (await db.execute(
+            delete(HandStats)
+            .where(HandStats.user_id == user_id, HandStats.hand_id.in_(chunk))
+            .returning(HandStats.flags, HandStats.aggressive, HandStats.calls)
+        )).mappings().all()
+        hands = (await db.execute(
+            select(*SOURCE_COLUMNS).where(Hand.user_id == user_id, Hand.id.in_(chunk))
+        )).mappings().all()
+        after = [row for row in (stats_row(user_id, hand["id"], hand, hand_flags(hand)) for hand in hands) if row]
+        await _insert(db, after)
+        await _apply(db, user_id, before, after)
+
+
+async def remove_hand_stats(db: AsyncSession, user_id: int, hand_ids: Iterable[str]) -> None:
+    """Uncount hands about to be deleted (before the foreign key cascades)."""
+    hand_ids = list(dict.fromkeys(hand_ids))
+    if not hand_ids or not await _has_counters(db, user_id):
+        return
+    for chunk in chunked(hand_ids):
+        before = (await db.execute(
+            delete(HandStats)
+            .where(HandStats.user_id == user_id, HandStats.hand_id.in_(chunk))
+            .returning(HandStats.flags, HandStats.aggressive, HandStats.calls)
+        )).mappings().all()
+        await _apply(db, user_id, before, [])
+
+
+async def load_hud(
+    db: AsyncSession,
+    user_id: int,
+    session_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """HUD totals over the user's hands, optionally of one session and/or
+    played in ``[start, end)``.
+
+    Unfiltered it reads the counters row (built on first use); filtered it
+    sums ``hand_stats`` through its covering index.
+    """
+    if session_id is None and start is None and end is None:
+        counters = select(*(getattr(HudCounters, name) for name in COUNTER_COLUMNS)).where(HudCounters.user_id == user_id)
+        row = (await db.execute(counters)).mappings().one_or_none()
+        if row is None:
+            if await _claim_counters(db, user_id):
+                return await _build(db, user_id)
+            # Built by a concurrent request
+            row = (await db.execute(counters)).mappings().one()
+        return dict(row)
+
+    await _ensure_counters(db, user_id)
+    query = select(
+        func.count().label("hands"),
+        *(func.count().filter(HandStats.flags.op("&")(bit) != 0).label(name) for name, bit in COUNTED_FLAGS.items()),
+        func.coalesce(func.sum(HandStats.aggressive), 0).label("aggressive"),
+        func.coalesce(func.sum(HandStats.calls), 0).label("calls"),
+    ).where(HandStats.user_id == user_id)
+    if session_id is not None:
+        query = query.where(HandStats.session_id == session_id)
+    if start is not None:
+        query = query.where(HandStats.played_at >= start)
+    if end is not None:
+        query = query.where(HandStats.played_at < end)
+    return dict((await db.execute(query)).mappings().one())
+
+
+def _percent(part: int, whole: int) -> Optional[float]:
+    return round(100 * part / whole, 1) if whole else None
+
+
+def build_hud(totals: Mapping[str, int]) -> Dict[str, Any]:
+    """Percentages (and the aggression factor) from HUD totals."""
+    return {
+        "hands": totals["hands"],
+        "vpip": _percent(totals["vpip"], totals["hands"]),
+        "pfr": _percent(totals["pfr"], totals["hands"]),
+        "three_bet": _percent(totals["three_bets"], totals["three_bet_opportunities"]),
+        "aggression_factor": round(totals["aggressive"] / totals["calls"], 2) if totals["calls"] else None,
+        "went_to_showdown": _percent(totals["went_to_showdown"], totals["saw_flop"]),
+        "won_at_showdown": _percent(totals["won_at_showdown"], totals["went_to_showdown"]),
+        "counts": {name: totals[name] for name in COUNTER_COLUMNS},
+    }
@@ -0,0 +1,77 @@
+"""Request-level dedup log for sync pushes.
+
+WHY: Mobile clients retry ``/sync/push`` on flaky networks. Answering a
+retry from the stored outcome costs one primary-key lookup instead of
+re-validating and re-writing the whole change set.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.upsert import upsert
+from app.models.sync import PushReceipt
+from app.schemas.sync import SyncPushRequest
+
+
+def push_key(request: SyncPushRequest, header_key: Optional[str] = None) -> str:
+    """Return the explicit idempotency key, or a hash of the push content."""
+    explicit = header_key or request.idempotency_key
+    if explicit:
+        return explicit[:64]
+    canonical = json.dumps(
+        {"changes": request.changes, "last_pulled_at": request.last_pulled_at},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+async def get_receipt(db: AsyncSession, user_id: int, key: str) -> Optional[Dict[str, Any]]:
+    """Return the stored response for a push that was already applied."""
+    cutoff = datetime.utcnow() - timedelta(hours=settings.PUSH_DEDUP_TTL_HOURS)
+    return await db.scalar(
+        select(PushReceipt.response).where(
+            PushReceipt.user_id == user_id,
+            PushReceipt.key == key,
+            PushReceipt.created_at >= cutoff,
+        )
+    )
+
+
+async def save_receipt(db: AsyncSession, user_id: int, key: str, response: Dict[str, Any]) -> None:
+    """Record a push outcome in the caller's transaction and trim the user's log."""
+    stmt = upsert(db, PushReceipt).values(
+        user_id=user_id, key=key, response=response, created_at=datetime.utcnow()
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "key"],
+            set_={"response": stmt.excluded.response, "created_at": stmt.excluded.created_at},
+        )
+    )
+    newest = (
+        select(PushReceipt.key)
+        .where(PushReceipt.user_id == user_id)
+        .order_by(PushReceipt.created_at.desc())
+        .limit(settings.PUSH_DEDUP_MAX_PER_USER)
+    )
+    await db.execute(
+        delete(PushReceipt).where(
+            PushReceipt.user_id == user_id,
+            PushReceipt.key.not_in(newest),
+        )
+    )
+
+
+async def purge_receipts(db: AsyncSession, ttl: timedelta) -> int:
+    """Evict receipts older than ``ttl``; returns the number removed."""
+    result = await db.execute(
+        delete(PushReceipt).where(PushReceipt.created_at < datetime.utcnow() - ttl)
+    )
+    return result.rowcount or 0
@@ -0,0 +1,38 @@
+"""Periodic background housekeeping.
+
+WHY: Sync bookkeeping tables (tombstones, push receipts) only need their
+recent tail; a single in-process loop keeps them small without an external
+scheduler.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.changelog import purge_tombstones
+from app.services.idempotency import purge_receipts
+
+logger = logging.getLogger(__name__)
+
+
+async def run_compaction() -> None:
+    """Run one compaction pass in its own transaction."""
+    async with AsyncSessionLocal() as db:
+        purged = await purge_tombstones(db, timedelta(days=settings.TOMBSTONE_RETENTION_DAYS))
+        evicted = await purge_receipts(db, timedelta(hours=settings.PUSH_DEDUP_TTL_HOURS))
+        await db.commit()
+    if purged or evicted:
+        logger.info("Purged %d tombstones, %d push receipts", purged, evicted)
+
+
+async def compaction_loop() -> None:
+    """Run compaction every ``COMPACTION_INTERVAL_MINUTES`` until cancelled."""
+    while True:
+        try:
+            await run_compaction()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Compaction pass failed")
+        await asyncio.sleep(settings.COMPACTION_INTERVAL_MINUTES * 60)
@@ -0,0 +1,183 @@
+"""Per-user change notifications for ``/sync/subscribe``.
+
+WHY: Without them every device polls ``/sync/pull`` on a timer even when
+nothing changed. Subscribers park on an in-process hub instead and are woken
+when their user's change sequence advances, so idle users cost no queries.
+
+Sequence bumps are queued on the DB session by ``allocate_seq`` and handed
+to the hub only after the transaction commits. The hub's backend fans
+notifications out across workers: ``memory`` is enough for a single process,
+``postgres`` relays them through LISTEN/NOTIFY. A missed notification only
+delays a device until its next subscribe call, which re-reads the sequence.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = "sync_notifications"
+
+
+class Subscription:
+    """One waiting client; remembers the highest sequence it was sent."""
+
+    def __init__(self, user_id: int, seq: int):
+        self.user_id = user_id
+        self.seq = seq
+        self._event = asyncio.Event()
+
+    def notify(self, seq: int) -> None:
+        """Record ``seq`` and wake the waiter if it is news to this client."""
+        if seq > self.seq:
+            self.seq = seq
+            self._event.set()
+
+    async def wait(self, timeout: float) -> Optional[int]:
+        """Return the new sequence, or None if nothing changed in ``timeout``."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._event.clear()
+        return self.seq
+
+
+class MemoryBackend:
+    """Single worker: local commits are the only source of notifications."""
+
+    async def start(self, hub: "SyncHub") -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def announce(self, db: AsyncSession, user_id: int, seq: int) -> None:
+        pass
+
+
+class PostgresBackend:
+    """Relay notifications between workers with LISTEN/NOTIFY.
+
+    ``pg_notify`` is transactional, so other workers hear about a change only
+    once it has committed, exactly like local subscribers do.
+    """
+
+    CHANNEL = "sync_changes"
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self._conn: Optional[AsyncConnection] = None
+
+    async def start(self, hub: "SyncHub") -> None:
+        def on_notify(connection, pid, channel, payload: str) -> None:
+            user_id, _, seq = payload.partition(":")
+            try:
+                hub.publish(int(user_id), int(seq))
+            except ValueError:
+                logger.warning("Ignoring malformed sync notification %r", payload)
+
+        self._conn = await self.engine.connect()
+        raw = await self._conn.get_raw_connection()
+        await raw.driver_connection.add_listener(self.CHANNEL, on_notify)
+
+    async def stop(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def announce(self, db: AsyncSession, user_id: int, seq: int) -> None:
+        await db.execute(select(func.pg_notify(self.CHANNEL, f"{user_id}:{seq}")))
+
+
+class SyncHub:
+    """Fan sequence bumps out to the subscriptions of each user."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    async def start(self) -> None:
+        await self.backend.start(self)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    def subscribe(self, user_id: int, seq: int) -> Subscription:
+        subscription = Subscription(user_id, seq)
+        self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def subscriber_count(self, user_id: int) -> int:
+        return len(self._subscriptions.get(user_id, ()))
+
+    def publish(self, user_id: int, seq: int) -> None:
+        for subscription in list(self._subscriptions.get(user_id, ())):
+            subscription.notify(seq)
+
+    async def announce(self, db: AsyncSession, user_id: int, seq: int) -> None:
+        """Queue a notification to go out when ``db`` commits."""
+        pending = db.sync_session.info.setdefault(_PENDING_KEY, {})
+        pending[user_id] = max(seq, pending.get(user_id, 0))
+        await self.backend.announce(db, user_id, seq)
+
+
+hub = SyncHub()
+
+
+async def stream_events(
+    request: Request, subscription: Subscription, heartbeat: float, stale: bool = False
+) -> AsyncIterator[bytes]:
+    """Server-Sent Events: one ``change`` event per sequence bump.
+
+    ``stale`` sends one right away for a client that is already behind.
+    Comment lines go out every ``heartbeat`` seconds so proxies keep the
+    connection open and disconnects are noticed.
+    """
+    try:
+        if stale:
+            yield _change_event(subscription.seq)
+        while not await request.is_disconnected():
+            seq = await subscription.wait(heartbeat)
+            yield _change_event(seq) if seq is not None else b": keep-alive\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def _change_event(seq: int) -> bytes:
+    return f"event: change\ndata: {json.dumps({'timestamp': seq})}\n\n".encode()
+
+
+def configure_hub(backend_name: str, engine: AsyncEngine) -> None:
+    if backend_name == "postgres":
+        hub.backend = PostgresBackend(engine)
+    elif backend_name == "memory":
+        hub.backend = MemoryBackend()
+    else:
+        raise ValueError(f"Unknown sync notification backend {backend_name!r}")
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _publish_committed(session: OrmSession) -> None:
+    for user_id, seq in session.info.pop(_PENDING_KEY, {}).items():
+        hub.publish(user_id, seq)
+
+
+@event.listens_for(OrmSession, "after_rollback")
+def _drop_rolled_back(session: OrmSession) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,61 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+WHY: ``OFFSET n`` makes the database walk and discard ``n`` rows, so deep
+pages get slower the further a client scrolls. Lists are instead ordered
+newest first by ``(timestamp, id)`` and each page resumes strictly after
+the last row of the previous one, which a ``(user_id, timestamp, id)``
+index turns into a seek: every page costs the same, and rows written
+while paging never shift later pages. The position is handed to clients
+as an opaque cursor.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, literal, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(timestamp: datetime, record_id: str) -> str:
+    payload = json.dumps({"t": timestamp.isoformat(), "i": record_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    timestamp: Any,
+    record_id: Any,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """One page of ``query`` ordered by ``(timestamp, id)`` descending.
+
+    Returns the rows and the cursor of the next page, or None on the last
+    page. One extra row is read to tell whether another page exists.
+    """
+    if cursor is not None:
+        after, after_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(timestamp, record_id) < tuple_(literal(after, timestamp.type), literal(after_id, record_id.type))
+        )
+    result = await db.execute(query.order_by(timestamp.desc(), record_id.desc()).limit(limit + 1))
+    rows = list(result.scalars())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp.key), getattr(last, record_id.key))
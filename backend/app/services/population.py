@@ -0,0 +1,163 @@
+"""Anonymized population benchmarks per stakes.
+
+WHY: "Where does my win rate sit against everyone at 2/5" needs every
+player's sessions, far too much to read at request time. A nightly batch
+job streams all sessions once, ordered by ``(user_id, stakes)`` through a
+server-side cursor, reduces each player's sessions at a stakes to their
+bb/100 and hourly rate, and folds those into per-stakes quantile sketches.
+User-id ranges are scanned in parallel worker processes, each on its own
+engine, and their sketches merged. Only the sketches are stored, so the
+endpoint is a single lookup and never sees another user's rows.
+
+Run nightly from cron or a platform scheduler:
+
+    python -m app.commands.compute_benchmarks
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Numeric, delete, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.models.benchmark import PopulationBenchmark
+from app.models.session import Session
+from app.services.sketch import QuantileSketch
+from app.services.stats import HANDS_PER_HOUR
+
+# Rows per fetch from the server-side cursor
+SCAN_CHUNK_SIZE = 5000
+# User-id ranges per worker, so one heavy range doesn't leave others idle
+RANGES_PER_WORKER = 4
+
+# (stakes, metric) -> (players, sketch)
+Partial = Dict[Tuple[str, str], Tuple[int, Dict[str, Any]]]
+
+
+def _float(column: Any) -> Any:
+    return type_coerce(column, Numeric(asdecimal=False))
+
+
+def player_metrics(profit: float, bb_won: float, hours: float, bb_hours: float) -> Dict[str, Optional[float]]:
+    """One player's rates at one stakes.
+
+    Hours are estimated as ``/stats`` does; bb/100 only counts the hours of
+    sessions with a big blind.
+    """
+    return {
+        "hourly_rate": profit / hours if hours > 0 else None,
+        "bb_per_100": bb_won / (bb_hours * HANDS_PER_HOUR) * 100 if bb_hours > 0 else None,
+    }
+
+
+async def _scan_range(database_url: str, first: int, last: int, min_hours: float) -> Partial:
+    engine = create_async_engine(database_url)
+    values: Dict[Tuple[str, str], List[float]] = {}
+
+    def finish(stakes: str, totals: List[float]) -> None:
+        if totals[2] < min_hours:
+            return
+        for metric, value in player_metrics(*totals).items():
+            if value is not None:
+                values.setdefault((stakes, metric), []).append(value)
+
+    try:
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                select(
+                    Session.user_id,
+                    Session.stakes,
+                    _float(Session.cash_out - Session.buy_in),
+                    _float(Session.hours_played),
+                    _float(Session.big_blind),
+                )
+                .where(Session.user_id.between(first, last), Session.hours_played > 0)
+                .order_by(Session.user_id, Session.stakes)
+                .execution_options(yield_per=SCAN_CHUNK_SIZE)
+            )
+            key, totals = None, [0.0, 0.0, 0.0, 0.0]
+            async for rows in result.partitions():
+                for user_id, stakes, profit, hours, big_blind in rows:
+                    if (user_id, stakes) != key:
+                        if key is not None:
+                            finish(key[1], totals)
+                        key, totals = (user_id, stakes), [0.0, 0.0, 0.0, 0.0]
+                    totals[0] += profit or 0.0
+                    totals[2] += hours
+                    if big_blind and big_blind > 0:
+                        totals[1] += (profit or 0.0) / big_blind
+                        totals[3] += hours
+            if key is not None:
+                finish(key[1], totals)
+    finally:
+        await engine.dispose()
+    return {key: (len(found), QuantileSketch().add(found).to_dict()) for key, found in values.items()}
+
+
+def scan_range(database_url: str, first: int, last: int, min_hours: float) -> Partial:
+    """Sketch the sessions of users ``first..last`` (runs in a worker process)."""
+    return asyncio.run(_scan_range(database_url, first, last, min_hours))
+
+
+def split_range(first: int, last: int, parts: int) -> List[Tuple[int, int]]:
+    """Cut ``first..last`` into up to ``parts`` contiguous inclusive ranges."""
+    size = max(1, -(-(last - first + 1) // parts))
+    return [(start, min(start + size - 1, last)) for start in range(first, last + 1, size)]
+
+
+async def compute_benchmarks(db: AsyncSession, database_url: str, workers: int = 0) -> int:
+    """Rebuild every benchmark; returns the number of rows stored.
+
+    ``db`` only reads the user-id bounds and replaces the table in the
+    caller's transaction; the scans run on their own connections.
+    """
+    workers = workers or os.cpu_count() or 1
+    first, last = (await db.execute(select(func.min(Session.user_id), func.max(Session.user_id)))).one()
+    merged: Dict[Tuple[str, str], Tuple[int, QuantileSketch]] = {}
+    if first is not None:
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = await asyncio.gather(*(
+                loop.run_in_executor(pool, scan_range, database_url, start, end, settings.BENCHMARK_MIN_HOURS)
+                for start, end in split_range(first, last, workers * RANGES_PER_WORKER)
+            ))
+        for partial in partials:
+            for key, (players, sketch) in partial.items():
+                total, combined = merged.get(key, (0, QuantileSketch()))
+                merged[key] = (total + players, combined.merge(QuantileSketch.from_dict(sketch)))
+
+    now = datetime.utcnow()
+    rows = [
+        {"stakes": stakes, "metric": metric, "players": players, "sketch": sketch.to_dict(), "computed_at": now}
+        for (stakes, metric), (players, sketch) in merged.items()
+        if players >= settings.BENCHMARK_MIN_PLAYERS
+    ]
+    await db.execute(delete(PopulationBenchmark))
+    if rows:
+        await db.execute(PopulationBenchmark.__table__.insert(), rows)
+    return len(rows)
+
+
+async def load_benchmarks(db: AsyncSession, stakes: str) -> List[PopulationBenchmark]:
+    """The stored benchmarks of one stakes: a single primary-key range read."""
+    result = await db.execute(select(PopulationBenchmark).where(PopulationBenchmark.stakes == stakes))
+    return list(result.scalars())
+
+
+async def own_metrics(db: AsyncSession, user_id: int, stakes: str) -> Dict[str, Optional[float]]:
+    """The user's own rates at ``stakes``, on the benchmark's definitions."""
+    profit = _float(Session.cash_out - Session.buy_in)
+    has_blind = Session.big_blind > 0
+    row = (await db.execute(
+        select(
+            func.coalesce(func.sum(profit), 0.0),
+            # Times 1.0 so SQLite doesn't floor-divide whole amounts
+            func.coalesce(func.sum(_float((Session.cash_out - Session.buy_in) * 1.0 / Session.big_blind)).filter(has_blind), 0.0),
+            func.coalesce(func.sum(_float(Session.hours_played)), 0.0),
+            func.coalesce(func.sum(_float(Session.hours_played)).filter(has_blind), 0.0),
+        ).where(Session.user_id == user_id, Session.stakes == stakes, Session.hours_played > 0)
+    )).one()
+    return player_metrics(*(float(value) for value in row))
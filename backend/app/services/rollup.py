@@ -0,0 +1,178 @@
+"""Incrementally maintained stats rollups.
+
+WHY: Even a single aggregate query re-reads every session a player has
+logged each time the dashboard opens. Instead every write adds its delta to
+one ``stats_rollups`` row per user, in the same transaction, and ``/stats``
+reads that row by primary key. Deltas are computed from the affected rows'
+values before and after the write, so creates, updates and deletes all go
+through the same arithmetic, and the same deltas feed the daily chart
+buckets (``app.services.buckets``). ``rebuild_rollups`` recomputes both
+from the source tables to repair any drift.
+"""
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import chunked, upsert
+from app.services import buckets, hand_search, hud
+from app.models.session import Session
+from app.models.stats import StatsRollup
+from app.models.transaction import Transaction, TransactionType
+from app.models.user import User
+from app.services.stats import totals_query
+
+# Columns whose values feed the rollup, per tracked table
+CONTRIBUTING_COLUMNS = {
+    "sessions": (
+        Session.buy_in, Session.cash_out, Session.tips, Session.expenses,
+        Session.hours_played, Session.big_blind, Session.start_time,
+    ),
+    "transactions": (Transaction.type, Transaction.amount, Transaction.created_at),
+}
+TRACKED_MODELS = {"sessions": Session, "transactions": Transaction}
+
+TOTAL_COLUMNS = tuple(
+    column.name for column in StatsRollup.__table__.columns
+    if column.name not in ("user_id", "updated_at")
+)
+
+
+def _value(value: Any) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def contribution(table: str, row: Mapping[str, Any]) -> Counter:
+    """What one session or transaction adds to its owner's totals."""
+    totals: Counter = Counter()
+    if table == "sessions":
+        profit = _value(row["cash_out"]) - _value(row["buy_in"])
+        tips, expenses = _value(row["tips"]), _value(row["expenses"])
+        totals.update(
+            total_sessions=1,
+            winning_sessions=int(profit > 0),
+            losing_sessions=int(profit < 0),
+            total_profit=profit,
+            total_tips=tips,
+            total_expenses=expenses,
+            total_hours=_value(row["hours_played"]),
+        )
+        big_blind = _value(row["big_blind"])
+        if big_blind > 0:
+            totals.update(bb_won=profit / big_blind, tips_bb=tips / big_blind, expenses_bb=expenses / big_blind)
+    elif table == "transactions":
+        if row["type"] == TransactionType.DEPOSIT:
+            totals["total_deposits"] = _value(row["amount"])
+        elif row["type"] == TransactionType.WITHDRAWAL:
+            totals["total_withdrawals"] = _value(row["amount"])
+    return totals
+
+
+async def ensure_rollup(db: AsyncSession, user_id: int) -> None:
+    """Create the user's rollup from the source tables if it doesn't exist.
+
+    Must run before a tracked write so the delta lands on pre-write totals.
+    """
+    exists = await db.scalar(select(StatsRollup.user_id).where(StatsRollup.user_id == user_id))
+    if exists is None:
+        await _store_totals(db, user_id)
+
+
+async def _store_totals(db: AsyncSession, user_id: int) -> Dict[str, Any]:
+    totals = dict((await db.execute(totals_query(user_id))).mappings().one())
+    stmt = upsert(db, StatsRollup).values(user_id=user_id, updated_at=datetime.utcnow(), **totals)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={name: stmt.excluded[name] for name in (*TOTAL_COLUMNS, "updated_at")},
+    ))
+    return totals
+
+
+async def snapshot(
+    db: AsyncSession, user_id: int, table: str, record_ids: Iterable[str]
+) -> List[Mapping[str, Any]]:
+    """Current contributing values of the user's records among ``record_ids``."""
+    model = TRACKED_MODELS[table]
+    rows: List[Mapping[str, Any]] = []
+    for chunk in chunked(list(record_ids)):
+        result = await db.execute(
+            select(*CONTRIBUTING_COLUMNS[table]).where(model.user_id == user_id, model.id.in_(chunk))
+        )
+        rows.extend(result.mappings())
+    return rows
+
+
+async def apply_changes(
+    db: AsyncSession,
+    user_id: int,
+    table: str,
+    before: Iterable[Mapping[str, Any]],
+    after: Iterable[Mapping[str, Any]],
+) -> None:
+    """Add the difference between ``after`` and ``before`` rows to the rollup
+    and the user's daily buckets."""
+    before, after = list(before), list(after)
+    await buckets.apply_changes(db, user_id, table, before, after)
+    delta: Counter = Counter()
+    for row in after:
+        delta.update(contribution(table, row))
+    for row in before:
+        delta.subtract(contribution(table, row))
+    delta = {name: value for name, value in delta.items() if value}
+    if not delta:
+        return
+    columns = StatsRollup.__table__.c
+    stmt = upsert(db, StatsRollup).values(user_id=user_id, updated_at=datetime.utcnow(), **delta)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            **{name: columns[name] + stmt.excluded[name] for name in delta},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+
+@asynccontextmanager
+async def tracking(
+    db: AsyncSession, user_id: int, table: str, record_ids: Iterable[str]
+) -> AsyncIterator[None]:
+    """Keep the rollup in step with writes to ``record_ids`` inside the block."""
+    record_ids = list(record_ids)
+    await ensure_rollup(db, user_id)
+    before = await snapshot(db, user_id, table, record_ids)
+    yield
+    await db.flush()
+    await apply_changes(db, user_id, table, before, await snapshot(db, user_id, table, record_ids))
+
+
+async def load_totals(db: AsyncSession, user_id: int) -> Mapping[str, Any]:
+    """The user's totals: a primary-key read, built on first use."""
+    row = (await db.execute(
+        select(*(getattr(StatsRollup, name) for name in TOTAL_COLUMNS))
+        .where(StatsRollup.user_id == user_id)
+    )).mappings().one_or_none()
+    if row is None:
+        return await _store_totals(db, user_id)
+    return row
+
+
+async def rebuild_rollups(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Recompute rollups, daily buckets, HUD stats and hand search columns
+    from the source tables.
+
+    Returns the number of users rebuilt.
+    """
+    if user_id is not None:
+        user_ids = [user_id]
+    else:
+        user_ids = list((await db.execute(select(User.id).order_by(User.id))).scalars())
+    for uid in user_ids:
+        await _store_totals(db, uid)
+        await buckets.rebuild_buckets(db, uid)
+        await hud.rebuild_hud(db, uid)
+        await hand_search.rebuild_search_columns(db, uid)
+    return len(user_ids)
@@ -0,0 +1,132 @@
+"""Monte Carlo bankroll simulation.
+
+WHY: A win rate and standard deviation only hint at what the next 50k
+hands can do to a bankroll. Simulating many trajectories answers it
+directly (percentile bands, chance of going broke, typical worst
+downswing), but costs seconds of CPU. Trajectories are generated in
+NumPy blocks of ``BLOCK_SIZE`` in a process pool so the event loop keeps
+serving requests, and each block draws from its own child of one
+``SeedSequence``: a seeded run gives the same answer however many workers
+share it. A block is walked ``CHUNK_CELLS`` values at a time, carrying each
+trajectory's bankroll, peak and worst fall from one chunk to the next, so
+a worker's memory doesn't grow with the number of hands.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Hands per simulated step; the rate and deviation are per 100 hands
+STEP_HANDS = 100
+BLOCK_SIZE = 5000
+# Trajectory-steps drawn at once in a block (float32, so 32 MB per array)
+CHUNK_CELLS = 1 << 23
+# Points along the volume axis at which percentile bands are reported
+CHECKPOINTS = 50
+PERCENTILES = (5, 25, 50, 75, 95)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.SIMULATION_WORKERS or os.cpu_count())
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def simulate_block(
+    seed: np.random.SeedSequence,
+    trajectories: int,
+    steps: int,
+    rate: float,
+    std_dev: float,
+    bankroll: float,
+    checkpoints: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Simulate one block of trajectories (runs in a worker process).
+
+    Returns each trajectory's bankroll at ``checkpoints`` (step indices),
+    whether it ever reached zero and its worst peak-to-trough fall.
+    """
+    rng = np.random.default_rng(seed)
+    chunk = max(1, CHUNK_CELLS // trajectories)
+    values = np.empty((trajectories, len(checkpoints)), dtype=np.float32)
+    level = np.full(trajectories, bankroll, dtype=np.float32)
+    peak = level.copy()
+    worst = np.zeros(trajectories, dtype=np.float32)
+    ruined = np.full(trajectories, bankroll <= 0)
+    for start in range(0, steps, chunk):
+        paths = rng.standard_normal((trajectories, min(chunk, steps - start)), dtype=np.float32)
+        paths *= np.float32(std_dev)
+        paths += np.float32(rate)
+        paths[:, 0] += level
+        np.cumsum(paths, axis=1, out=paths)
+
+        here = (checkpoints >= start) & (checkpoints < start + paths.shape[1])
+        values[:, here] = paths[:, checkpoints[here] - start]
+        ruined |= (paths <= 0).any(axis=1)
+        level = paths[:, -1].copy()
+
+        # Peaks carry over from earlier chunks (and the starting bankroll)
+        peaks = np.maximum.accumulate(paths, axis=1)
+        np.maximum(peaks, peak[:, None], out=peaks)
+        peak = peaks[:, -1].copy()
+        peaks -= paths
+        np.maximum(worst, peaks.max(axis=1), out=worst)
+    return {"checkpoints": values, "ruined": ruined, "worst_downswing": worst}
+
+
+async def simulate(
+    rate: float,
+    std_dev: float,
+    bankroll: float,
+    hands: int,
+    trajectories: int,
+    seed: Optional[int] = None,
+) -> Dict[str, object]:
+    """Run ``trajectories`` bankroll paths over ``hands`` and summarize them.
+
+    ``rate`` and ``std_dev`` are per 100 hands, in the same unit as
+    ``bankroll``. Ruin is checked once per ``STEP_HANDS``.
+    """
+    steps = max(1, hands // STEP_HANDS)
+    checkpoints = np.unique(np.linspace(0, steps - 1, min(CHECKPOINTS, steps)).round().astype(np.int64))
+    sizes = [BLOCK_SIZE] * (trajectories // BLOCK_SIZE)
+    if trajectories % BLOCK_SIZE:
+        sizes.append(trajectories % BLOCK_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    loop = asyncio.get_running_loop()
+    pool = get_pool()
+    blocks: List[Dict[str, np.ndarray]] = await asyncio.gather(*(
+        loop.run_in_executor(pool, simulate_block, block_seed, size, steps, rate, std_dev, bankroll, checkpoints)
+        for block_seed, size in zip(seeds, sizes)
+    ))
+
+    values = np.concatenate([block["checkpoints"] for block in blocks])
+    ruined = np.concatenate([block["ruined"] for block in blocks])
+    worst = np.concatenate([block["worst_downswing"] for block in blocks])
+    bands = np.percentile(values, PERCENTILES, axis=0)
+    return {
+        "steps": steps,
+        "bands": [
+            {"hands": int(step + 1) * STEP_HANDS, **{f"p{p}": float(band[i]) for p, band in zip(PERCENTILES, bands)}}
+            for i, step in enumerate(checkpoints)
+        ],
+        "probability_of_ruin": float(ruined.mean()),
+        "expected_worst_downswing": float(worst.mean()),
+        "worst_downswing_p95": float(np.percentile(worst, 95)),
+        "expected_final_bankroll": float(values[:, -1].mean()),
+    }
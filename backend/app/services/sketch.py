@@ -0,0 +1,100 @@
+"""Mergeable quantile sketch.
+
+WHY: Population percentiles are computed in parallel over slices of the
+user base, so partial results must combine exactly without keeping every
+value. Values are counted in logarithmic bins (as in DDSketch): any
+quantile comes back within ``relative_accuracy`` of a true value, merging
+is adding counts, and a few hundred bins cover every realistic win rate.
+"""
+import math
+from collections import Counter
+from typing import Any, Dict, Iterable, Tuple
+
+import numpy as np
+
+# Values closer to zero than this are counted as zero
+MIN_MAGNITUDE = 1e-9
+
+
+class QuantileSketch:
+    """Log-binned counts of positive and negative values, plus zeros."""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Counter = Counter()
+        self.negative: Counter = Counter()
+        self.zero = 0
+
+    @property
+    def count(self) -> int:
+        return self.zero + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _bins(self, magnitudes: np.ndarray) -> Iterable[Tuple[int, int]]:
+        indices = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        return zip(*(array.tolist() for array in np.unique(indices, return_counts=True)))
+
+    def add(self, values: Iterable[float]) -> "QuantileSketch":
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.zero += int(np.count_nonzero(np.abs(values) < MIN_MAGNITUDE))
+        self.positive.update(dict(self._bins(values[values >= MIN_MAGNITUDE])))
+        self.negative.update(dict(self._bins(-values[values <= -MIN_MAGNITUDE])))
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches of different accuracy")
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero += other.zero
+        return self
+
+    def _sorted(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Bin values (ascending) and their cumulative counts."""
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        scale = 2 / (self.gamma + 1)
+        values = np.concatenate([
+            -scale * np.power(self.gamma, np.array(negative, dtype=np.float64)),
+            np.zeros(1 if self.zero else 0),
+            scale * np.power(self.gamma, np.array(positive, dtype=np.float64)),
+        ])
+        counts = np.array(
+            [self.negative[i] for i in negative] + ([self.zero] if self.zero else []) + [self.positive[i] for i in positive],
+            dtype=np.int64,
+        )
+        return values, np.cumsum(counts)
+
+    def quantile(self, q: float) -> float:
+        """Approximate ``q``-quantile (0-1); NaN when empty."""
+        values, cumulative = self._sorted()
+        if not len(values):
+            return math.nan
+        rank = q * (cumulative[-1] - 1)
+        return float(values[min(int(np.searchsorted(cumulative, rank, side="right")), len(values) - 1)])
+
+    def rank(self, value: float) -> float:
+        """Approximate fraction of counted values at or below ``value``."""
+        values, cumulative = self._sorted()
+        if not len(values):
+            return math.nan
+        position = int(np.searchsorted(values, value, side="right"))
+        return float(cumulative[position - 1] / cumulative[-1]) if position else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "accuracy": self.relative_accuracy,
+            "zero": self.zero,
+            "positive": sorted(self.positive.items()),
+            "negative": sorted(self.negative.items()),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["accuracy"])
+        sketch.zero = data["zero"]
+        sketch.positive.update({int(index): count for index, count in data["positive"]})
+        sketch.negative.update({int(index): count for index, count in data["negative"]})
+        return sketch
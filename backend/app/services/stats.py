@@ -0,0 +1,259 @@
+"""Bankroll statistics computed in the database.
+
+WHY: Loading every session as an ORM object and summing in Python makes
+``/stats`` slower with every session a player logs. One aggregate query
+returns the handful of totals the response is derived from; those totals
+are kept per user in ``stats_rollups`` (see ``app.services.rollup``).
+Breakdowns by stakes, location and the like reuse the same aggregates in
+one GROUP BY. Chart series are folded from daily buckets (see
+``app.services.buckets``).
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import Integer, Numeric, Select, cast, func, literal, select
+
+from app.models.session import Session
+from app.models.transaction import Transaction, TransactionType
+from app.schemas.stats import StatsBreakdownRow, StatsResponse, StatsSeriesPoint, StatsSeriesResponse
+from app.services.buckets import period_start
+from app.services.downsample import extremes, lttb
+
+HANDS_PER_HOUR = 25
+
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+
+# SQLite stores whole NUMERIC values as integers and would floor-divide them
+_ONE = literal(Decimal("1"), Numeric(10, 2))
+
+
+def _sum(expression: Any, *conditions: Any):
+    aggregate = func.sum(expression)
+    if conditions:
+        aggregate = aggregate.filter(*conditions)
+    return func.coalesce(aggregate, 0)
+
+
+def _transactions_total(user_id: int, kind: TransactionType):
+    return (
+        select(_sum(Transaction.amount))
+        .where(Transaction.user_id == user_id, Transaction.type == kind)
+        .scalar_subquery()
+    )
+
+
+def session_totals() -> List[Any]:
+    """Aggregates over sessions shared by ``/stats`` and its breakdowns."""
+    profit = Session.cash_out - Session.buy_in
+    has_blind = Session.big_blind > 0
+    return [
+        func.count().label("total_sessions"),
+        func.count().filter(profit > 0).label("winning_sessions"),
+        func.count().filter(profit < 0).label("losing_sessions"),
+        _sum(profit).label("total_profit"),
+        _sum(Session.tips).label("total_tips"),
+        _sum(Session.expenses).label("total_expenses"),
+        _sum(Session.hours_played).label("total_hours"),
+        _sum(profit * _ONE / Session.big_blind, has_blind).label("bb_won"),
+        _sum(Session.tips * _ONE / Session.big_blind, has_blind).label("tips_bb"),
+        _sum(Session.expenses * _ONE / Session.big_blind, has_blind).label("expenses_bb"),
+    ]
+
+
+def totals_query(user_id: int) -> Select:
+    """Every total ``/stats`` needs, as one row."""
+    return select(
+        *session_totals(),
+        _transactions_total(user_id, TransactionType.DEPOSIT).label("total_deposits"),
+        _transactions_total(user_id, TransactionType.WITHDRAWAL).label("total_withdrawals"),
+    ).where(Session.user_id == user_id)
+
+
+WEEKDAYS = ("sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday")
+
+BREAKDOWN_COLUMNS = {"stakes": Session.stakes, "location": Session.location, "game_type": Session.game_type}
+
+
+def _local_start(dialect: str, tz: str) -> Any:
+    """``Session.start_time`` as wall-clock time in ``tz``.
+
+    Postgres converts with the zone's rules. SQLite has no timezone
+    database, so dev and test setups shift by the zone's current offset.
+    """
+    if dialect == "postgresql":
+        return func.timezone(tz, Session.start_time)
+    offset = datetime.now(ZoneInfo(tz)).utcoffset() or timedelta()
+    minutes = int(offset.total_seconds() // 60)
+    return func.datetime(Session.start_time, f"{minutes:+d} minutes")
+
+
+def _time_part(dialect: str, part: str, tz: str) -> Any:
+    local = _local_start(dialect, tz)
+    if dialect == "postgresql":
+        return cast(func.extract("dow" if part == "weekday" else "hour", local), Integer)
+    return cast(func.strftime("%w" if part == "weekday" else "%H", local), Integer)
+
+
+def breakdown_query(user_id: int, group_by: str, dialect: str, tz: str = "UTC") -> Select:
+    """Session totals per stakes, location, game type, weekday or hour, in one GROUP BY.
+
+    Weekdays are numbered from Sunday (0) and hours 0-23, both in ``tz``.
+    """
+    if group_by in BREAKDOWN_COLUMNS:
+        key = BREAKDOWN_COLUMNS[group_by]
+    else:
+        key = _time_part(dialect, group_by, tz)
+    return (
+        select(key.label("group"), *session_totals())
+        .where(Session.user_id == user_id)
+        .group_by(key)
+        .order_by(key)
+    )
+
+
+def _decimal(value: Any) -> Decimal:
+    # SQLite returns floats for SUM over NUMERIC
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def _money(value: Any) -> Decimal:
+    return _decimal(value).quantize(CENTS)
+
+
+def _session_stats(totals: Mapping[str, Any]) -> Dict[str, Any]:
+    """Session metrics shared by the stats response and breakdown rows."""
+    total_sessions = totals["total_sessions"] or 0
+    winning_sessions = totals["winning_sessions"] or 0
+    total_profit = _money(totals["total_profit"])
+    total_tips = _money(totals["total_tips"])
+    total_expenses = _money(totals["total_expenses"])
+    total_hours = _money(totals["total_hours"])
+    net_profit = total_profit - total_tips - total_expenses
+
+    total_hands = total_hours * HANDS_PER_HOUR
+    bb_won = _decimal(totals["bb_won"])
+    net_bb_won = bb_won - _decimal(totals["tips_bb"]) - _decimal(totals["expenses_bb"])
+
+    return dict(
+        total_sessions=total_sessions,
+        winning_sessions=winning_sessions,
+        losing_sessions=totals["losing_sessions"] or 0,
+        total_profit=total_profit,
+        net_profit=net_profit,
+        total_tips=total_tips,
+        total_expenses=total_expenses,
+        total_hours=total_hours,
+        avg_session_hours=total_hours / total_sessions if total_sessions else ZERO,
+        hourly_rate=total_profit / total_hours if total_hours > 0 else ZERO,
+        net_hourly_rate=net_profit / total_hours if total_hours > 0 else ZERO,
+        bb_per_100=bb_won / total_hands * 100 if total_hands > 0 else ZERO,
+        net_bb_per_100=net_bb_won / total_hands * 100 if total_hands > 0 else ZERO,
+        win_rate_percentage=Decimal(winning_sessions * 100) / total_sessions if total_sessions else ZERO,
+    )
+
+
+def build_stats(totals: Mapping[str, Any]) -> StatsResponse:
+    """Derive the stats response from aggregated totals."""
+    stats = _session_stats(totals)
+    initial_bankroll = _money(totals["total_deposits"]) - _money(totals["total_withdrawals"])
+    return StatsResponse(
+        **stats,
+        current_bankroll=initial_bankroll + stats["net_profit"],
+        initial_bankroll=initial_bankroll,
+    )
+
+
+def build_breakdown(group_by: str, rows: Iterable[Mapping[str, Any]]) -> List[StatsBreakdownRow]:
+    """One stats row per group, with weekdays named and hours as numbers."""
+    breakdown = []
+    for row in rows:
+        group = row["group"]
+        if group_by == "weekday" and group is not None:
+            group = WEEKDAYS[int(group)]
+        elif group is not None:
+            group = str(group)
+        breakdown.append(StatsBreakdownRow(group=group, **_session_stats(row)))
+    return breakdown
+
+
+def build_series(
+    opening: Mapping[str, Any],
+    buckets: Iterable[Mapping[str, Any]],
+    bucket: str,
+    tz: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> StatsSeriesResponse:
+    """Fold day buckets (ordered by day) into periods with running totals.
+
+    Bankroll follows ``build_stats``: deposits less withdrawals plus net
+    profit (profit after tips and expenses).
+    """
+    def net(totals: Mapping[str, Any]) -> Decimal:
+        return _decimal(totals["profit"]) - _decimal(totals["tips"]) - _decimal(totals["expenses"])
+
+    def cashflow(totals: Mapping[str, Any]) -> Decimal:
+        return _decimal(totals["deposits"]) - _decimal(totals["withdrawals"])
+
+    cumulative_profit = _decimal(opening["profit"])
+    cumulative_net = net(opening)
+    bankroll = cumulative_net + cashflow(opening)
+    response = StatsSeriesResponse(
+        bucket=bucket, tz=tz, start=start, end=end,
+        opening_profit=_money(cumulative_profit),
+        opening_net_profit=_money(cumulative_net),
+        opening_bankroll=_money(bankroll),
+        points=[],
+    )
+
+    periods: Dict[date, Dict[str, Any]] = {}
+    for row in buckets:
+        totals = periods.setdefault(period_start(row["day"], bucket), {
+            "sessions": 0, "profit": ZERO, "tips": ZERO, "expenses": ZERO,
+            "hours": ZERO, "deposits": ZERO, "withdrawals": ZERO,
+        })
+        for name in totals:
+            totals[name] += row[name] if name == "sessions" else _decimal(row[name])
+
+    for first_day, totals in periods.items():
+        # Buckets emptied by deletes stay behind as zero rows
+        if not any(totals.values()):
+            continue
+        period_net = net(totals)
+        cumulative_profit += totals["profit"]
+        cumulative_net += period_net
+        bankroll += period_net + cashflow(totals)
+        response.points.append(StatsSeriesPoint(
+            period_start=first_day,
+            sessions=totals["sessions"],
+            profit=_money(totals["profit"]),
+            net_profit=_money(period_net),
+            hours=_money(totals["hours"]),
+            deposits=_money(totals["deposits"]),
+            withdrawals=_money(totals["withdrawals"]),
+            cumulative_profit=_money(cumulative_profit),
+            cumulative_net_profit=_money(cumulative_net),
+            bankroll=_money(bankroll),
+        ))
+    response.total_points = len(response.points)
+    return response
+
+
+def downsample_series(series: StatsSeriesResponse, points: int) -> StatsSeriesResponse:
+    """Thin the series to at most ``points`` points along the bankroll line.
+
+    The bankroll's high, low and largest drawdown are always kept.
+
+    Kept points are unchanged, so running totals stay exact; the per-period
+    totals of dropped periods are not folded into them.
+    """
+    if len(series.points) <= points:
+        return series
+    x = np.fromiter((point.period_start.toordinal() for point in series.points), np.float64, len(series.points))
+    y = np.fromiter((point.bankroll for point in series.points), np.float64, len(series.points))
+    series.points = [series.points[index] for index in lttb(x, y, points, keep=extremes(y))]
+    return series
@@ -0,0 +1,695 @@
+"""WatermelonDB sync helpers.
+
+WHY: Keeps the sync protocol (row (de)serialization, paging cursors,
+streaming, bulk push) out of the endpoint module so the JSON and streaming
+paths share one implementation and peak memory stays bounded by the page
+size. Changes are read from the per-user change log (see
+``app.services.changelog``), and the WatermelonDB ``timestamp`` is the
+user's change sequence, not wall-clock time.
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import (
+    JSON, DateTime, Enum as SQLEnum, Numeric, Text, and_, case, cast, func, literal, select, type_coerce, union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models.session import Session, hours_between
+from app.models.hand import Hand
+from app.models.transaction import Transaction, TransactionType
+from app.models.sync import ChangeLog, SyncState, Tombstone
+from app.db.snapshot import gather_in_snapshot
+from app.db.upsert import chunked, dialect_name, upsert
+from app.services.changelog import current_seq, delete_records, record_changes
+from app.services.hand_search import pot_in_big_blinds, reprice_session_hands, search_columns, street_reached
+from app.services.hud import refresh_hand_stats
+from app.services.rollup import CONTRIBUTING_COLUMNS, tracking
+
+SYNC_TABLES = ("sessions", "hands", "transactions")
+
+# Rows fetched per DB round trip while streaming
+STREAM_CHUNK_SIZE = 500
+STREAM_FLUSH_BYTES = 64 * 1024
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MILLISECOND = timedelta(milliseconds=1)
+# SQLite stores whole NUMERIC values as integers and would floor-divide them
+_ONE = literal(Decimal("1"), Numeric(10, 2))
+
+
+def to_millis(value: Optional[datetime]) -> Optional[int]:
+    """Convert a datetime to a WatermelonDB millisecond timestamp.
+
+    SQLite hands back naive datetimes; they are stored as UTC. Integer
+    timedelta division is exact and avoids the float round trip of
+    ``timestamp()``.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // _MILLISECOND
+
+
+def from_millis(value: int) -> datetime:
+    """Convert a WatermelonDB millisecond timestamp to an aware UTC datetime."""
+    return datetime.fromtimestamp(value / 1000.0, tz=timezone.utc)
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value
+
+
+def _json_null(value: str) -> Optional[str]:
+    # JSON columns persist Python None as the JSON literal
+    return None if value == "null" else value
+
+
+def _wire(column: Any) -> Any:
+    """Select ``column`` so the driver hands back a wire-ready value.
+
+    Money columns are read as floats (``asdecimal=False``) so no Decimal is
+    ever built for a row that is only going to be JSON-encoded. WatermelonDB
+    wants JSON columns as text, which is how they are stored, so in either
+    wire format they are read as text instead of being parsed and
+    re-encoded.
+    """
+    if isinstance(column.type, Numeric):
+        return type_coerce(column, Numeric(column.type.precision, column.type.scale, asdecimal=False))
+    if isinstance(column.type, JSON):
+        return cast(column, Text)
+    return column
+
+
+# Wire column name -> model column, per table (WatermelonDB raw record names)
+TABLE_SOURCES: Dict[str, Tuple[Any, Tuple[Tuple[str, Any], ...]]] = {
+    "sessions": (Session, (
+        ("id", Session.id),
+        ("start_time", Session.start_time),
+        ("end_time", Session.end_time),
+        ("game_type", Session.game_type),
+        ("stakes", Session.stakes),
+        ("small_blind", Session.small_blind),
+        ("big_blind", Session.big_blind),
+        ("buy_in", Session.buy_in),
+        ("cash_out", Session.cash_out),
+        ("location", Session.location),
+        ("notes", Session.notes),
+        ("tips", Session.tips),
+        ("expenses", Session.expenses),
+        ("created_at", Session.created_at),
+        ("updated_at", Session.updated_at),
+    )),
+    "hands": (Hand, (
+        ("id", Hand.id),
+        ("session_id", Hand.session_id),
+        ("cards", Hand.hero_cards),
+        ("community_cards", Hand.community_cards),
+        ("actions", Hand.actions),
+        ("pot", Hand.pot),
+        ("notes", Hand.notes),
+        ("created_at", Hand.created_at),
+        ("updated_at", Hand.updated_at),
+    )),
+    "transactions": (Transaction, (
+        ("id", Transaction.id),
+        ("amount", Transaction.amount),
+        ("type", Transaction.type),
+        ("notes", Transaction.description),
+        ("created_at", Transaction.created_at),
+        ("updated_at", Transaction.updated_at),
+    )),
+}
+
+# Column order of each table on the wire
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    table: tuple(name for name, _ in columns) for table, (_, columns) in TABLE_SOURCES.items()
+}
+
+PULL_FORMATS = ("rows", "columnar")
+
+
+def _compile_converter(table: str) -> Callable[[Any], List[Any]]:
+    """Build the per-row function turning a DB row into wire values.
+
+    Which positions need converting is decided once per table from the
+    column types; rows only pay for the conversions they need.
+    """
+    conversions = []
+    for position, (_, column) in enumerate(TABLE_SOURCES[table][1]):
+        if isinstance(column.type, DateTime):
+            conversions.append((position, to_millis))
+        elif isinstance(column.type, SQLEnum) and column.type.enum_class is not None:
+            conversions.append((position, _enum_value))
+        elif isinstance(column.type, JSON):
+            conversions.append((position, _json_null))
+
+    def convert(row: Any) -> List[Any]:
+        values = list(row)
+        for position, function in conversions:
+            value = values[position]
+            if value is not None:
+                values[position] = function(value)
+        return values
+
+    return convert
+
+
+ROW_CONVERTERS: Dict[str, Callable[[Any], List[Any]]] = {table: _compile_converter(table) for table in SYNC_TABLES}
+
+
+def row_encoder(table: str, fmt: str) -> Callable[[List[Any]], Any]:
+    """Return a function turning a list of wire values into one wire row.
+
+    ``rows`` (the original format) yields a dict per record; ``columnar``
+    sends the value list as-is, matching the table's column header.
+    """
+    if fmt == "columnar":
+        return lambda values: values
+    columns = TABLE_COLUMNS[table]
+    return lambda values: dict(zip(columns, values))
+
+
+def empty_changes(fmt: str = "rows") -> Dict[str, Dict[str, Any]]:
+    if fmt == "columnar":
+        return {
+            table: {
+                "created": {"columns": list(TABLE_COLUMNS[table]), "rows": []},
+                "updated": {"columns": list(TABLE_COLUMNS[table]), "rows": []},
+                "deleted": [],
+            }
+            for table in SYNC_TABLES
+        }
+    return {table: {"created": [], "updated": [], "deleted": []} for table in SYNC_TABLES}
+
+
+def expand_records(records: Any) -> List[Any]:
+    """Accept pushed records as a list of dicts or a columnar block."""
+    if isinstance(records, dict):
+        columns = records.get("columns") or []
+        return [dict(zip(columns, row)) for row in records.get("rows") or []]
+    return list(records or [])
+
+
+class PullCursor:
+    """Position inside a paginated pull, in change-log sequence numbers.
+
+    ``until`` pins the user's sequence at the first page so changes committed
+    while the client is paging are deferred to the next sync instead of being
+    skipped or duplicated. ``after`` is the last sequence already delivered.
+    ``page_size`` and the wire ``fmt`` are carried along so clients only need
+    to echo the cursor.
+    """
+
+    def __init__(self, after: int, until: int, page_size: Optional[int] = None, fmt: str = "rows"):
+        self.after = after
+        self.until = until
+        self.page_size = page_size
+        self.fmt = fmt
+
+    @property
+    def done(self) -> bool:
+        return self.after >= self.until
+
+    def encode(self) -> str:
+        payload = json.dumps(
+            {"a": self.after, "u": self.until, "n": self.page_size, "f": self.fmt},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "PullCursor":
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            page_size = payload.get("n")
+            fmt = payload.get("f", "rows")
+            if fmt not in PULL_FORMATS:
+                raise ValueError(f"unknown format {fmt!r}")
+            return cls(
+                int(payload["a"]),
+                int(payload["u"]),
+                int(page_size) if page_size is not None else None,
+                fmt,
+            )
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid sync cursor",
+            )
+
+
+async def start_pull(
+    db: AsyncSession,
+    user_id: int,
+    last_pulled_at: Optional[int],
+    page_size: Optional[int],
+    fmt: str = "rows",
+) -> PullCursor:
+    """Open a pull window ending at the user's current sequence.
+
+    ``last_pulled_at`` is the sequence returned by the previous pull. Values
+    beyond the current sequence can only be wall-clock timestamps from
+    clients that synced before the change log existed; they get a full sync,
+    which WatermelonDB applies as upserts. Checkpoints older than the last
+    tombstone compaction get 410 Gone.
+    """
+    until = await current_seq(db, user_id)
+    after = last_pulled_at or 0
+    if after > until:
+        after = 0
+    if after:
+        floor = await db.scalar(select(SyncState.tombstone_floor).where(SyncState.user_id == user_id))
+        if after < (floor or 0):
+            # Deletions since this checkpoint were compacted away
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="Sync checkpoint expired; reset local database and pull again",
+            )
+    return PullCursor(after, until, page_size, fmt)
+
+
+async def _page_end(db: AsyncSession, user_id: int, cursor: PullCursor) -> int:
+    """Return the highest sequence included in the next page.
+
+    Changes and tombstones share the sequence, so a page holds at most
+    ``page_size`` of them combined.
+    """
+    if cursor.page_size is None:
+        return cursor.until
+    window = union_all(
+        select(ChangeLog.seq.label("seq")).where(
+            ChangeLog.user_id == user_id,
+            ChangeLog.seq > cursor.after,
+            ChangeLog.seq <= cursor.until,
+        ),
+        select(Tombstone.seq.label("seq")).where(
+            Tombstone.user_id == user_id,
+            Tombstone.seq > cursor.after,
+            Tombstone.seq <= cursor.until,
+        ),
+    ).subquery()
+    end = await db.scalar(
+        select(window.c.seq)
+        .order_by(window.c.seq)
+        .offset(cursor.page_size - 1)
+        .limit(1)
+    )
+    return cursor.until if end is None else end
+
+
+async def iter_table_changes(
+    db: Union[AsyncSession, AsyncConnection], user_id: int, table: str, after: int, upto: int
+) -> AsyncIterator[List[List[Any]]]:
+    """Yield batches of wire values of one table with change seq in ``(after, upto]``.
+
+    Selects plain columns through Core so rows skip the ORM identity map
+    and attribute instrumentation; each batch is one DB fetch.
+    """
+    model, columns = TABLE_SOURCES[table]
+    convert = ROW_CONVERTERS[table]
+    query = (
+        select(*(_wire(column) for _, column in columns))
+        .join(
+            ChangeLog,
+            and_(
+                ChangeLog.user_id == model.user_id,
+                ChangeLog.table_name == table,
+                ChangeLog.record_id == model.id,
+            ),
+        )
+        .where(ChangeLog.user_id == user_id, ChangeLog.seq > after, ChangeLog.seq <= upto)
+        .order_by(ChangeLog.seq)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        yield [convert(row) for row in rows]
+
+
+async def iter_table_deletions(
+    db: Union[AsyncSession, AsyncConnection], user_id: int, table: str, after: int, upto: int
+) -> AsyncIterator[str]:
+    """Yield ids of records of one table deleted with seq in ``(after, upto]``."""
+    query = (
+        select(Tombstone.record_id)
+        .where(
+            Tombstone.user_id == user_id,
+            Tombstone.table_name == table,
+            Tombstone.seq > after,
+            Tombstone.seq <= upto,
+        )
+        .order_by(Tombstone.seq)
+        .execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    result = await db.stream_scalars(query)
+    async for record_id in result:
+        yield record_id
+
+
+async def _read_table(
+    db: Union[AsyncSession, AsyncConnection], user_id: int, table: str, cursor: PullCursor, upto: int
+) -> Dict[str, Any]:
+    encode = row_encoder(table, cursor.fmt)
+    rows = []
+    async for batch in iter_table_changes(db, user_id, table, cursor.after, upto):
+        rows.extend(map(encode, batch))
+    deleted = []
+    async for record_id in iter_table_deletions(db, user_id, table, cursor.after, upto):
+        deleted.append(record_id)
+    return {"rows": rows, "deleted": deleted}
+
+
+async def collect_page(
+    db: AsyncSession, user_id: int, cursor: PullCursor
+) -> Dict[str, Dict[str, Any]]:
+    """Materialize the next ``cursor.page_size`` changes for the JSON response.
+
+    On Postgres the per-table reads run concurrently on separate pooled
+    connections sharing one exported snapshot, so the page costs one round
+    trip of latency instead of one per table. Other databases read the
+    tables in turn on the request session.
+    """
+    changes = empty_changes(cursor.fmt)
+    upto = await _page_end(db, user_id, cursor)
+    if dialect_name(db) == "postgresql":
+        # Publish a first-pull change log backfill to the other connections
+        # and hand this one back to the pool while they work.
+        await db.commit()
+        reads = await gather_in_snapshot(db.bind, [
+            partial(_read_table, user_id=user_id, table=table, cursor=cursor, upto=upto)
+            for table in SYNC_TABLES
+        ])
+    else:
+        reads = [await _read_table(db, user_id, table, cursor, upto) for table in SYNC_TABLES]
+
+    for table, read in zip(SYNC_TABLES, reads):
+        updated = changes[table]["updated"]
+        (updated["rows"] if cursor.fmt == "columnar" else updated).extend(read["rows"])
+        changes[table]["deleted"].extend(read["deleted"])
+    cursor.after = upto
+    return changes
+
+
+async def stream_page(
+    db: AsyncSession, user_id: int, cursor: PullCursor
+) -> AsyncIterator[bytes]:
+    """Write a pull response as rows come off the DB cursor.
+
+    Produces the same JSON document as the buffered response so clients can
+    parse either one; with no ``page_size`` the whole window is streamed.
+    Fragments are coalesced into ``STREAM_FLUSH_BYTES`` chunks so the
+    compression middleware sees blocks large enough to compress well.
+    """
+    buffer = bytearray()
+    async for fragment in _stream_document(db, user_id, cursor):
+        buffer += fragment
+        if len(buffer) >= STREAM_FLUSH_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def _stream_document(
+    db: AsyncSession, user_id: int, cursor: PullCursor
+) -> AsyncIterator[bytes]:
+    try:
+        upto = await _page_end(db, user_id, cursor)
+        yield b'{"changes":{'
+        for index, table in enumerate(SYNC_TABLES):
+            if index:
+                yield b","
+            encode = row_encoder(table, cursor.fmt)
+            if cursor.fmt == "columnar":
+                header = json.dumps(list(TABLE_COLUMNS[table]))
+                yield (
+                    f'"{table}":{{"created":{{"columns":{header},"rows":[]}},'
+                    f'"updated":{{"columns":{header},"rows":['
+                ).encode()
+            else:
+                yield f'"{table}":{{"created":[],"updated":['.encode()
+            first = True
+            async for batch in iter_table_changes(db, user_id, table, cursor.after, upto):
+                if not first:
+                    yield b","
+                first = False
+                # One dumps call per batch; strip the enclosing brackets
+                yield json.dumps([encode(values) for values in batch], separators=(",", ":"))[1:-1].encode()
+            yield b']},"deleted":[' if cursor.fmt == "columnar" else b'],"deleted":['
+            first = True
+            async for record_id in iter_table_deletions(db, user_id, table, cursor.after, upto):
+                if not first:
+                    yield b","
+                first = False
+                yield json.dumps(record_id).encode()
+            yield b"]}"
+        cursor.after = upto
+        next_cursor = None if cursor.done else cursor.encode()
+        yield f'}},"timestamp":{cursor.until},"cursor":{json.dumps(next_cursor)}}}'.encode()
+    finally:
+        # The request-scoped session has already been handed back by the time
+        # the body is sent, so release the streaming connection explicitly.
+        await db.close()
+
+
+# --- Push -----------------------------------------------------------------
+
+def _invalid(table: str, raw: Any, reason: str) -> HTTPException:
+    record_id = raw.get("id") if isinstance(raw, dict) else None
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f"Invalid {table} record {record_id!r}: {reason}",
+    )
+
+
+def _decimal(value: Any, default: Optional[Decimal] = None) -> Optional[Decimal]:
+    if value is None or value == "":
+        return default
+    return Decimal(str(value))
+
+
+def _datetime(value: Any) -> Optional[datetime]:
+    return from_millis(value) if value else None
+
+
+def _json_value(value: Any) -> Any:
+    # WatermelonDB sends JSON columns as strings
+    return json.loads(value) if isinstance(value, str) and value else value
+
+
+def parse_session(raw: Dict[str, Any], user_id: int, now: datetime) -> Dict[str, Any]:
+    start_time = _datetime(raw.get("start_time"))
+    if start_time is None:
+        raise ValueError("start_time is required")
+    end_time = _datetime(raw.get("end_time"))
+    return {
+        "id": raw["id"],
+        "user_id": user_id,
+        "game_type": raw.get("game_type") or "cash",
+        "stakes": raw.get("stakes") or "",
+        "small_blind": _decimal(raw.get("small_blind"), Decimal("0")),
+        "big_blind": _decimal(raw.get("big_blind"), Decimal("0")),
+        "buy_in": _decimal(raw.get("buy_in"), Decimal("0")),
+        "cash_out": _decimal(raw.get("cash_out"), Decimal("0")),
+        "tips": _decimal(raw.get("tips"), Decimal("0")),
+        "expenses": _decimal(raw.get("expenses"), Decimal("0")),
+        "location": raw.get("location"),
+        "notes": raw.get("notes"),
+        "start_time": start_time,
+        "end_time": end_time,
+        "hours_played": hours_between(start_time, end_time),
+        "created_at": _datetime(raw.get("created_at")) or now,
+        "updated_at": now,
+    }
+
+
+def parse_hand(raw: Dict[str, Any], user_id: int, now: datetime) -> Dict[str, Any]:
+    """A device hand row; ``pot_bb`` is filled in by ``apply_push`` from
+    the session's big blind."""
+    hand = {
+        "id": raw["id"],
+        "user_id": user_id,
+        "session_id": raw.get("session_id") or None,
+        "hero_cards": _json_value(raw.get("cards")),
+        "community_cards": _json_value(raw.get("community_cards")),
+        "actions": _json_value(raw.get("actions")) or [],
+        "pot": _decimal(raw.get("pot"), Decimal("0")),
+        "notes": raw.get("notes"),
+        "created_at": _datetime(raw.get("created_at")) or now,
+        "updated_at": now,
+    }
+    hand.update(search_columns(hand), played_at=hand["created_at"], street=street_reached(hand))
+    return hand
+
+
+def parse_transaction(raw: Dict[str, Any], user_id: int, now: datetime) -> Dict[str, Any]:
+    return {
+        "id": raw["id"],
+        "user_id": user_id,
+        "type": TransactionType(raw.get("type")),
+        "amount": _decimal(raw.get("amount"), Decimal("0")),
+        "description": raw.get("notes"),
+        "created_at": _datetime(raw.get("created_at")) or now,
+        "updated_at": now,
+    }
+
+
+TABLE_PARSERS: Dict[str, Tuple[Any, Callable[[Dict[str, Any], int, datetime], Dict[str, Any]]]] = {
+    "sessions": (Session, parse_session),
+    "hands": (Hand, parse_hand),
+    "transactions": (Transaction, parse_transaction),
+}
+
+# Columns a push may never overwrite on an existing row
+_IMMUTABLE_COLUMNS = {"id", "user_id", "created_at"}
+
+
+def _parse_rows(table: str, records: List[Any], user_id: int, now: datetime) -> List[Dict[str, Any]]:
+    _, parse = TABLE_PARSERS[table]
+    rows: Dict[str, Dict[str, Any]] = {}
+    for raw in records:
+        try:
+            row = parse(raw, user_id, now)
+        except (KeyError, TypeError, ValueError, ArithmeticError) as exc:
+            raise _invalid(table, raw, str(exc) or exc.__class__.__name__)
+        # Last occurrence wins if a record is listed twice
+        rows[row["id"]] = row
+    return list(rows.values())
+
+
+async def _find_conflicts(
+    db: AsyncSession, user_id: int, table: str, record_ids: List[str], last_pulled_at: int
+) -> List[str]:
+    """Return pushed ids that changed on the server after the client's last pull."""
+    conflicts: List[str] = []
+    for chunk in chunked(record_ids):
+        result = await db.execute(
+            select(ChangeLog.record_id).where(
+                ChangeLog.user_id == user_id,
+                ChangeLog.table_name == table,
+                ChangeLog.record_id.in_(chunk),
+                ChangeLog.seq > last_pulled_at,
+            )
+        )
+        conflicts.extend(result.scalars())
+    return conflicts
+
+
+async def _bulk_upsert(db: AsyncSession, model: Any, rows: List[Dict[str, Any]]) -> None:
+    """Write rows with multi-row INSERT ... ON CONFLICT DO UPDATE.
+
+    The conflict update is guarded on ``user_id`` so a push can never
+    overwrite another user's record that happens to share an id.
+    """
+    table = model.__table__
+    for chunk in chunked(rows):
+        stmt = upsert(db, table).values(chunk)
+        set_ = {
+            column: stmt.excluded[column]
+            for column in chunk[0]
+            if column not in _IMMUTABLE_COLUMNS
+        }
+        if model is Hand:
+            # Imported hands keep what only their hand history knows
+            imported = table.c.external_id.is_not(None)
+            set_.update(
+                played_at=func.coalesce(table.c.played_at, stmt.excluded.played_at),
+                street=case((imported, table.c.street), else_=stmt.excluded.street),
+                pot_bb=func.coalesce(stmt.excluded.pot * _ONE / table.c.big_blind, stmt.excluded.pot_bb),
+            )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_=set_,
+            where=table.c.user_id == stmt.excluded.user_id,
+        )
+        await db.execute(stmt)
+
+
+async def _session_big_blinds(
+    db: AsyncSession, user_id: int, hands: List[Dict[str, Any]], sessions: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Big blinds of the sessions ``hands`` belong to, from the push or the database."""
+    big_blinds = {row["id"]: row["big_blind"] for row in sessions}
+    missing = list({row["session_id"] for row in hands if row["session_id"]} - big_blinds.keys())
+    for chunk in chunked(missing):
+        result = await db.execute(
+            select(Session.id, Session.big_blind).where(Session.user_id == user_id, Session.id.in_(chunk))
+        )
+        big_blinds.update(result.tuples())
+    return big_blinds
+
+
+async def apply_push(
+    db: AsyncSession, user_id: int, changes: Dict[str, Dict[str, Any]], last_pulled_at: int
+) -> int:
+    """Apply a WatermelonDB push in the caller's transaction.
+
+    Created and updated records are both upserted (WatermelonDB may resend
+    a created record after a failed push) and may arrive as row dicts or
+    columnar blocks. Each table costs one statement
+    per chunk rather than one per row. Raises 409 if any pushed record
+    changed on the server since ``last_pulled_at`` so the client pulls first.
+    Returns the user's new change sequence.
+    """
+    now = datetime.now(timezone.utc)
+    upserts: Dict[str, List[Dict[str, Any]]] = {}
+    deletes: Dict[str, List[str]] = {}
+    for table in SYNC_TABLES:
+        table_changes = changes.get(table) or {}
+        upserts[table] = _parse_rows(
+            table,
+            expand_records(table_changes.get("created")) + expand_records(table_changes.get("updated")),
+            user_id,
+            now,
+        )
+        deletes[table] = list(dict.fromkeys(str(record_id) for record_id in table_changes.get("deleted", [])))
+
+    seq = await current_seq(db, user_id)
+    # Wall-clock timestamps from pre-sequence clients can't be compared
+    if 0 < last_pulled_at <= seq:
+        conflicts = {}
+        for table in SYNC_TABLES:
+            record_ids = [row["id"] for row in upserts[table]] + deletes[table]
+            found = await _find_conflicts(db, user_id, table, record_ids, last_pulled_at)
+            if found:
+                conflicts[table] = found
+        if conflicts:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "Records changed since last pull", "conflicts": conflicts},
+            )
+
+    if upserts["hands"]:
+        big_blinds = await _session_big_blinds(db, user_id, upserts["hands"], upserts["sessions"])
+        for row in upserts["hands"]:
+            if row["session_id"] in big_blinds:
+                row["pot_bb"] = pot_in_big_blinds(row["pot"], big_blinds[row["session_id"]])
+
+    # Parents before children on write, children before parents on delete
+    for table in SYNC_TABLES:
+        if not upserts[table]:
+            continue
+        if table in CONTRIBUTING_COLUMNS:
+            async with tracking(db, user_id, table, [row["id"] for row in upserts[table]]):
+                await _bulk_upsert(db, TABLE_PARSERS[table][0], upserts[table])
+        else:
+            await _bulk_upsert(db, TABLE_PARSERS[table][0], upserts[table])
+    if upserts["sessions"]:
+        await reprice_session_hands(db, user_id, {row["id"]: row["big_blind"] for row in upserts["sessions"]})
+    if upserts["hands"]:
+        await refresh_hand_stats(db, user_id, [row["id"] for row in upserts["hands"]])
+    for table in SYNC_TABLES:
+        if upserts[table]:
+            seq = await record_changes(db, user_id, table, [row["id"] for row in upserts[table]])
+    for table in reversed(SYNC_TABLES):
+        if deletes[table]:
+            seq = await delete_records(db, user_id, table, deletes[table])
+    return seq
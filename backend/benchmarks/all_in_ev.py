@@ -0,0 +1,116 @@
+"""All-in EV annotation of one session.
+
+WHY: /sessions/{id}/all-in-ev should annotate a 500-hand session well under
+a second on four cores, and answer from the cache after that. This stores
+a session of synthetic hands, a share of them all-in on each street with
+the hands shown down, and times a cold and a cached annotation. Run from
+``backend/``:
+
+    python -m benchmarks.all_in_ev --hands 500 --all-in 0.2 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.base import Base
+from app.models import Hand, Session, User
+from app.services.all_in_ev import session_all_in_ev
+from app.services.equity import get_pool, shutdown_pool
+from benchmarks.synthetic import RANKS, SUITS
+
+STREETS = ("preflop", "flop", "turn")
+
+
+def all_in_hand(rng: random.Random, all_in: bool) -> Dict[str, Any]:
+    """A hand's stored columns: heads-up or three-way, all-in or folded out."""
+    deck = rng.sample([rank + suit for rank in RANKS for suit in SUITS], 11)
+    players = ["Hero", "Villain1", "Villain2"][:rng.choice((2, 2, 3))]
+    street = rng.choice(STREETS)
+    seats = [
+        {"seat": index + 1, "player": name, "stack": 200.0, "hero": name == "Hero",
+         "cards": deck[5 + 2 * index:7 + 2 * index] if all_in or name == "Hero" else None, "won": 0.0}
+        for index, name in enumerate(players)
+    ]
+    actions = [
+        {"player": players[0], "action": "post", "blind": "small_blind", "amount": 1.0, "street": "preflop", "all_in": False},
+        {"player": players[1], "action": "post", "blind": "big_blind", "amount": 2.0, "street": "preflop", "all_in": False},
+    ]
+    if all_in:
+        actions.append({"player": "Hero", "action": "raise", "amount": 200.0, "street": street, "all_in": True})
+        actions += [
+            {"player": name, "action": "call", "amount": 198.0, "street": street, "all_in": True} for name in players[1:]
+        ]
+        seats[rng.randrange(len(players))]["won"] = 200.0 * len(players)
+    else:
+        actions += [{"player": name, "action": "fold", "street": "preflop", "all_in": False} for name in players[1:]]
+    return {
+        "hero_cards": seats[0]["cards"],
+        "community_cards": deck[:5] if all_in else [],
+        "seats": seats,
+        "actions": actions,
+        "street": "showdown" if all_in else "preflop",
+    }
+
+
+async def main(hands: int, all_in_share: float, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as scratch:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{scratch}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as db:
+            user = User(email="ev-bench@example.com", hashed_password="-")
+            db.add(user)
+            await db.flush()
+            session = Session(
+                id=str(uuid.uuid4()), user_id=user.id, stakes="1/2", small_blind=1, big_blind=2, buy_in=200, cash_out=0,
+                start_time=datetime(2024, 1, 1),
+            )
+            db.add(session)
+            db.add_all(
+                Hand(user_id=user.id, session_id=session.id, **all_in_hand(rng, rng.random() < all_in_share))
+                for _ in range(hands)
+            )
+            await db.commit()
+
+            # Start the worker processes outside the timing
+            get_pool().submit(int).result()
+            began = time.perf_counter()
+            cold = await session_all_in_ev(db, user.id, session.id)
+            await db.commit()
+            cold_seconds = time.perf_counter() - began
+            began = time.perf_counter()
+            warm = await session_all_in_ev(db, user.id, session.id)
+            warm_seconds = time.perf_counter() - began
+        shutdown_pool()
+        await engine.dispose()
+
+    print(json.dumps({
+        "hands": hands,
+        "all_in_hands": cold["all_in_hands"],
+        "workers": settings.EQUITY_WORKERS or "cpu_count",
+        "cold_seconds": round(cold_seconds, 3),
+        "cached_seconds": round(warm_seconds, 3),
+        "recomputed_when_cached": warm["computed"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=500)
+    parser.add_argument("--all-in", type=float, default=0.2, help="Share of hands all-in before the river")
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    settings.EQUITY_WORKERS = args.workers
+    asyncio.run(main(args.hands, args.all_in, args.seed))
@@ -0,0 +1,145 @@
+"""Hand-history import throughput.
+
+WHY: Importing a 50k-hand PokerStars export should take seconds with
+memory that doesn't grow with the file. This writes a synthetic export,
+uploads it through the real ASGI app into a scratch database and reports
+wall time, hands/sec, the longest event-loop stall and peak RSS. Run from
+``backend/``:
+
+    python -m benchmarks.hand_import --hands 50000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.models import User
+from app.services.hand_import import shutdown_pool
+from benchmarks.sync_load import peak_rss_mb
+from benchmarks.synthetic import RANKS, SUITS
+
+PLAYERS = ["Hero", "fish_42", "NitNit", "LAGgy", "reg_one", "Donk99"]
+
+
+def pokerstars_hand(rng: random.Random, number: int, played_at: datetime) -> str:
+    """A six-handed 1/2 hand that goes to a random street."""
+    deck = rng.sample([rank + suit for rank in RANKS for suit in SUITS], 17)
+    button = rng.randint(1, 6)
+    order = [(button + offset) % 6 + 1 for offset in range(6)]
+    names = {seat: PLAYERS[seat - 1] for seat in order}
+    lines = [
+        f"PokerStars Hand #{number}: Hold'em No Limit ($1/$2 USD) - {played_at:%Y/%m/%d %H:%M:%S} ET",
+        f"Table 'Bench' 6-max Seat #{button} is the button",
+    ]
+    lines += [f"Seat {seat}: {names[seat]} (${rng.randint(100, 400)} in chips)" for seat in range(1, 7)]
+    lines += [f"{names[order[0]]}: posts small blind $1", f"{names[order[1]]}: posts big blind $2", "*** HOLE CARDS ***"]
+    lines.append(f"Dealt to Hero [{deck[0]} {deck[1]}]")
+    active: List[str] = [names[seat] for seat in order[2:] + order[:2]]
+    opener = rng.choice(active[:4])
+    for name in active:
+        if name == opener:
+            lines.append(f"{name}: raises $4 to $6")
+        elif name in (names[order[1]], active[-1]) or rng.random() < 0.2:
+            lines.append(f"{name}: calls $6")
+        else:
+            lines.append(f"{name}: folds")
+    pot = 6 * len([line for line in lines if ": calls" in line or ": raises" in line]) + 1
+    streets = rng.randint(0, 3)
+    board = deck[2:7]
+    for index, street in enumerate(("FLOP", "TURN", "RIVER")[:streets]):
+        shown = 3 + index
+        cards = f"[{' '.join(board[:3])}]" if index == 0 else f"[{' '.join(board[:shown - 1])}] [{board[shown - 1]}]"
+        lines.append(f"*** {street} *** {cards}")
+        lines.append(f"{opener}: bets $10")
+        lines.append("Hero: calls $10")
+        pot += 20
+    lines.append(f"{opener} collected ${pot - 1} from pot")
+    lines += ["*** SUMMARY ***", f"Total pot ${pot} | Rake $1"]
+    if streets:
+        lines.append(f"Board [{' '.join(board[:2 + streets])}]")
+    lines.append(f"Seat {order[0]}: {opener} collected (${pot - 1})")
+    return "\n".join(lines) + "\n\n\n"
+
+
+async def main(hands: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as scratch:
+        export = Path(scratch) / "export.txt"
+        start = datetime(2024, 1, 1)
+        with export.open("w") as out:
+            for index in range(hands):
+                out.write(pokerstars_hand(rng, 200000000000 + index, start + timedelta(seconds=40 * index)))
+
+        engine = create_async_engine(f"sqlite+aiosqlite:///{scratch}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as db:
+            user = User(email="import-bench@example.com", hashed_password="-")
+            db.add(user)
+            await db.commit()
+            user_id = user.id
+
+        async def override_get_db():
+            async with factory() as db:
+                yield db
+
+        # Longest gap between event-loop ticks while the import runs
+        stall = 0.0
+
+        async def watch() -> None:
+            nonlocal stall
+            while True:
+                tick = time.perf_counter()
+                await asyncio.sleep(0.01)
+                stall = max(stall, time.perf_counter() - tick - 0.01)
+
+        app.dependency_overrides[get_db] = override_get_db
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+        watcher = asyncio.create_task(watch())
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+                began = time.perf_counter()
+                response = await client.post("/api/v1/hands/import", headers=headers, content=export.read_bytes())
+                elapsed = time.perf_counter() - began
+        finally:
+            watcher.cancel()
+            app.dependency_overrides.pop(get_db, None)
+            shutdown_pool()
+            await engine.dispose()
+
+        final = json.loads(response.text.splitlines()[-1])
+        print(json.dumps({
+            "hands": hands,
+            "file_mb": round(export.stat().st_size / 2 ** 20, 1),
+            "workers": settings.HAND_IMPORT_WORKERS or "cpu_count",
+            "seconds": round(elapsed, 2),
+            "hands_per_second": round(hands / elapsed),
+            "imported": final["imported"],
+            "failed": final["failed"],
+            "max_loop_stall_ms": round(stall * 1000, 1),
+            "peak_rss_mb": peak_rss_mb(),
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    settings.HAND_IMPORT_WORKERS = args.workers
+    asyncio.run(main(args.hands, args.seed))
@@ -0,0 +1,90 @@
+"""Hand search latency over a large account.
+
+WHY: /hands/search should answer in milliseconds over 500k hands. This
+seeds one account of synthetic hands (search columns filled as the write
+paths fill them), then times the first page and a deep page of typical
+filter combinations. Run from ``backend/``:
+
+    python -m benchmarks.hand_search --hands 500000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from typing import Any, Dict
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import Hand
+from app.services.hand_search import search_query
+from app.services.pagination import keyset_page
+from benchmarks.synthetic import Volumes, seed_account
+
+QUERIES: Dict[str, Dict[str, Any]] = {
+    "all": {},
+    "aces": {"hole": ["AA"]},
+    "aces_paired_board_over_100bb": {"hole": ["AA"], "texture": ["paired"], "min_pot_bb": 100},
+    "ace_king_river": {"hole": ["AK"], "street": "river"},
+    "monotone_connected": {"texture": ["monotone", "connected"]},
+    "pots_over_300bb": {"min_pot_bb": 300},
+}
+
+
+async def _time_page(db: AsyncSession, user_id: int, filters: Dict[str, Any], pages: int, repeat: int) -> Dict[str, Any]:
+    """Median milliseconds of the first page and of page ``pages``."""
+    first, deep, found = [], [], 0
+    for _ in range(repeat):
+        cursor = None
+        for page in range(pages):
+            began = time.perf_counter()
+            rows, cursor = await keyset_page(db, search_query(user_id, **filters), Hand.played_at, Hand.id, cursor, 50)
+            elapsed = (time.perf_counter() - began) * 1000
+            db.expunge_all()
+            if page == 0:
+                first.append(elapsed)
+                found = len(rows)
+            if page == pages - 1 or cursor is None:
+                deep.append(elapsed)
+                break
+    return {
+        "first_page_ms": round(statistics.median(first), 2),
+        "deep_page_ms": round(statistics.median(deep), 2),
+        "first_page_rows": found,
+    }
+
+
+async def main(hands: int, pages: int, repeat: int, seed: int) -> None:
+    with tempfile.TemporaryDirectory() as scratch:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{scratch}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as db:
+            began = time.perf_counter()
+            user = await seed_account(db, Volumes(sessions=max(1, hands // 100), hands=hands, transactions=0), seed)
+            seeded = time.perf_counter() - began
+            # Planner statistics, as autovacuum keeps them in Postgres
+            await db.execute(text("ANALYZE"))
+            results = {name: await _time_page(db, user.id, filters, pages, repeat) for name, filters in QUERIES.items()}
+        await engine.dispose()
+
+    print(json.dumps({
+        "hands": hands,
+        "seed_seconds": round(seeded, 1),
+        "deep_page": pages,
+        "queries": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hands", type=int, default=500_000)
+    parser.add_argument("--pages", type=int, default=20, help="Page number timed as the deep page")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.hands, args.pages, args.repeat, args.seed))
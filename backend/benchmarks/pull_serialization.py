@@ -0,0 +1,118 @@
+"""Sync pull serialization: ORM instances vs Core rows.
+
+WHY: /sync/pull is the hottest endpoint; this measures the per-row CPU cost
+of turning stored records into the wire document, against the ORM path it
+replaced. Run from ``backend/``:
+
+    python -m benchmarks.pull_serialization --rows 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.models import ChangeLog, Hand, User
+from app.services.changelog import current_seq
+from app.services.sync import iter_table_changes, row_encoder
+
+
+def _legacy_values(hand: Hand):
+    # What the pull path did before: one ORM instance per row
+    millis = lambda value: int(value.timestamp() * 1000) if value else None
+    text = lambda value: json.dumps(value) if value is not None else None
+    return (
+        hand.id, hand.session_id, text(hand.hero_cards), text(hand.community_cards), text(hand.actions),
+        float(hand.pot) if hand.pot is not None else None, hand.notes,
+        millis(hand.created_at), millis(hand.updated_at),
+    )
+
+
+async def _seed(factory, rows: int) -> int:
+    async with factory() as db:
+        user = User(email="bench@example.com", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        start = datetime(2024, 1, 1)
+        db.add_all(
+            Hand(
+                user_id=user.id,
+                pot=Decimal("123.45"),
+                hero_cards=["As", "Kd"],
+                community_cards=["2c", "7h", "Td", "Js", "Qc"],
+                actions=[{"player": "hero", "action": "raise", "amount": 6}],
+                notes="bench",
+                created_at=start + timedelta(seconds=i),
+                updated_at=start + timedelta(seconds=i),
+            )
+            for i in range(rows)
+        )
+        await db.commit()
+        await current_seq(db, user.id)
+        await db.commit()
+        return user.id
+
+
+async def _legacy(db, user_id: int, upto: int) -> bytes:
+    encode = row_encoder("hands", "rows")
+    query = (
+        select(Hand)
+        .join(ChangeLog, and_(
+            ChangeLog.user_id == Hand.user_id,
+            ChangeLog.table_name == "hands",
+            ChangeLog.record_id == Hand.id,
+        ))
+        .where(ChangeLog.user_id == user_id, ChangeLog.seq > 0, ChangeLog.seq <= upto)
+        .order_by(ChangeLog.seq)
+        .execution_options(yield_per=500)
+    )
+    rows = []
+    result = await db.stream_scalars(query)
+    async for hand in result:
+        rows.append(encode(list(_legacy_values(hand))))
+        db.expunge(hand)
+    return json.dumps(rows).encode()
+
+
+async def _core(db, user_id: int, upto: int) -> bytes:
+    encode = row_encoder("hands", "rows")
+    rows = []
+    async for batch in iter_table_changes(db, user_id, "hands", 0, upto):
+        rows.extend(map(encode, batch))
+    return json.dumps(rows).encode()
+
+
+async def main(rows: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_id = await _seed(factory, rows)
+
+    results = {}
+    for name, path in (("orm", _legacy), ("core", _core)):
+        best = None
+        for _ in range(repeat):
+            async with factory() as db:
+                upto = await current_seq(db, user_id)
+                began = time.perf_counter()
+                body = await path(db, user_id, upto)
+                elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = {"seconds": round(best, 4), "us_per_row": round(best / rows * 1e6, 2), "bytes": len(body)}
+    results["speedup"] = round(results["orm"]["seconds"] / results["core"]["seconds"], 2)
+    print(json.dumps({"rows": rows, **results}, indent=2))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
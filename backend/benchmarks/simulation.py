@@ -0,0 +1,43 @@
+"""Monte Carlo bankroll simulation throughput.
+
+WHY: /stats/simulate has to answer 100k trajectories x 50k hands in a couple
+of seconds; this times the process-pool path at a given worker count. Run
+from ``backend/``:
+
+    python -m benchmarks.simulation --trajectories 100000 --hands 50000 --workers 4
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+from app.services.simulation import shutdown_pool, simulate
+
+
+async def main(trajectories: int, hands: int, repeat: int) -> None:
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        outcome = await simulate(10.0, 180.0, 3000.0, hands, trajectories, seed=1)
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    shutdown_pool()
+    print(json.dumps({
+        "trajectories": trajectories,
+        "hands": hands,
+        "workers": settings.SIMULATION_WORKERS or "cpu_count",
+        "seconds": round(best, 3),
+        "probability_of_ruin": outcome["probability_of_ruin"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trajectories", type=int, default=100000)
+    parser.add_argument("--hands", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=0, help="0 = one per CPU")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    settings.SIMULATION_WORKERS = args.workers
+    asyncio.run(main(args.trajectories, args.hands, args.repeat))
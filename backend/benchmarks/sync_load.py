@@ -0,0 +1,298 @@
+"""Sync load benchmark against a synthetic account.
+
+WHY: Status-code tests say nothing about how sync behaves for a player with
+years of history. This seeds one account, drives ``/sync/pull`` (full,
+streamed and incremental) and ``/sync/push`` through the real ASGI app and
+reports latency percentiles, rows/sec and memory as JSON. Each scenario
+runs in its own process, so its peak RSS (and the growth over the RSS it
+started timing from) is its own rather than the high-water mark of every
+scenario before it; the in-process client's copy of each response is
+still counted. Saved results double as baselines: ``--compare`` fails
+when a scenario got slower than the allowed tolerance. Run from
+``backend/``:
+
+    python -m benchmarks.sync_load --output benchmarks/baselines/sqlite.json
+    python -m benchmarks.sync_load --database postgresql+asyncpg://localhost/poker_bench \\
+        --compare benchmarks/baselines/postgres.json
+
+Postgres runs use their own freshly created user and delete it afterwards.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.security import create_access_token
+from app.db.base import Base
+from app.db.session import get_db
+from app.main import app
+from app.models import User
+from benchmarks.synthetic import Volumes, seed_account, session_row
+
+PULL = "/api/v1/sync/pull"
+PUSH = "/api/v1/sync/push"
+SCENARIOS = ("pull_full_paged", "pull_full_columnar", "pull_full_stream", "push_100_sessions", "pull_incremental")
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(durations: List[float], rows: List[int], rss_before: float) -> Dict[str, Any]:
+    peak = peak_rss_mb()
+    return {
+        "iterations": len(durations),
+        "p50_ms": round(percentile(durations, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(durations, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(durations, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(durations) * 1000, 2),
+        "rows_per_sec": round(sum(rows) / sum(durations), 1) if sum(durations) else None,
+        "peak_rss_mb": peak,
+        "rss_growth_mb": round(peak - rss_before, 1),
+    }
+
+
+def _count_rows(changes: Dict[str, Any]) -> int:
+    total = 0
+    for table in changes.values():
+        updated = table["updated"]
+        total += len(updated["rows"] if isinstance(updated, dict) else updated) + len(table["deleted"])
+    return total
+
+
+async def full_pull(client: AsyncClient, headers: Dict[str, str], body: Dict[str, Any]) -> int:
+    """Pull everything, following the cursor; return rows received."""
+    response = await client.post(PULL, json=body, headers=headers)
+    data = response.json()
+    rows = _count_rows(data["changes"])
+    while data.get("cursor"):
+        response = await client.post(PULL, json={"cursor": data["cursor"]}, headers=headers)
+        data = response.json()
+        rows += _count_rows(data["changes"])
+    return rows
+
+
+async def run_scenario(iterations: int, step: Callable[[], Awaitable[int]]) -> Dict[str, Any]:
+    rss_before = peak_rss_mb()
+    durations, rows = [], []
+    for _ in range(iterations):
+        began = time.perf_counter()
+        rows.append(await step())
+        durations.append(time.perf_counter() - began)
+    return summarize(durations, rows, rss_before)
+
+
+async def scenario(database_url: str, user_id: int, name: str, iterations: int, seed: int) -> Dict[str, Any]:
+    """Run one scenario against an already seeded account (the child-process side)."""
+    engine = create_async_engine(database_url)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with factory() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    app.dependency_overrides[get_db] = override_get_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+    rng = random.Random(seed)
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            state = {"timestamp": (await client.post(PULL, json={"page_size": 1}, headers=headers)).json()["timestamp"]}
+
+            async def push_batch() -> int:
+                start = datetime.now(timezone.utc)
+                records = [session_row(rng, user_id, start) for _ in range(100)]
+                payload = {
+                    "changes": {
+                        "sessions": {"created": [_wire_session(record) for record in records], "updated": [], "deleted": []},
+                        "hands": {"created": [], "updated": [], "deleted": []},
+                        "transactions": {"created": [], "updated": [], "deleted": []},
+                    },
+                    "last_pulled_at": state["timestamp"],
+                    "idempotency_key": uuid.uuid4().hex,
+                }
+                response = await client.post(PUSH, json=payload, headers=headers)
+                response.raise_for_status()
+                return len(records)
+
+            async def incremental_pull() -> int:
+                # Time only the pull that follows a small push
+                previous = state["timestamp"]
+                await push_batch()
+                began = time.perf_counter()
+                response = await client.post(PULL, json={"last_pulled_at": previous}, headers=headers)
+                data = response.json()
+                state["timestamp"] = data["timestamp"]
+                state["pull_seconds"] = time.perf_counter() - began
+                return _count_rows(data["changes"])
+
+            if name == "pull_full_paged":
+                return await run_scenario(iterations, lambda: full_pull(client, headers, {}))
+            if name == "pull_full_columnar":
+                return await run_scenario(iterations, lambda: full_pull(client, headers, {"format": "columnar"}))
+            if name == "pull_full_stream":
+                return await run_scenario(iterations, lambda: full_pull(client, headers, {"stream": True}))
+            if name == "push_100_sessions":
+                return await run_scenario(iterations, push_batch)
+
+            rss_before = peak_rss_mb()
+            durations, rows = [], []
+            for _ in range(iterations):
+                rows.append(await incremental_pull())
+                durations.append(state["pull_seconds"])
+            return summarize(durations, rows, rss_before)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        await engine.dispose()
+
+
+def run_in_child(database_url: str, user_id: int, name: str, iterations: int, seed: int) -> Dict[str, Any]:
+    """Run ``name`` in a fresh interpreter and return its summary."""
+    command = [
+        sys.executable, "-m", "benchmarks.sync_load",
+        "--database", database_url, "--scenario", name, "--user-id", str(user_id),
+        "--iterations", str(iterations), "--seed", str(seed),
+    ]
+    completed = subprocess.run(
+        command, cwd=Path(__file__).resolve().parents[1], check=True, capture_output=True, text=True
+    )
+    return json.loads(completed.stdout)
+
+
+async def seed_user(database_url: str, volumes: Volumes, seed: int) -> int:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        user = await seed_account(db, volumes, seed=seed)
+    await engine.dispose()
+    return user.id
+
+
+async def drop_user(database_url: str, user_id: int) -> None:
+    engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.execute(delete(User).where(User.id == user_id))
+    await engine.dispose()
+
+
+def benchmark(database_url: str, volumes: Volumes, iterations: int, seed: int) -> Dict[str, Any]:
+    dialect = make_url(database_url).get_backend_name()
+    began = time.perf_counter()
+    user_id = asyncio.run(seed_user(database_url, volumes, seed))
+    seed_seconds = time.perf_counter() - began
+
+    scenarios: Dict[str, Any] = {}
+    try:
+        for name in SCENARIOS:
+            scenarios[name] = run_in_child(database_url, user_id, name, iterations, seed)
+    finally:
+        if dialect != "sqlite":
+            asyncio.run(drop_user(database_url, user_id))
+
+    return {
+        "meta": {
+            "dialect": dialect,
+            "volumes": volumes.__dict__,
+            "iterations": iterations,
+            "seed_seconds": round(seed_seconds, 1),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "scenarios": scenarios,
+    }
+
+
+def _wire_session(record: Dict[str, Any]) -> Dict[str, Any]:
+    millis = lambda value: int(value.timestamp() * 1000)
+    return {
+        **{key: float(value) for key, value in record.items() if key in ("small_blind", "big_blind", "buy_in", "cash_out", "tips", "expenses")},
+        "id": record["id"],
+        "game_type": record["game_type"],
+        "stakes": record["stakes"],
+        "location": record["location"],
+        "start_time": millis(record["start_time"]),
+        "end_time": millis(record["end_time"]),
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return the scenarios whose p50 regressed beyond ``tolerance``."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous and current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_ms']}ms -> {current['p50_ms']}ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", help="SQLAlchemy async URL; defaults to a temporary SQLite file")
+    parser.add_argument("--sessions", type=int, default=Volumes.sessions)
+    parser.add_argument("--hands", type=int, default=Volumes.hands)
+    parser.add_argument("--transactions", type=int, default=Volumes.transactions)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write results JSON here (e.g. a new baseline)")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown (0.25 = 25%%)")
+    # Used by the parent to run one scenario per process
+    parser.add_argument("--scenario", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--user-id", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        summary = asyncio.run(scenario(args.database, args.user_id, args.scenario, args.iterations, args.seed))
+        print(json.dumps(summary))
+        return 0
+
+    volumes = Volumes(args.sessions, args.hands, args.transactions)
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        results = benchmark(database, volumes, args.iterations, args.seed)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Synthetic poker accounts for benchmarks.
+
+WHY: Performance numbers only mean something against realistic volumes;
+these helpers bulk-load a user with sessions, hands (with multi-street
+``actions`` JSON) and transactions straight through Core inserts.
+"""
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import get_password_hash
+from app.db.upsert import MAX_BIND_PARAMS, chunked
+from app.models import Hand, Session, Transaction, User
+from app.models.transaction import TransactionType
+from app.services.changelog import current_seq
+from app.services.hand_search import search_columns
+
+STAKES = [("1/2", 1, 2), ("1/3", 1, 3), ("2/5", 2, 5), ("5/10", 5, 10)]
+LOCATIONS = ["Bellagio", "Aria", "Wynn", "Commerce", "Home game", "Online"]
+RANKS = "23456789TJQKA"
+SUITS = "cdhs"
+STREETS = ("preflop", "flop", "turn", "river")
+
+
+@dataclass
+class Volumes:
+    sessions: int = 10_000
+    hands: int = 200_000
+    transactions: int = 1_000
+
+
+def _cards(rng: random.Random, count: int) -> List[str]:
+    deck = [rank + suit for rank in RANKS for suit in SUITS]
+    return rng.sample(deck, count)
+
+
+def synthetic_actions(rng: random.Random, big_blind: float) -> List[Dict[str, Any]]:
+    """A plausible action sequence: 2-4 streets, a few decisions each."""
+    actions = []
+    pot = big_blind * 1.5
+    for street in STREETS[: rng.randint(1, 4)]:
+        for player in ("hero", f"villain{rng.randint(1, 8)}"):
+            kind = rng.choice(("check", "call", "bet", "raise", "fold")) if street != "preflop" else rng.choice(("call", "raise", "fold"))
+            amount = round(pot * rng.uniform(0.3, 1.0), 2) if kind in ("bet", "raise", "call") else 0
+            pot += amount
+            actions.append({"street": street, "player": player, "action": kind, "amount": amount})
+    return actions
+
+
+def session_row(rng: random.Random, user_id: int, start: datetime) -> Dict[str, Any]:
+    stakes, small_blind, big_blind = rng.choice(STAKES)
+    buy_in = big_blind * 100
+    hours = rng.uniform(1, 8)
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "game_type": "cash",
+        "stakes": stakes,
+        "small_blind": Decimal(small_blind),
+        "big_blind": Decimal(big_blind),
+        "buy_in": Decimal(buy_in),
+        "cash_out": Decimal(str(round(max(0.0, rng.gauss(buy_in * 1.05, buy_in * 0.8)), 2))),
+        "tips": Decimal(rng.choice((0, 5, 10, 20))),
+        "expenses": Decimal(rng.choice((0, 0, 15, 40))),
+        "location": rng.choice(LOCATIONS),
+        "start_time": start,
+        "end_time": start + timedelta(hours=hours),
+        "hours_played": Decimal(str(round(hours, 2))),
+        "created_at": start,
+        "updated_at": start,
+    }
+
+
+def hand_row(rng: random.Random, user_id: int, session: Dict[str, Any]) -> Dict[str, Any]:
+    at = session["start_time"] + timedelta(minutes=rng.uniform(0, 240))
+    actions = synthetic_actions(rng, float(session["big_blind"]))
+    hand = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "session_id": session["id"],
+        "pot": Decimal(str(round(sum(action["amount"] for action in actions), 2))),
+        "street": actions[-1]["street"],
+        "actions": actions,
+        "hero_cards": _cards(rng, 2),
+        "community_cards": _cards(rng, 5),
+        "played_at": at,
+        "created_at": at,
+        "updated_at": at,
+    }
+    hand.update(search_columns(hand, session["big_blind"]))
+    return hand
+
+
+def transaction_row(rng: random.Random, user_id: int, at: datetime) -> Dict[str, Any]:
+    kind = rng.choice((TransactionType.DEPOSIT, TransactionType.WITHDRAWAL))
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "type": kind,
+        "amount": Decimal(rng.choice((200, 500, 1000, 2500))),
+        "description": kind.value,
+        "created_at": at,
+        "updated_at": at,
+    }
+
+
+async def _insert(db: AsyncSession, model: Any, rows: List[Dict[str, Any]]) -> None:
+    for chunk in chunked(rows, MAX_BIND_PARAMS):
+        await db.execute(insert(model), chunk)
+
+
+async def seed_account(db: AsyncSession, volumes: Volumes, seed: int = 0, email: str = None) -> User:
+    """Create one user holding ``volumes`` of data and commit it."""
+    rng = random.Random(seed)
+    user = User(
+        email=email or f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        hashed_password=get_password_hash("benchmark"),
+    )
+    db.add(user)
+    await db.flush()
+
+    start = datetime(2020, 1, 1)
+    sessions = [
+        session_row(rng, user.id, start + timedelta(hours=20 * index))
+        for index in range(volumes.sessions)
+    ]
+    await _insert(db, Session, sessions)
+
+    batch = []
+    for _ in range(volumes.hands):
+        batch.append(hand_row(rng, user.id, rng.choice(sessions)))
+        if len(batch) == 10_000:
+            await _insert(db, Hand, batch)
+            batch = []
+    if batch:
+        await _insert(db, Hand, batch)
+
+    await _insert(db, Transaction, [
+        transaction_row(rng, user.id, start + timedelta(days=rng.uniform(0, 2000)))
+        for _ in range(volumes.transactions)
+    ])
+    # Build the change log now so the first benchmarked pull isn't a backfill
+    await current_seq(db, user.id)
+    await db.commit()
+    return user
@@ -63,5 +63,5 @@ async def test_user(test_db):
 @pytest_asyncio.fixture
 async def auth_headers(test_user):
     """Create authorization headers."""
-    token = create_access_token({"sub": test_user.id})
+    token = create_access_token({"sub": str(test_user.id)})
     return {"Authorization": f"Bearer {token}"}
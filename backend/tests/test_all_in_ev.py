@@ -0,0 +1,66 @@
+"""All-in EV annotation tests."""
+import pytest
+from httpx import AsyncClient
+
+from app.services.all_in_ev import annotate, digest
+from app.services.equity import equity
+from app.services.hand_history import parse_hand, split_hands
+from tests.test_hands import HISTORY
+
+
+def _hands():
+    return [parse_hand(block) for block in split_hands(HISTORY.splitlines())]
+
+
+def test_flop_all_in():
+    hand = _hands()[0]
+    found = annotate(hand)
+    # AK on A-7-2 against a set of sevens, 167 in the pot of which 160 was paid out
+    share = equity(["Ah", "Kd"], [["7c", "7h"]], ["Ac", "7d", "2s"])["players"][0]["equity"]
+    assert found["all_in"] and found["street"] == "flop" and found["digest"] == digest(hand)
+    assert found["equity"] == pytest.approx(share) and 0.01 < share < 0.05
+    assert found["pot"] == 167 and found["actual"] == -80
+    assert found["expected"] == pytest.approx(160 * share - 80)
+
+
+def test_preflop_all_in_with_side_pot():
+    found = annotate(_hands()[1])
+    # Short's 20 makes a 60 main pot for three; the 160 side pot is Hero vs Mid
+    assert found["street"] == "preflop" and found["pot"] == 220 and found["actual"] == 58
+    main = equity(["Qs", "Qh"], [["Jc", "Jd"], ["Ac", "2d"]])["players"][0]["equity"]
+    side = equity(["Qs", "Qh"], [["Jc", "Jd"]])["players"][0]["equity"]
+    assert found["equity"] == pytest.approx(main, abs=0.02)
+    assert found["expected"] == pytest.approx((60 * main + 160 * side) * 218 / 220 - 100, abs=3)
+
+
+def test_no_all_in():
+    hand = _hands()[0]
+    hand["actions"] = [action for action in hand["actions"] if not action["all_in"]]
+    assert annotate(hand) == {"digest": digest(hand), "all_in": False}
+    # Without a showdown the other hands aren't known
+    assert not annotate(_hands()[1] | {"street": "river"})["all_in"]
+
+
+@pytest.mark.asyncio
+async def test_session_all_in_ev(client: AsyncClient, auth_headers):
+    created = await client.post("/api/v1/sessions/", headers=auth_headers, json={
+        "start_time": "2025-01-31T21:00:00", "stakes": "1/2", "small_blind": "1.00", "big_blind": "2.00",
+        "buy_in": "500.00", "cash_out": "478.00",
+    })
+    session_id = created.json()["id"]
+    await client.post("/api/v1/hands/import", headers=auth_headers, content=HISTORY.encode(), params={"session_id": session_id})
+
+    response = await client.get(f"/api/v1/sessions/{session_id}/all-in-ev", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["hands"], data["computed"], data["all_in_hands"]) == (2, 2, 2)
+    assert data["actual"] == -22
+    assert data["luck"] == pytest.approx(data["actual"] - data["expected"])
+    assert data["all_in_adjusted_profit"] == pytest.approx(-22 - data["luck"])
+
+    # Cached: nothing is recomputed and the answer is the same
+    again = (await client.get(f"/api/v1/sessions/{session_id}/all-in-ev", headers=auth_headers)).json()
+    assert again["computed"] == 0 and again["expected"] == data["expected"]
+
+    missing = await client.get("/api/v1/sessions/nope/all-in-ev", headers=auth_headers)
+    assert missing.status_code == 404
@@ -0,0 +1,107 @@
+"""Tests for the hand evaluator and equity engine."""
+import itertools
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.models.hand import Hand
+from app.services.equity import combinations, equity
+from app.services.evaluator import CATEGORIES, CATEGORY_STARTS, category, evaluate, evaluate_hand, parse_cards, split_cards
+
+
+def test_five_card_category_counts():
+    """Every five-card hand lands in its category as often as it should."""
+    found = evaluate(combinations(52, 5))
+    assert len(np.unique(found)) == 7462
+    hands = np.bincount(np.searchsorted(CATEGORY_STARTS, found, side="right") - 1)
+    assert dict(zip(CATEGORIES, hands.tolist())) == {
+        "high_card": 1302540, "pair": 1098240, "two_pair": 123552, "three_of_a_kind": 54912,
+        "straight": 10200, "flush": 5108, "full_house": 3744, "four_of_a_kind": 624, "straight_flush": 40,
+    }
+
+
+def test_seven_cards_play_the_best_five():
+    rng = np.random.default_rng(7)
+    hands = np.argsort(rng.random((20000, 52)), axis=1)[:, :7]
+    best = np.zeros(len(hands), dtype=np.uint16)
+    for five in itertools.combinations(range(7), 5):
+        best = np.maximum(best, evaluate(hands[:, list(five)]))
+    assert (evaluate(hands) == best).all()
+
+
+def test_evaluate_hand_order():
+    royal = evaluate_hand(["As", "Ks", "Qs", "Js", "Ts", "2c", "3d"])
+    wheel_flush = evaluate_hand(["5c", "4c", "3c", "2c", "Ac", "9d", "9h"])
+    assert royal == 7462 and category(wheel_flush) == "straight_flush" and wheel_flush < royal
+    assert evaluate_hand(["7c", "5d", "4h", "3s", "2c"]) == 1
+    # Two pair plays the best kicker, not the third pair
+    assert evaluate_hand(["Ah", "Ad", "Kc", "Ks", "Qd", "Qh", "2c"]) == evaluate_hand(["Ah", "Ad", "Kc", "Ks", "Qd"])
+    assert parse_cards(["10♠", "A♥"]) == parse_cards(["Ts", "Ah"])
+    assert split_cards("KdKc") == ["Kd", "Kc"] and split_cards("10♠ 9♠") == ["10♠", "9♠"]
+    with pytest.raises(ValueError):
+        parse_cards(["Ah", "Ah"])
+
+
+def test_exact_equity():
+    result = equity(["Ah", "As"], [["Kd", "Kc"]])
+    hero, villain = result["players"]
+    assert result["method"] == "exact" and result["boards"] == 1712304
+    assert hero["equity"] == pytest.approx(0.81255, abs=1e-5)
+    assert hero["equity"] + villain["equity"] == pytest.approx(1)
+    assert hero["tie"] == villain["tie"] and hero["win"] + villain["win"] + hero["tie"] == pytest.approx(1)
+
+    chopped = equity(["Ah", "Kh"], [["Ad", "Kd"]], ["2c", "3s", "4d", "9c", "9s"])
+    assert chopped["boards"] == 1 and [player["equity"] for player in chopped["players"]] == [0.5, 0.5]
+
+
+def test_monte_carlo_agrees_with_enumeration(monkeypatch):
+    exact = equity(["Ah", "Kh"], [["Qs", "Qd"]], ["2h", "7h", "Qc"])
+    monkeypatch.setattr(settings, "EQUITY_EXACT_MAX_BOARDS", 0)
+    forced = equity(["Ah", "Kh"], [["Qs", "Qd"]], ["2h", "7h", "Qc"], samples=50000, seed=3)
+    assert forced["method"] == "monte_carlo"
+    assert forced["players"][0]["equity"] == pytest.approx(exact["players"][0]["equity"], abs=0.01)
+    monkeypatch.undo()
+
+    sampled = equity(["Ah", "Kh"], [None], ["2h", "7h", "Qc"], samples=50000, seed=3)
+    assert sampled["method"] == "monte_carlo" and sampled["players"][1]["cards"] is None
+    multiway = equity(["Ah", "Kh"], [["Qs", "Qd"], None], ["2h", "7h", "Qc"], samples=50000, seed=3)
+    assert sum(player["equity"] for player in multiway["players"]) == pytest.approx(1)
+    # Against a random hand the flush draw does better than against a set
+    assert sampled["players"][0]["equity"] > exact["players"][0]["equity"]
+    # Sampling only applies when a hand is unknown
+    assert equity(["Ah", "Kh"], [["Qs", "Qd"]], ["2h", "7h", "Qc"], samples=50000, seed=3) == exact
+    with pytest.raises(ValueError):
+        equity(["Ah", "Kh"], [["Ah", "Qd"]])
+
+
+@pytest.mark.asyncio
+async def test_hand_equity_endpoint(client: AsyncClient, auth_headers, test_db, test_user):
+    hand = Hand(
+        user_id=test_user.id, hero_cards=["Ah", "As"], community_cards=["2c", "7d", "9s"], actions=[],
+        seats=[
+            {"seat": 1, "player": "Hero", "hero": True, "cards": ["Ah", "As"]},
+            {"seat": 2, "player": "Villain", "hero": False, "cards": ["Kd", "Kc"]},
+        ],
+    )
+    test_db.add(hand)
+    await test_db.commit()
+
+    response = await client.get(f"/api/v1/hands/{hand.id}/equity", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["method"] == "exact" and data["boards"] == 990
+    assert data["players"][1]["cards"] == ["Kd", "Kc"] and data["players"][0]["equity"] > 0.9
+
+    random = await client.get(
+        f"/api/v1/hands/{hand.id}/equity", headers=auth_headers,
+        params={"villain": ["random", "QhQd"], "samples": 2000, "seed": 1},
+    )
+    assert random.status_code == 200
+    assert random.json()["method"] == "monte_carlo" and len(random.json()["players"]) == 3
+
+    clash = await client.get(f"/api/v1/hands/{hand.id}/equity", headers=auth_headers, params={"villain": "AhKd"})
+    assert clash.status_code == 422
+    missing = await client.get("/api/v1/hands/nope/equity", headers=auth_headers)
+    assert missing.status_code == 404
@@ -0,0 +1,130 @@
+"""Hand search tests."""
+import pytest
+from httpx import AsyncClient
+
+from app.models.hand import Hand
+from app.services.hand_search import (
+    CONNECTED, MONOTONE, PAIRED, board_texture, hole_class, parse_hole_classes, rebuild_search_columns,
+    street_reached, texture_values,
+)
+from tests.test_hands import HISTORY
+from tests.test_sync import _push_payload, _raw_session
+
+
+def test_hole_class():
+    assert hole_class(["Kd", "Ad"]) == "AKs" and hole_class(["Ah", "Kd"]) == "AKo"
+    assert hole_class(["9♠", "10♥"]) == "T9o" and hole_class(["Qs", "Qh"]) == "QQ"
+    assert hole_class(["Ah"]) is None and hole_class(["Ah", "Ah"]) is None and hole_class(None) is None
+    assert parse_hole_classes(["ka", "QQ", "AKs", "T9o"]) == ["AKs", "AKo", "QQ", "T9o"]
+    for invalid in ("AAs", "AKx", "A"):
+        with pytest.raises(ValueError):
+            parse_hole_classes([invalid])
+
+
+def test_board_texture():
+    assert board_texture(["Ac", "7d", "2s", "9h", "Kc"]) == 0
+    # The ace plays low for connectedness
+    assert board_texture(["2c", "3d", "4h"]) == CONNECTED
+    assert board_texture(["Ah", "5h", "3h"]) == MONOTONE | CONNECTED
+    assert board_texture(["Kh", "7c", "2d", "7s"]) == PAIRED
+    assert board_texture(["Kh", "Qh"]) is None
+    assert texture_values(["paired", "connected"]) == [PAIRED | CONNECTED, PAIRED | MONOTONE | CONNECTED]
+    assert street_reached({"community_cards": ["Kh", "7c", "2d", "7s"], "actions": []}) == "turn"
+    assert street_reached({"community_cards": [], "actions": [{"street": "flop"}]}) == "flop"
+
+
+def _device_hand(hand_id, session_id, cards, board, pot):
+    return {
+        "id": hand_id, "session_id": session_id, "cards": cards, "community_cards": board, "pot": pot,
+        "actions": "[]",
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_hands(client: AsyncClient, auth_headers):
+    await client.post("/api/v1/hands/import", headers=auth_headers, content=HISTORY.encode())
+    response = await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        sessions={"created": [_raw_session("s-1")]},
+        hands={"created": [
+            _device_hand("h-1", "s-1", '["Ad", "As"]', '["Kh", "7c", "2d", "7s"]', 300),
+            _device_hand("h-2", "s-1", '["Ac", "Kc"]', "[]", 6),
+        ]},
+    ))
+    assert response.status_code == 200, response.text
+
+    async def search(**params):
+        response = await client.get("/api/v1/hands/search", headers=auth_headers, params=params)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    aces = (await search(hole="AA"))["items"]
+    assert [hand["id"] for hand in aces] == ["h-1"]
+    assert aces[0]["board_texture"] == ["paired"] and aces[0]["street"] == "turn"
+    assert float(aces[0]["pot_bb"]) == 150
+    ace_king = await search(hole="AK")
+    assert {hand["hole_class"] for hand in ace_king["items"]} == {"AKs", "AKo"}
+    assert [hand["hole_class"] for hand in (await search(hole="AK", street="flop"))["items"]] == ["AKo"]
+    assert (await search(hole="AKs", street="flop"))["items"] == []
+    assert [hand["hole_class"] for hand in (await search(min_pot_bb=100))["items"]] == ["AA", "QQ"]
+    assert [hand["hole_class"] for hand in (await search(texture="connected"))["items"]] == ["QQ"]
+    assert (await search(texture=["paired", "connected"]))["items"] == []
+    assert len((await search(session_id="s-1"))["items"]) == 2
+
+    # Newest first: device hands are played when created, after the imports
+    pages, cursor = [], None
+    while True:
+        page = await search(limit=1, **({"cursor": cursor} if cursor else {}))
+        pages.extend(hand["hole_class"] for hand in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(pages) == 4 and pages[2:] == ["QQ", "AKo"]
+
+    invalid = await client.get("/api/v1/hands/search", headers=auth_headers, params={"hole": "AAs"})
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_push_keeps_imported_hand_facts(client: AsyncClient, auth_headers):
+    """A device editing an imported hand can't erase what only the history knows."""
+    await client.post("/api/v1/hands/import", headers=auth_headers, content=HISTORY.encode())
+    imported = (await client.get("/api/v1/hands/search", headers=auth_headers, params={"hole": "QQ"})).json()["items"][0]
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    edited = _device_hand(imported["id"], None, '["Qs", "Qh"]', '["2c", "3d", "4h", "5s", "9c"]', 220)
+    response = await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        last_pulled_at=pulled["timestamp"], hands={"updated": [edited | {"notes": "cooler"}]},
+    ))
+    assert response.status_code == 200, response.text
+
+    after = (await client.get("/api/v1/hands/search", headers=auth_headers, params={"hole": "QQ"})).json()["items"][0]
+    assert after == imported
+
+
+@pytest.mark.asyncio
+async def test_rebuild_search_columns(test_db, test_user):
+    hand = Hand(user_id=test_user.id, hero_cards=["Jh", "Th"], community_cards=["9h", "8h", "6h"], pot=40, actions=[])
+    test_db.add(hand)
+    await test_db.commit()
+    assert hand.played_at is None and hand.hole_class is None
+
+    assert await rebuild_search_columns(test_db, test_user.id) == 1
+    await test_db.commit()
+    await test_db.refresh(hand)
+    assert (hand.hole_class, hand.board_texture, hand.street) == ("JTs", MONOTONE | CONNECTED, "flop")
+    assert hand.played_at is not None and hand.pot_bb is None
+
+
+@pytest.mark.asyncio
+async def test_push_prices_pot_in_fractional_big_blinds(client: AsyncClient, auth_headers):
+    """Whole pots and blinds still divide exactly (SQLite stores them as integers)."""
+    await client.post("/api/v1/hands/import", headers=auth_headers, content=HISTORY.encode())
+    imported = (await client.get("/api/v1/hands/search", headers=auth_headers, params={"hole": "QQ"})).json()["items"][0]
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    edited = _device_hand(imported["id"], None, '["Qs", "Qh"]', "[]", 5)
+    response = await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        last_pulled_at=pulled["timestamp"], hands={"updated": [edited]},
+    ))
+    assert response.status_code == 200, response.text
+
+    after = (await client.get("/api/v1/hands/search", headers=auth_headers, params={"hole": "QQ"})).json()["items"][0]
+    assert float(after["pot_bb"]) == 2.5
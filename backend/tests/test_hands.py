@@ -0,0 +1,180 @@
+"""Hand history import tests."""
+import json
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.hand import Hand
+from app.services.hand_history import parse_hand, positions, split_hands
+
+HISTORY = """\
+PokerStars Hand #254001234567: Hold'em No Limit ($1/$2 USD) - 2025/02/01 3:15:03 CET [2025/01/31 21:15:03 ET]
+Table 'Alcor II' 6-max Seat #4 is the button
+Seat 1: Villain1 ($200 in chips)
+Seat 2: Hero ($212.50 in chips)
+Seat 3: Villain3 ($80 in chips)
+Seat 4: Villain4 ($150 in chips)
+Seat 6: Sitter ($100 in chips) is sitting out
+Seat 5: Villain5 ($300 in chips)
+Villain5: posts small blind $1
+Villain1: posts big blind $2
+*** HOLE CARDS ***
+Dealt to Hero [Ah Kd]
+Hero: raises $4 to $6
+Villain3: calls $6
+Villain4: folds
+Villain5: folds
+Villain1: calls $4
+*** FLOP *** [Ac 7d 2s]
+Villain1: checks
+Hero: bets $10
+Villain3: raises $64 to $74 and is all-in
+Villain1: folds
+Hero: calls $64
+*** TURN *** [Ac 7d 2s] [9h]
+*** RIVER *** [Ac 7d 2s 9h] [Kc]
+*** SHOW DOWN ***
+Hero: shows [Ah Kd] (two pair, Aces and Kings)
+Villain3: shows [7c 7h] (three of a kind, Sevens)
+Villain3 collected $160 from pot
+*** SUMMARY ***
+Total pot $163 | Rake $3
+Board [Ac 7d 2s 9h Kc]
+Seat 1: Villain1 (big blind) folded on the Flop
+Seat 2: Hero showed [Ah Kd] and lost with two pair, Aces and Kings
+Seat 3: Villain3 showed [7c 7h] and won ($160) with three of a kind, Sevens
+Seat 4: Villain4 (button) folded before Flop (didn't bet)
+Seat 5: Villain5 (small blind) folded before Flop
+
+
+
+PokerStars Hand #254001234568: Hold'em No Limit ($1/$2 USD) - 2025/01/31 21:16:03 ET
+Table 'Alcor II' 6-max Seat #5 is the button
+Seat 1: Short ($20 in chips)
+Seat 2: Hero ($300 in chips)
+Seat 3: Mid ($100 in chips)
+Short: posts small blind $1
+Hero: posts big blind $2
+*** HOLE CARDS ***
+Dealt to Hero [Qs Qh]
+Mid: raises $8 to $10
+Short: raises $10 to $20 and is all-in
+Hero: raises $280 to $300 and is all-in
+Mid: calls $90 and is all-in
+Uncalled bet ($200) returned to Hero
+*** FLOP *** [2c 3d 4h]
+*** TURN *** [2c 3d 4h] [5s]
+*** RIVER *** [2c 3d 4h 5s] [9c]
+*** SHOW DOWN ***
+Hero: shows [Qs Qh] (a pair of Queens)
+Mid: shows [Jc Jd] (a pair of Jacks)
+Hero collected $158 from side pot
+Short: shows [Ac 2d] (a straight, Ace to Five)
+Short collected $60 from main pot
+*** SUMMARY ***
+Total pot $220 Main pot $60. Side pot $158. | Rake $2
+Board [2c 3d 4h 5s 9c]
+Seat 1: Short (small blind) showed [Ac 2d] and won ($60) with a straight, Ace to Five
+Seat 2: Hero (big blind) showed [Qs Qh] and won ($158) with a pair of Queens
+Seat 3: Mid mucked [Jc Jd]
+"""
+
+
+def test_parse_pokerstars_hands():
+    """Seats, positions, actions, cards and side pots come out of the text."""
+    first, second = (parse_hand(block) for block in split_hands(HISTORY.splitlines(keepends=True)))
+
+    assert first["external_id"] == "PokerStars:254001234567"
+    assert first["played_at"].isoformat() == "2025-02-01T02:15:03+00:00"
+    assert (first["small_blind"], first["big_blind"]) == (1, 2)
+    hero = next(seat for seat in first["seats"] if seat["hero"])
+    assert (hero["player"], hero["position"], hero["cards"]) == ("Hero", "UTG", ["Ah", "Kd"])
+    assert [seat["position"] for seat in first["seats"]] == ["BB", "UTG", "CO", "BTN", "SB", None]
+    assert first["actions"][2] == {"player": "Hero", "action": "raise", "amount": 6.0, "street": "preflop", "all_in": False}
+    assert first["actions"][9]["all_in"] and first["actions"][9]["street"] == "flop"
+    assert first["community_cards"] == ["Ac", "7d", "2s", "9h", "Kc"]
+    assert (first["pot"], first["rake"], first["street"]) == (163, 3, "showdown")
+    assert first["pots"] == [{"amount": 160.0, "winners": ["Villain3"]}]
+
+    # Dead button: seat 5 is empty, so seats 1-3 are SB, BB and button
+    assert [seat["position"] for seat in second["seats"]] == ["SB", "BB", "BTN"]
+    assert second["pots"] == [{"amount": 60.0, "winners": ["Short"]}, {"amount": 158.0, "winners": ["Hero"]}]
+    assert second["actions"][-1] == {"player": "Hero", "action": "uncalled", "amount": 200.0, "street": "preflop", "all_in": False}
+    assert second["seats"][2]["cards"] == ["Jc", "Jd"]
+
+
+def test_positions_full_ring():
+    assert list(positions(list(range(1, 10)), 9).values()) == [
+        "SB", "BB", "UTG", "UTG+1", "MP", "LJ", "HJ", "CO", "BTN"
+    ]
+    assert positions([2, 4, 7], 4) == {7: "SB", 2: "BB", 4: "BTN"}
+
+
+@pytest.mark.asyncio
+async def test_import_hand_history(client: AsyncClient, auth_headers, test_db, test_user, monkeypatch):
+    """Upload streams progress per batch and re-uploads only count duplicates."""
+    monkeypatch.setattr(settings, "HAND_IMPORT_CHUNK_BYTES", 1)
+    body = ("\ufeff" + HISTORY + "PokerStars Hand #1: garbage\n").encode()
+
+    response = await client.post("/api/v1/hands/import", headers=auth_headers, content=body)
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["hands"] for line in lines[:-1]] == [1, 2, 3]
+    assert lines[-1]["done"] and lines[-1]["imported"] == 2 and lines[-1]["failed"] == 1
+    assert lines[-1]["errors"][0].startswith("PokerStars Hand #1")
+
+    stored = (await test_db.execute(select(Hand).where(Hand.user_id == test_user.id))).scalars().all()
+    assert sorted(hand.external_id for hand in stored) == ["PokerStars:254001234567", "PokerStars:254001234568"]
+    first = min(stored, key=lambda hand: hand.external_id)
+    assert first.hero_cards == ["Ah", "Kd"] and first.seats[1]["player"] == "Hero"
+    assert first.pots == [{"amount": 160.0, "winners": ["Villain3"]}]
+
+    again = await client.post("/api/v1/hands/import", headers=auth_headers, content=body)
+    final = json.loads(again.text.splitlines()[-1])
+    assert (final["imported"], final["duplicates"]) == (0, 2)
+
+    missing = await client.post("/api/v1/hands/import", headers=auth_headers, content=body, params={"session_id": "nope"})
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_import_releases_session_on_disconnect(test_db, test_user, monkeypatch):
+    """A client that goes away mid-upload doesn't leave the connection checked out."""
+    from io import BytesIO
+    from app.services.hand_import import import_hands
+
+    monkeypatch.setattr(settings, "HAND_IMPORT_CHUNK_BYTES", 1)
+    closed = []
+    close = test_db.close
+
+    async def spy_close():
+        closed.append(True)
+        await close()
+
+    monkeypatch.setattr(test_db, "close", spy_close)
+    progress = import_hands(test_db, test_user.id, BytesIO(HISTORY.encode()))
+    assert json.loads(await progress.__anext__())["hands"] == 1
+    await progress.aclose()
+    assert closed
+
+
+@pytest.mark.asyncio
+async def test_import_reads_spool_off_the_event_loop(test_db, test_user):
+    """Reads of a spool rolled over to disk would block every other request."""
+    import threading
+    from io import BytesIO
+    from app.services.hand_import import import_hands
+
+    class RecordingSource(BytesIO):
+        threads = set()
+
+        def read(self, *args):
+            self.threads.add(threading.get_ident())
+            return super().read(*args)
+
+    source = RecordingSource(HISTORY.encode())
+    lines = [json.loads(line) async for line in import_hands(test_db, test_user.id, source)]
+    assert lines[-1]["imported"] == 2
+    assert RecordingSource.threads and threading.get_ident() not in RecordingSource.threads
@@ -0,0 +1,126 @@
+"""HUD stats tests."""
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.models.stats import HandStats
+from app.services.hand_history import parse_hand, split_hands
+from app.services.hud import (
+    PFR, SAW_FLOP, THREE_BET, THREE_BET_OPPORTUNITY, VPIP, WENT_TO_SHOWDOWN, WON_AT_SHOWDOWN, hand_flags,
+)
+from tests.test_hands import HISTORY
+from tests.test_sync import _push_payload
+
+
+def test_hand_flags_from_imported_hands():
+    first, second = (parse_hand(block) for block in split_hands(HISTORY.splitlines()))
+    # Open-raise, bet and call on the flop, lose at showdown
+    assert hand_flags(first) == (VPIP | PFR | SAW_FLOP | WENT_TO_SHOWDOWN, 1, 1)
+    # Facing a raise and a re-raise the shove is a 4-bet, not a 3-bet
+    assert hand_flags(second) == (VPIP | PFR | SAW_FLOP | WENT_TO_SHOWDOWN | WON_AT_SHOWDOWN, 0, 0)
+
+
+def test_hand_flags_from_device_actions():
+    three_bet = {"actions": [
+        {"street": "preflop", "player": "villain1", "action": "raise", "amount": 6},
+        {"street": "preflop", "player": "hero", "action": "raise", "amount": 18},
+        {"street": "preflop", "player": "villain1", "action": "call", "amount": 12},
+        {"street": "flop", "player": "hero", "action": "bet", "amount": 20},
+        {"street": "flop", "player": "villain1", "action": "fold"},
+    ]}
+    assert hand_flags(three_bet) == (VPIP | PFR | THREE_BET_OPPORTUNITY | THREE_BET | SAW_FLOP, 1, 0)
+    folded = {"actions": [
+        {"street": "preflop", "player": "villain1", "action": "raise", "amount": 6},
+        {"street": "preflop", "player": "hero", "action": "fold"},
+        {"street": "flop", "player": "villain1", "action": "bet", "amount": 6},
+    ]}
+    assert hand_flags(folded) == (THREE_BET_OPPORTUNITY, 0, 0)
+    assert hand_flags({"actions": [{"street": "preflop", "player": "BTN", "action": "raise"}]}) is None
+
+
+def _device_hand(hand_id, action):
+    return {
+        "id": hand_id, "cards": '["Ah", "Kd"]', "community_cards": "[]", "pot": 10,
+        "actions": f'[{{"street": "preflop", "player": "hero", "action": "{action}", "amount": 6}}]',
+    }
+
+
+@pytest.mark.asyncio
+async def test_hud_counters_follow_writes(client: AsyncClient, auth_headers, test_db):
+    created = await client.post("/api/v1/sessions/", headers=auth_headers, json={
+        "start_time": "2025-01-31T21:00:00", "stakes": "1/2", "small_blind": "1.00", "big_blind": "2.00",
+        "buy_in": "500.00", "cash_out": "478.00",
+    })
+    session_id = created.json()["id"]
+    await client.post("/api/v1/hands/import", headers=auth_headers, content=HISTORY.encode(), params={"session_id": session_id})
+
+    hud = (await client.get("/api/v1/hands/hud", headers=auth_headers)).json()
+    assert (hud["hands"], hud["vpip"], hud["pfr"], hud["three_bet"]) == (2, 100.0, 100.0, None)
+    assert (hud["aggression_factor"], hud["went_to_showdown"], hud["won_at_showdown"]) == (1.0, 100.0, 50.0)
+
+    response = await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        hands={"created": [_device_hand("h-1", "fold"), _device_hand("h-2", "call")]},
+    ))
+    assert response.status_code == 200, response.text
+    counts = (await client.get("/api/v1/hands/hud", headers=auth_headers)).json()["counts"]
+    assert (counts["hands"], counts["vpip"], counts["pfr"]) == (4, 3, 2)
+
+    # Updating a hand replaces its contribution; deleting one removes it
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    response = await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        last_pulled_at=pulled["timestamp"],
+        hands={"updated": [_device_hand("h-1", "raise")], "deleted": ["h-2"]},
+    ))
+    assert response.status_code == 200, response.text
+    counts = (await client.get("/api/v1/hands/hud", headers=auth_headers)).json()["counts"]
+    assert (counts["hands"], counts["vpip"], counts["pfr"]) == (3, 3, 3)
+
+    # Filters sum the per-hand flags
+    session = (await client.get("/api/v1/hands/hud", headers=auth_headers, params={"session_id": session_id})).json()
+    assert session["counts"]["hands"] == 2 and session["won_at_showdown"] == 50.0
+    ranged = await client.get("/api/v1/hands/hud", headers=auth_headers, params={
+        "start": "2025-02-01T02:15:00+00:00", "end": "2025-02-01T02:16:00+00:00",
+    })
+    assert ranged.json()["counts"]["hands"] == 1 and ranged.json()["won_at_showdown"] == 0.0
+
+    # Deleting the session detaches its hands from the session filter
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        last_pulled_at=pulled["timestamp"], sessions={"deleted": [session_id]},
+    ))
+    session = (await client.get("/api/v1/hands/hud", headers=auth_headers, params={"session_id": session_id})).json()
+    assert session["hands"] == 0 and session["vpip"] is None
+    stored = (await test_db.execute(select(HandStats.session_id))).scalars().all()
+    assert len(stored) == 3 and set(stored) == {None}
+
+
+@pytest.mark.asyncio
+async def test_first_write_builds_counters_once(test_db, test_user, monkeypatch):
+    """A request that finds the counters row already claimed doesn't derive the history again."""
+    from app.models.hand import Hand
+    from app.models.stats import HudCounters
+    from app.services.hud import add_hand_stats, load_hud, stats_row
+
+    actions = [{"street": "preflop", "player": "hero", "action": "raise", "amount": 6}]
+    test_db.add_all([Hand(id=hand_id, user_id=test_user.id, pot=10, actions=actions) for hand_id in ("h-1", "h-2")])
+    # A concurrent first request claimed the row and built h-1 into it
+    test_db.add(HudCounters(user_id=test_user.id, hands=1, vpip=1, pfr=1))
+    await test_db.commit()
+
+    # This request checked for the row before it was claimed
+    scalar = test_db.scalar
+    checks = []
+
+    async def racing_scalar(stmt, *args, **kwargs):
+        if stmt.is_select and not checks:
+            checks.append(stmt)
+            return None
+        return await scalar(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(test_db, "scalar", racing_scalar)
+    new = {"actions": actions}
+    await add_hand_stats(test_db, test_user.id, [stats_row(test_user.id, "h-2", new, hand_flags(new))])
+    await test_db.commit()
+    totals = await load_hud(test_db, test_user.id)
+    assert (totals["hands"], totals["vpip"], totals["pfr"]) == (2, 2, 2)
+    assert (await test_db.execute(select(HandStats.hand_id))).scalars().all() == ["h-2"]
@@ -10,8 +10,10 @@ async def test_create_session(client: AsyncClient, auth_headers):
         "/api/v1/sessions/",
         headers=auth_headers,
         json={
-            "session_date": "2025-02-01",
-            "location": "Bellagio 2/5",
+            "start_time": "2025-02-01T19:00:00",
+            "location": "Bellagio",
+            "stakes": "2/5",
+            "small_blind": "2.00",
             "big_blind": "5.00",
             "buy_in": "500.00",
             "cash_out": "850.00",
@@ -22,7 +24,8 @@ async def test_create_session(client: AsyncClient, auth_headers):
     )
     assert response.status_code == 201
     data = response.json()
-    assert data["location"] == "Bellagio 2/5"
+    assert data["location"] == "Bellagio"
+    assert data["stakes"] == "2/5"
 
 
 @pytest.mark.asyncio
@@ -30,11 +33,77 @@ async def test_get_sessions_empty(client: AsyncClient, auth_headers):
     """Test getting sessions when none exist."""
     response = await client.get("/api/v1/sessions/", headers=auth_headers)
     assert response.status_code == 200
-    assert response.json() == []
+    assert response.json() == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_keyset_pages(client: AsyncClient, auth_headers, test_db, test_user):
+    """Cursor pages walk every session once, newest first, including ties."""
+    from datetime import datetime, timedelta
+    from decimal import Decimal
+    from app.models.session import Session
+
+    start = datetime(2025, 1, 1, 18)
+    for i in range(7):
+        # Sessions 5 and 6 share a start time; the id breaks the tie
+        test_db.add(Session(
+            id=f"s{i}", user_id=test_user.id, stakes="1/2", small_blind=Decimal("1"),
+            big_blind=Decimal("2"), buy_in=Decimal("200"), cash_out=Decimal("200"),
+            start_time=start + timedelta(days=min(i, 5)),
+        ))
+    await test_db.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/v1/sessions/", headers=auth_headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 3
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ["s6", "s5", "s4", "s3", "s2", "s1", "s0"]
+
+    response = await client.get(
+        "/api/v1/sessions/", headers=auth_headers, params={"start_date": "2025-01-03", "end_date": "2025-01-04"}
+    )
+    assert [item["id"] for item in response.json()["items"]] == ["s3", "s2"]
+
+    response = await client.get("/api/v1/sessions/", headers=auth_headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
 
 
 @pytest.mark.asyncio
 async def test_unauthorized_access(client: AsyncClient):
     """Test that sessions require authentication."""
     response = await client.get("/api/v1/sessions/")
-    assert response.status_code == 403
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_hours_played_from_times(client: AsyncClient, auth_headers):
+    """REST and sync push store the same hours for the same start and end."""
+    from decimal import Decimal
+    from tests.test_sync import _push_payload, _raw_session
+
+    body = {
+        "start_time": "2025-02-01T18:00:00Z", "end_time": "2025-02-01T20:20:00Z", "stakes": "1/2",
+        "big_blind": "2.00", "buy_in": "200.00", "cash_out": "300.00", "hours_played": "9.0",
+    }
+    created = (await client.post("/api/v1/sessions/", headers=auth_headers, json=body)).json()
+    assert Decimal(created["hours_played"]) == Decimal("2.33")
+
+    start = 1738432800000  # 2025-02-01T18:00:00Z
+    pushed = {**_raw_session("s-hours"), "start_time": start, "end_time": start + (2 * 60 + 20) * 60 * 1000}
+    await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(sessions={"created": [pushed]}))
+    fetched = (await client.get("/api/v1/sessions/s-hours", headers=auth_headers)).json()
+    assert Decimal(fetched["hours_played"]) == Decimal("2.33")
+
+    # A typed-in duration stands when there is no end time; moving the end recomputes it
+    untimed = (await client.post("/api/v1/sessions/", headers=auth_headers, json={**body, "end_time": None})).json()
+    assert Decimal(untimed["hours_played"]) == Decimal("9.0")
+    updated = await client.put(f"/api/v1/sessions/{untimed['id']}", headers=auth_headers,
+                               json={"end_time": "2025-02-01T19:30:00Z"})
+    assert Decimal(updated.json()["hours_played"]) == Decimal("1.5")
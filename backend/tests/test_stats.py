@@ -0,0 +1,568 @@
+"""Stats endpoint tests."""
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from httpx import AsyncClient
+
+from app.models.session import Session
+from app.models.transaction import Transaction, TransactionType
+
+
+def _session(user_id, buy_in, cash_out, big_blind="2", hours="2", tips="0", expenses="0"):
+    return Session(
+        user_id=user_id,
+        stakes=f"1/{big_blind}",
+        small_blind=Decimal("1"),
+        big_blind=Decimal(big_blind),
+        buy_in=Decimal(buy_in),
+        cash_out=Decimal(cash_out),
+        hours_played=Decimal(hours),
+        tips=Decimal(tips),
+        expenses=Decimal(expenses),
+        start_time=datetime(2025, 1, 1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_stats_empty(client: AsyncClient, auth_headers):
+    response = await client.get("/api/v1/stats/", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_sessions"] == 0
+    assert Decimal(data["current_bankroll"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_aggregates(client: AsyncClient, auth_headers, test_db, test_user):
+    test_db.add_all([
+        _session(test_user.id, "200", "305", hours="3", tips="5"),
+        _session(test_user.id, "200", "100", hours="2", expenses="10"),
+        _session(test_user.id, "500", "500", big_blind="5", hours="5"),
+        Transaction(user_id=test_user.id, type=TransactionType.DEPOSIT, amount=Decimal("1000")),
+        Transaction(user_id=test_user.id, type=TransactionType.WITHDRAWAL, amount=Decimal("250")),
+    ])
+    await test_db.commit()
+
+    response = await client.get("/api/v1/stats/", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    data = {key: Decimal(str(value)) for key, value in response.json().items()}
+
+    assert data["total_sessions"] == 3
+    assert data["winning_sessions"] == 1
+    assert data["losing_sessions"] == 1
+    assert data["total_profit"] == Decimal("5")
+    assert data["net_profit"] == Decimal("-10")
+    assert data["total_hours"] == Decimal("10")
+    assert data["hourly_rate"] == Decimal("0.5")
+    # 2.5 BB won (52.5 - 50 + 0) over 250 estimated hands
+    assert data["bb_per_100"] == Decimal("1")
+    # Tips and expenses are 2.5 + 5 BB
+    assert data["net_bb_per_100"] == Decimal("-2")
+    assert data["initial_bankroll"] == Decimal("750")
+    assert data["current_bankroll"] == Decimal("740")
+
+
+@pytest.mark.asyncio
+async def test_stats_single_query(client: AsyncClient, auth_headers, test_engine):
+    from sqlalchemy import event
+
+    # The first read builds the user's rollup row
+    await client.get("/api/v1/stats/", headers=auth_headers)
+
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get("/api/v1/stats/", headers=auth_headers)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200
+    # Lookups for the authenticated user, their data version (ETag) and the rollup row
+    assert len(statements) == 3
+    assert "sync_state" in statements[1]
+    assert "stats_rollups" in statements[2]
+    assert "FROM sessions" not in statements[2]
+
+
+@pytest.mark.asyncio
+async def test_rollup_follows_sync_push(client: AsyncClient, auth_headers, test_db, test_user):
+    """Creates, updates and deletes keep the rollup equal to a fresh aggregate."""
+    from app.services.rollup import TOTAL_COLUMNS, load_totals, rebuild_rollups
+    from app.services.stats import totals_query
+
+    def raw(record_id, cash_out, tips=0):
+        start = int(datetime(2025, 2, 1, 18).timestamp() * 1000)
+        return {
+            "id": record_id, "start_time": start, "end_time": start + 3 * 3600 * 1000,
+            "stakes": "1/2", "small_blind": 1, "big_blind": 2, "buy_in": 200,
+            "cash_out": cash_out, "tips": tips, "expenses": 0,
+        }
+
+    def push(last_pulled_at=0, **tables):
+        empty = {"created": [], "updated": [], "deleted": []}
+        return client.post("/api/v1/sync/push", headers=auth_headers, json={
+            "changes": {t: {**empty, **tables.get(t, {})} for t in ("sessions", "hands", "transactions")},
+            "last_pulled_at": last_pulled_at,
+        })
+
+    # Existing data before the rollup row exists
+    test_db.add(_session(test_user.id, "100", "40"))
+    await test_db.commit()
+
+    await push(sessions={"created": [raw("a", 260, tips=4), raw("b", 150)]},
+               transactions={"created": [{"id": "t1", "type": "deposit", "amount": 500}]})
+    await push(sessions={"updated": [raw("a", 180)], "deleted": ["b"]})
+
+    async def assert_consistent():
+        expected = (await test_db.execute(totals_query(test_user.id))).mappings().one()
+        actual = await load_totals(test_db, test_user.id)
+        for name in TOTAL_COLUMNS:
+            assert Decimal(str(actual[name])) == Decimal(str(expected[name])).quantize(Decimal("0.000001")), name
+
+    await assert_consistent()
+    data = (await client.get("/api/v1/stats/", headers=auth_headers)).json()
+    assert data["total_sessions"] == 2
+    assert Decimal(data["total_profit"]) == Decimal("-80")
+    assert Decimal(data["initial_bankroll"]) == Decimal("500")
+
+    # Drift (e.g. a manual SQL fix) is repaired by a rebuild
+    from sqlalchemy import update
+    from app.models.stats import StatsRollup
+    await test_db.execute(update(StatsRollup).values(total_sessions=99))
+    assert await rebuild_rollups(test_db) == 1
+    await assert_consistent()
+
+
+@pytest.mark.asyncio
+async def test_stats_series_buckets_by_local_day(client: AsyncClient, auth_headers, test_db, test_user):
+    def played(start, buy_in, cash_out, tips="0"):
+        session = _session(test_user.id, buy_in, cash_out, tips=tips)
+        session.start_time = start
+        return session
+
+    test_db.add_all([
+        Transaction(user_id=test_user.id, type=TransactionType.DEPOSIT, amount=Decimal("1000"),
+                    created_at=datetime(2024, 12, 30, 12)),
+        # Tuesday 20:00 in Los Angeles, already Wednesday in UTC
+        played(datetime(2025, 1, 8, 4), "200", "300", tips="10"),
+        played(datetime(2025, 1, 9, 18), "200", "150"),
+        played(datetime(2025, 2, 3, 18), "100", "180"),
+    ])
+    await test_db.commit()
+
+    response = await client.get("/api/v1/stats/series", headers=auth_headers,
+                                params={"bucket": "day", "tz": "America/Los_Angeles", "start": "2025-01-01"})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert Decimal(data["opening_bankroll"]) == Decimal("1000")
+    assert [p["period_start"] for p in data["points"]] == ["2025-01-07", "2025-01-09", "2025-02-03"]
+    assert [Decimal(p["bankroll"]) for p in data["points"]] == [Decimal("1090"), Decimal("1040"), Decimal("1120")]
+    assert Decimal(data["points"][-1]["cumulative_profit"]) == Decimal("130")
+
+    data = (await client.get("/api/v1/stats/series", headers=auth_headers, params={"bucket": "month"})).json()
+    assert [(p["period_start"], p["sessions"]) for p in data["points"]] == [
+        ("2024-12-01", 0), ("2025-01-01", 2), ("2025-02-01", 1),
+    ]
+    assert Decimal(data["points"][1]["net_profit"]) == Decimal("40")
+
+    response = await client.get("/api/v1/stats/series", headers=auth_headers, params={"tz": "Mars/Olympus"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stats_series_follows_writes(client: AsyncClient, auth_headers, test_db, test_user):
+    """Writes after a timezone is built move totals between its day buckets."""
+    from sqlalchemy import select
+    from app.models.stats import StatsBucket
+    from app.services.buckets import BUCKET_COLUMNS
+    from app.services.rollup import rebuild_rollups
+
+    def raw(record_id, start, cash_out):
+        start = int(start.timestamp() * 1000)
+        return {
+            "id": record_id, "start_time": start, "end_time": start + 2 * 3600 * 1000,
+            "stakes": "1/2", "small_blind": 1, "big_blind": 2, "buy_in": 200,
+            "cash_out": cash_out, "tips": 0, "expenses": 0,
+        }
+
+    def push(**tables):
+        empty = {"created": [], "updated": [], "deleted": []}
+        return client.post("/api/v1/sync/push", headers=auth_headers, json={
+            "changes": {t: {**empty, **tables.get(t, {})} for t in ("sessions", "hands", "transactions")},
+            "last_pulled_at": 0,
+        })
+
+    def series():
+        return client.get("/api/v1/stats/series", headers=auth_headers, params={"tz": "Europe/Berlin"})
+
+    await push(sessions={"created": [raw("a", datetime(2025, 3, 1, 12), 260), raw("b", datetime(2025, 3, 2, 12), 150)]})
+    assert len((await series()).json()["points"]) == 2
+
+    # Move "a" to another day, change its result, delete "b"
+    await push(sessions={"updated": [raw("a", datetime(2025, 3, 5, 23, 30), 180)], "deleted": ["b"]})
+    points = (await series()).json()["points"]
+    assert [(p["period_start"], Decimal(p["profit"])) for p in points] == [("2025-03-06", Decimal("-20"))]
+
+    async def buckets():
+        rows = await test_db.execute(
+            select(StatsBucket.tz, StatsBucket.day, *(getattr(StatsBucket, c) for c in BUCKET_COLUMNS))
+            .where(StatsBucket.user_id == test_user.id)
+        )
+        return {(row[0], row[1]): row[2:] for row in rows if any(row[2:])}
+
+    incremental = await buckets()
+    await rebuild_rollups(test_db, test_user.id)
+    assert await buckets() == incremental
+
+
+@pytest.mark.asyncio
+async def test_ensure_zone_builds_once(test_db, test_user, monkeypatch):
+    """A request that raced the zone's registration doesn't build it again."""
+    from sqlalchemy import select
+    from app.models.stats import StatsBucket
+    from app.services.buckets import ensure_zone
+
+    test_db.add(_session(test_user.id, "200", "260"))
+    await test_db.commit()
+    await ensure_zone(test_db, test_user.id, "UTC")
+    await test_db.commit()
+
+    # The second request's existence check ran before the first one registered the zone
+    scalar = test_db.scalar
+    checks = []
+
+    async def racing_scalar(stmt, *args, **kwargs):
+        if not checks:
+            checks.append(stmt)
+            return None
+        return await scalar(stmt, *args, **kwargs)
+
+    monkeypatch.setattr(test_db, "scalar", racing_scalar)
+    await ensure_zone(test_db, test_user.id, "UTC")
+    await test_db.commit()
+    rows = (await test_db.execute(
+        select(StatsBucket.sessions, StatsBucket.profit).where(StatsBucket.user_id == test_user.id)
+    )).all()
+    assert checks and [(sessions, Decimal(profit)) for sessions, profit in rows] == [(1, Decimal("60"))]
+
+
+def test_lttb_keeps_budget_and_extremes():
+    import numpy as np
+    from app.services.downsample import extremes, lttb
+
+    y = np.cumsum(np.random.default_rng(7).normal(size=20000))
+    x = np.arange(len(y), dtype=float)
+    kept = lttb(x, y, 300, keep=extremes(y))
+    assert len(kept) == 300
+    assert kept[0] == 0 and kept[-1] == len(y) - 1
+    assert np.all(np.diff(kept) > 0)
+    assert set(extremes(y)) <= set(kept.tolist())
+    assert lttb(x[:50], y[:50], 300).tolist() == list(range(50))
+
+
+@pytest.mark.asyncio
+async def test_stats_series_downsampled(client: AsyncClient, auth_headers, test_db, test_user):
+    from datetime import timedelta
+
+    results = [("100", "160"), ("100", "40"), ("100", "400"), ("100", "10"), ("100", "150")] * 8
+    for day, (buy_in, cash_out) in enumerate(results):
+        session = _session(test_user.id, buy_in, cash_out)
+        session.start_time = datetime(2025, 1, 1, 12) + timedelta(days=day)
+        test_db.add(session)
+    await test_db.commit()
+
+    full = (await client.get("/api/v1/stats/series", headers=auth_headers)).json()
+    thin = (await client.get("/api/v1/stats/series", headers=auth_headers, params={"points": 10})).json()
+    assert thin["total_points"] == full["total_points"] == 40
+    assert len(thin["points"]) == 10
+    assert thin["points"][0] == full["points"][0] and thin["points"][-1] == full["points"][-1]
+    peak = max(full["points"], key=lambda p: Decimal(p["bankroll"]))
+    assert peak in thin["points"]
+
+
+@pytest.mark.asyncio
+async def test_advanced_stats_requires_premium(client: AsyncClient, auth_headers):
+    response = await client.get("/api/v1/stats/advanced", headers=auth_headers)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_advanced_stats(client: AsyncClient, auth_headers, test_db, test_user):
+    import math
+    from datetime import timedelta
+    from app.models.user import SubscriptionTier
+    from app.services import analytics
+
+    analytics.cache.clear()
+    test_user.subscription_tier = SubscriptionTier.PREMIUM
+    test_user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
+    # +100, -300, -100, +500 over 2h each at 1/2
+    for day, cash_out in enumerate(["300", "-100", "100", "700"]):
+        session = _session(test_user.id, "200", cash_out)
+        session.start_time = datetime(2025, 1, 1) + timedelta(days=day)
+        test_db.add(session)
+    test_db.add(Transaction(user_id=test_user.id, type=TransactionType.DEPOSIT, amount=Decimal("1000")))
+    await test_db.commit()
+
+    response = await client.get("/api/v1/stats/advanced", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["sessions"] == 4
+    assert data["hourly_rate"] == pytest.approx(25)
+    # Residuals 50, -350, -150, 450 per 2h session
+    hourly_sd = math.sqrt((50 ** 2 + 350 ** 2 + 150 ** 2 + 450 ** 2) / 2 / 3)
+    assert data["hourly_std_dev"] == pytest.approx(hourly_sd)
+    assert data["hourly_rate_ci_low"] == pytest.approx(25 - 1.959964 * hourly_sd / math.sqrt(8))
+    # 50 hands (half a hundred) and residuals halved in big blinds per session
+    assert data["bb_per_100"] == pytest.approx(50)
+    assert data["std_dev_per_100"] == pytest.approx(math.sqrt((25 ** 2 + 175 ** 2 + 75 ** 2 + 225 ** 2) / 0.5 / 3))
+    assert data["max_drawdown"] == pytest.approx(400)
+    assert data["longest_downswing_sessions"] == 2
+    assert data["longest_downswing_hours"] == pytest.approx(4)
+    assert data["current_bankroll"] == pytest.approx(1200)
+    assert data["risk_of_ruin"] == pytest.approx(math.exp(-2 * 25 * 1200 / hourly_sd ** 2))
+
+    # Served from the cache until a write moves the user's change sequence
+    cached = analytics.cache[test_user.id]
+    assert (await client.get("/api/v1/stats/advanced", headers=auth_headers)).json() == data
+    assert analytics.cache[test_user.id] is cached
+    start = int(datetime(2025, 1, 9).timestamp() * 1000)
+    await client.post("/api/v1/sync/push", headers=auth_headers, json={
+        "changes": {
+            "sessions": {"created": [{"id": "s5", "start_time": start, "end_time": start + 7200000,
+                                      "stakes": "1/2", "small_blind": 1, "big_blind": 2,
+                                      "buy_in": 200, "cash_out": 400}], "updated": [], "deleted": []},
+            "hands": {"created": [], "updated": [], "deleted": []},
+            "transactions": {"created": [], "updated": [], "deleted": []},
+        },
+        "last_pulled_at": 0,
+    })
+    assert (await client.get("/api/v1/stats/advanced", headers=auth_headers)).json()["sessions"] == 5
+
+
+@pytest.mark.asyncio
+async def test_simulate_bankroll(client: AsyncClient, auth_headers, test_db, test_user):
+    from datetime import timedelta
+    from app.models.user import SubscriptionTier
+    from app.services import analytics
+    from app.services.rollup import rebuild_rollups
+
+    analytics.cache.clear()
+    test_user.subscription_tier = SubscriptionTier.PREMIUM
+    test_user.subscription_expires_at = datetime.utcnow() + timedelta(days=30)
+    await test_db.commit()
+
+    params = {"hands": 5000, "trajectories": 2000, "seed": 42}
+    response = await client.get("/api/v1/stats/simulate", headers=auth_headers, params=params)
+    assert response.status_code == 422
+
+    for day, cash_out in enumerate(["300", "-100", "100", "700"]):
+        session = _session(test_user.id, "200", cash_out)
+        session.start_time = datetime(2025, 1, 1) + timedelta(days=day)
+        test_db.add(session)
+    test_db.add(Transaction(user_id=test_user.id, type=TransactionType.DEPOSIT, amount=Decimal("1000")))
+    await test_db.commit()
+    # Direct inserts bypass the rollup and the change sequence the cache is keyed on
+    await rebuild_rollups(test_db, test_user.id)
+    analytics.cache.clear()
+
+    response = await client.get("/api/v1/stats/simulate", headers=auth_headers, params=params)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["big_blind"] == 2
+    assert data["bb_per_100"] == pytest.approx(50)
+    assert data["starting_bankroll"] == pytest.approx(1200)
+    assert data["bands"][-1]["hands"] == 5000
+    assert all(b["p5"] <= b["p50"] <= b["p95"] for b in data["bands"])
+    # 50 steps of +100 expected
+    assert data["expected_final_bankroll"] == pytest.approx(1200 + 50 * 100, rel=0.05)
+    assert 0 < data["probability_of_ruin"] < 1
+    # Seeded runs repeat exactly
+    again = await client.get("/api/v1/stats/simulate", headers=auth_headers, params=params)
+    assert again.json() == data
+
+    losing = await client.get("/api/v1/stats/simulate", headers=auth_headers,
+                              params={**params, "bb_per_100": -20, "bankroll": 100})
+    assert losing.json()["probability_of_ruin"] > 0.9
+
+
+@pytest.mark.asyncio
+async def test_stats_conditional_get(client: AsyncClient, auth_headers, test_engine):
+    from sqlalchemy import event
+
+    first = await client.get("/api/v1/stats/", headers=auth_headers)
+    etag = first.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        cached = await client.get("/api/v1/stats/", headers={**auth_headers, "If-None-Match": etag})
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+    assert cached.status_code == 304
+    assert cached.headers["etag"].strip('"').startswith(etag.strip('"').split("-")[0])
+    assert cached.content == b""
+    assert not any("stats_rollups" in statement for statement in statements)
+
+    # Other query strings are other representations
+    series = await client.get("/api/v1/stats/series", headers={**auth_headers, "If-None-Match": etag})
+    assert series.status_code == 200
+    assert series.headers["etag"] != etag
+
+    await client.post("/api/v1/sync/push", headers=auth_headers, json={
+        "changes": {
+            "sessions": {"created": [], "updated": [], "deleted": []},
+            "hands": {"created": [], "updated": [], "deleted": []},
+            "transactions": {"created": [{"id": "t1", "type": "deposit", "amount": 100}], "updated": [], "deleted": []},
+        },
+        "last_pulled_at": 0,
+    })
+    changed = await client.get("/api/v1/stats/", headers={**auth_headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert Decimal(changed.json()["current_bankroll"]) == Decimal("100")
+
+
+@pytest.mark.asyncio
+async def test_stats_breakdown(client: AsyncClient, auth_headers, test_db, test_user):
+    def played(stakes, location, start, buy_in, cash_out):
+        big_blind = stakes.split("/")[1]
+        session = _session(test_user.id, buy_in, cash_out, big_blind=big_blind)
+        session.stakes, session.location, session.start_time = stakes, location, start
+        return session
+
+    test_db.add_all([
+        # Friday 21:00 UTC, already Saturday in Tokyo
+        played("2/5", "Bellagio", datetime(2025, 1, 3, 21), "500", "800"),
+        played("2/5", "Online", datetime(2025, 1, 4, 2), "500", "400"),
+        played("5/10", "Bellagio", datetime(2025, 1, 5, 21), "1000", "900"),
+        played("5/10", None, datetime(2025, 1, 6, 10), "1000", "1300"),
+    ])
+    await test_db.commit()
+
+    response = await client.get("/api/v1/stats/breakdown", headers=auth_headers, params={"group_by": "stakes"})
+    assert response.status_code == 200, response.text
+    groups = {row["group"]: row for row in response.json()["groups"]}
+    assert set(groups) == {"2/5", "5/10"}
+    assert groups["2/5"]["total_sessions"] == 2
+    assert Decimal(groups["2/5"]["total_profit"]) == Decimal("200")
+    # 40 BB over 100 estimated hands, as /stats computes it
+    assert Decimal(groups["2/5"]["bb_per_100"]) == Decimal("40")
+    assert Decimal(groups["5/10"]["win_rate_percentage"]) == Decimal("50")
+
+    groups = (await client.get("/api/v1/stats/breakdown", headers=auth_headers,
+                               params={"group_by": "location"})).json()["groups"]
+    assert [(row["group"], row["total_sessions"]) for row in groups] == [(None, 1), ("Bellagio", 2), ("Online", 1)]
+
+    groups = (await client.get("/api/v1/stats/breakdown", headers=auth_headers,
+                               params={"group_by": "weekday", "tz": "Asia/Tokyo"})).json()["groups"]
+    assert [(row["group"], row["total_sessions"]) for row in groups] == [("monday", 2), ("saturday", 2)]
+
+    groups = (await client.get("/api/v1/stats/breakdown", headers=auth_headers,
+                               params={"group_by": "hour"})).json()["groups"]
+    assert [(row["group"], row["total_sessions"]) for row in groups] == [("2", 1), ("10", 1), ("21", 2)]
+
+    response = await client.get("/api/v1/stats/breakdown", headers=auth_headers, params={"group_by": "moon"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_population_benchmarks_batch(tmp_path):
+    import numpy as np
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.db.base import Base
+    from app.models.benchmark import PopulationBenchmark
+    from app.models.user import User
+    from app.services.population import compute_benchmarks
+    from app.services.sketch import QuantileSketch
+
+    url = f"sqlite+aiosqlite:///{tmp_path / 'population.db'}"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    # 30 players at 1/2 winning 1..30 an hour; too few players at 1/10
+    async with factory() as db:
+        users = [User(email=f"p{i}@example.com", hashed_password="x") for i in range(30)]
+        db.add_all(users)
+        await db.flush()
+        for i, user in enumerate(users):
+            for _ in range(2):
+                db.add(_session(user.id, "200", str(200 + 10 * (i + 1)), hours="10"))
+            if i < 5:
+                db.add(_session(user.id, "500", "600", big_blind="10", hours="25"))
+        await db.commit()
+
+        assert await compute_benchmarks(db, url, workers=2) == 2
+        await db.commit()
+        rows = {row.metric: row for row in (await db.execute(select(PopulationBenchmark))).scalars()}
+    await engine.dispose()
+
+    assert set(rows) == {"bb_per_100", "hourly_rate"}
+    assert {row.stakes for row in rows.values()} == {"1/2"}
+    assert rows["hourly_rate"].players == 30
+    hourly = np.arange(1, 31)
+    sketch = QuantileSketch.from_dict(rows["hourly_rate"].sketch)
+    assert sketch.quantile(0.5) == pytest.approx(np.quantile(hourly, 0.5, method="lower"), rel=0.02)
+    # Ranks are approximate too: a value can share a bin with its neighbour
+    assert sketch.rank(10) == pytest.approx(10 / 30, abs=1 / 30)
+
+
+@pytest.mark.asyncio
+async def test_benchmarks_endpoint(client: AsyncClient, auth_headers, test_db, test_user):
+    import numpy as np
+    from app.models.benchmark import PopulationBenchmark
+    from app.services.sketch import QuantileSketch
+
+    response = await client.get("/api/v1/stats/benchmarks", headers=auth_headers, params={"stakes": "1/2"})
+    assert response.status_code == 404
+
+    population = np.linspace(-10, 30, 41)
+    test_db.add_all([
+        PopulationBenchmark(stakes="1/2", metric="hourly_rate", players=41, sketch=QuantileSketch().add(population).to_dict()),
+        PopulationBenchmark(stakes="1/2", metric="bb_per_100", players=41, sketch=QuantileSketch().add(population).to_dict()),
+        # 40 profit over 2 hours: 20/hour, 20 BB over 50 hands: 40 bb/100
+        _session(test_user.id, "200", "240"),
+    ])
+    await test_db.commit()
+
+    response = await client.get("/api/v1/stats/benchmarks", headers=auth_headers, params={"stakes": "1/2"})
+    assert response.status_code == 200, response.text
+    metrics = {m["metric"]: m for m in response.json()["metrics"]}
+    hourly = metrics["hourly_rate"]
+    assert hourly["p50"] == pytest.approx(10, rel=0.02)
+    assert hourly["you"] == pytest.approx(20)
+    assert hourly["percentile"] == pytest.approx(31 / 41 * 100, abs=100 / 41)
+    assert metrics["bb_per_100"]["you"] == pytest.approx(40)
+    assert metrics["bb_per_100"]["percentile"] == pytest.approx(100)
+
+
+def test_simulate_block_in_step_chunks(monkeypatch):
+    """Walking a block a few steps at a time matches computing whole paths."""
+    import numpy as np
+    from app.services import simulation
+
+    trajectories, steps, rate, std_dev, bankroll = 50, 20, 1.0, 30.0, 40.0
+    checkpoints = np.array([0, 6, 7, 19])
+    monkeypatch.setattr(simulation, "CHUNK_CELLS", trajectories * 3)
+    seed = np.random.SeedSequence(7)
+    block = simulation.simulate_block(seed, trajectories, steps, rate, std_dev, bankroll, checkpoints)
+
+    rng = np.random.default_rng(seed)
+    draws = np.hstack([
+        rng.standard_normal((trajectories, min(3, steps - start)), dtype=np.float32) for start in range(0, steps, 3)
+    ])
+    paths = bankroll + np.cumsum(draws.astype(np.float64) * std_dev + rate, axis=1)
+    peaks = np.maximum(np.maximum.accumulate(paths, axis=1), bankroll)
+    assert np.allclose(block["checkpoints"], paths[:, checkpoints], atol=1e-3)
+    assert (block["ruined"] == (paths <= 0).any(axis=1)).all() and block["ruined"].any()
+    assert np.allclose(block["worst_downswing"], (peaks - paths).max(axis=1), atol=1e-3)
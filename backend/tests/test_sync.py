@@ -1,6 +1,7 @@
 import pytest
 from app.api.deps import validate_last_pulled_at
 from fastapi import HTTPException
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 
 @pytest.mark.asyncio
@@ -64,3 +65,528 @@ async def test_push_changes_endpoint(client, auth_headers):
     }
     response = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
     assert response.status_code == 200, response.text
+
+
+async def _seed_sessions(test_db, user, count):
+    from decimal import Decimal
+    from app.models.session import Session
+
+    for i in range(count):
+        test_db.add(Session(
+            user_id=user.id,
+            stakes="1/2",
+            small_blind=Decimal("1"),
+            big_blind=Decimal("2"),
+            buy_in=Decimal("200"),
+            cash_out=Decimal(str(150 + i)),
+            start_time=datetime.utcnow(),
+        ))
+    await test_db.commit()
+
+
+@pytest.mark.asyncio
+async def test_pull_changes_paginated(client, auth_headers, test_db, test_user):
+    """Pages are bounded per table and share one final timestamp."""
+    await _seed_sessions(test_db, test_user, 5)
+
+    seen = []
+    timestamps = set()
+    body = {"page_size": 2}
+    while True:
+        response = await client.post("/api/v1/sync/pull", json=body, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        page = data["changes"]["sessions"]["updated"]
+        assert len(page) <= 2
+        seen.extend(row["id"] for row in page)
+        timestamps.add(data["timestamp"])
+        if not data["cursor"]:
+            break
+        body = {"cursor": data["cursor"]}
+
+    assert len(seen) == len(set(seen)) == 5
+    assert len(timestamps) == 1
+
+    # Nothing changed since the returned timestamp
+    response = await client.post(
+        "/api/v1/sync/pull", json={"last_pulled_at": timestamps.pop()}, headers=auth_headers
+    )
+    assert response.json()["changes"]["sessions"]["updated"] == []
+
+
+@pytest.mark.asyncio
+async def test_pull_changes_streaming(client, auth_headers, test_db, test_user):
+    """Streaming mode returns the same document shape as the buffered one."""
+    await _seed_sessions(test_db, test_user, 3)
+
+    response = await client.post("/api/v1/sync/pull", json={"stream": True}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    rows = data["changes"]["sessions"]["updated"]
+    assert len(rows) == 3
+    assert isinstance(rows[0]["start_time"], int)
+    assert data["changes"]["hands"] == {"created": [], "updated": [], "deleted": []}
+    assert data["cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_pull_changes_invalid_cursor(client, auth_headers):
+    response = await client.post("/api/v1/sync/pull", json={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_pull_changes_incremental_by_sequence(client, auth_headers, test_db, test_user):
+    """Incremental pulls return only records logged after the last sequence."""
+    from app.services.changelog import record_changes
+
+    await _seed_sessions(test_db, test_user, 3)
+    response = await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)
+    first = response.json()
+    assert len(first["changes"]["sessions"]["updated"]) == 3
+    assert first["timestamp"] == 3
+
+    changed_id = first["changes"]["sessions"]["updated"][0]["id"]
+    await record_changes(test_db, test_user.id, "sessions", [changed_id])
+    await test_db.commit()
+
+    response = await client.post(
+        "/api/v1/sync/pull", json={"last_pulled_at": first["timestamp"]}, headers=auth_headers
+    )
+    data = response.json()
+    assert [row["id"] for row in data["changes"]["sessions"]["updated"]] == [changed_id]
+    assert data["timestamp"] == 4
+
+    # A wall-clock timestamp from a pre-sequence client triggers a full sync
+    legacy_ts = int(datetime.utcnow().timestamp() * 1000)
+    response = await client.post(
+        "/api/v1/sync/pull", json={"last_pulled_at": legacy_ts}, headers=auth_headers
+    )
+    assert len(response.json()["changes"]["sessions"]["updated"]) == 3
+
+
+def _raw_session(record_id, cash_out=300):
+    start = int(datetime(2025, 2, 1, 18, 0).timestamp() * 1000)
+    return {
+        "id": record_id,
+        "start_time": start,
+        "end_time": start + 2 * 3600 * 1000,
+        "game_type": "cash",
+        "stakes": "1/2",
+        "small_blind": 1,
+        "big_blind": 2,
+        "buy_in": 200,
+        "cash_out": cash_out,
+        "tips": 5,
+        "expenses": 0,
+        "location": "Bellagio",
+        "created_at": start,
+        "updated_at": start,
+    }
+
+
+def _push_payload(last_pulled_at=0, sessions=None, hands=None, transactions=None):
+    empty = {"created": [], "updated": [], "deleted": []}
+    return {
+        "changes": {
+            "sessions": {**empty, **(sessions or {})},
+            "hands": {**empty, **(hands or {})},
+            "transactions": {**empty, **(transactions or {})},
+        },
+        "last_pulled_at": last_pulled_at,
+    }
+
+
+@pytest.mark.asyncio
+async def test_push_applies_created_updated_deleted(client, auth_headers):
+    payload = _push_payload(
+        sessions={"created": [_raw_session("s-1"), _raw_session("s-2")]},
+        hands={"created": [{
+            "id": "h-1", "session_id": "s-1", "cards": '["Ah", "Kd"]',
+            "community_cards": "[]", "actions": '[{"player": "BTN", "action": "raise", "amount": 6}]',
+            "pot": 15,
+        }]},
+        transactions={"created": [{"id": "t-1", "type": "deposit", "amount": 500, "notes": "Initial"}]},
+    )
+    response = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    sessions = {row["id"]: row for row in pulled["changes"]["sessions"]["updated"]}
+    assert set(sessions) == {"s-1", "s-2"}
+    assert sessions["s-1"]["tips"] == 5.0
+    hand = pulled["changes"]["hands"]["updated"][0]
+    assert hand["cards"] == '["Ah", "Kd"]'
+    assert pulled["changes"]["transactions"]["updated"][0]["notes"] == "Initial"
+
+    payload = _push_payload(
+        last_pulled_at=pulled["timestamp"],
+        sessions={"updated": [_raw_session("s-1", cash_out=450)], "deleted": ["s-2"]},
+    )
+    response = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    sessions = pulled["changes"]["sessions"]["updated"]
+    assert [(row["id"], row["cash_out"]) for row in sessions] == [("s-1", 450.0)]
+
+
+@pytest.mark.asyncio
+async def test_push_rejects_stale_records(client, auth_headers):
+    response = await client.post(
+        "/api/v1/sync/push", json=_push_payload(sessions={"created": [_raw_session("s-1")]}), headers=auth_headers
+    )
+    assert response.status_code == 200
+    stale = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()["timestamp"]
+
+    # Another device updates the record after our last pull
+    await client.post(
+        "/api/v1/sync/push",
+        json=_push_payload(last_pulled_at=stale, sessions={"updated": [_raw_session("s-1", 100)]}),
+        headers=auth_headers,
+    )
+    response = await client.post(
+        "/api/v1/sync/push",
+        json=_push_payload(last_pulled_at=stale, sessions={"updated": [_raw_session("s-1", 900)]}),
+        headers=auth_headers,
+    )
+    assert response.status_code == 409
+    assert response.json()["detail"]["conflicts"] == {"sessions": ["s-1"]}
+
+
+@pytest.mark.asyncio
+async def test_push_bulk_round_trips(client, auth_headers, test_engine):
+    """A 1,000 record push is a handful of statements, not one per row."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def count(*args):
+        statements.append(args)
+
+    sync_engine = test_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        hands = [{"id": f"h-{i}", "pot": i, "actions": "[]"} for i in range(1000)]
+        response = await client.post(
+            "/api/v1/sync/push", json=_push_payload(hands={"created": hands}), headers=auth_headers
+        )
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+
+    assert response.status_code == 200, response.text
+    assert len(statements) < 20
+
+
+@pytest.mark.asyncio
+async def test_push_invalid_record(client, auth_headers):
+    payload = _push_payload(transactions={"created": [{"id": "t-1", "type": "bogus", "amount": 1}]})
+    response = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_deletions_sync_incrementally(client, auth_headers):
+    hand = {"id": "h-1", "session_id": "s-1", "pot": 10, "actions": "[]"}
+    await client.post(
+        "/api/v1/sync/push",
+        json=_push_payload(sessions={"created": [_raw_session("s-1")]}, hands={"created": [hand]}),
+        headers=auth_headers,
+    )
+    checkpoint = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()["timestamp"]
+
+    response = await client.post(
+        "/api/v1/sync/push",
+        json=_push_payload(last_pulled_at=checkpoint, sessions={"deleted": ["s-1"]}),
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    for body in ({"last_pulled_at": checkpoint}, {"last_pulled_at": checkpoint, "stream": True}):
+        data = (await client.post("/api/v1/sync/pull", json=body, headers=auth_headers)).json()
+        assert data["changes"]["sessions"]["deleted"] == ["s-1"]
+        assert data["changes"]["sessions"]["updated"] == []
+        # The orphaned hand is re-sent with its session detached
+        assert [(h["id"], h["session_id"]) for h in data["changes"]["hands"]["updated"]] == [("h-1", None)]
+
+
+@pytest.mark.asyncio
+async def test_tombstone_compaction_expires_old_checkpoints(client, auth_headers, test_db):
+    from datetime import timedelta
+    from app.services.changelog import purge_tombstones
+
+    await client.post(
+        "/api/v1/sync/push", json=_push_payload(sessions={"created": [_raw_session("s-1")]}), headers=auth_headers
+    )
+    checkpoint = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()["timestamp"]
+    await client.post(
+        "/api/v1/sync/push",
+        json=_push_payload(last_pulled_at=checkpoint, sessions={"deleted": ["s-1"]}),
+        headers=auth_headers,
+    )
+
+    assert await purge_tombstones(test_db, timedelta(days=-1)) == 1
+    await test_db.commit()
+
+    response = await client.post("/api/v1/sync/pull", json={"last_pulled_at": checkpoint}, headers=auth_headers)
+    assert response.status_code == 410
+    # A fresh full sync still works
+    response = await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_push_retry_is_answered_from_dedup_log(client, auth_headers, test_engine):
+    from sqlalchemy import event
+
+    payload = _push_payload(sessions={"created": [_raw_session("s-1")]})
+    first = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
+    assert first.status_code == 200, first.text
+
+    tables = []
+
+    def capture(conn, cursor, statement, *args):
+        tables.append(statement)
+
+    sync_engine = test_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+    try:
+        retry = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert not any("sessions" in statement or "change_log" in statement for statement in tables)
+
+    # An explicit key dedups even if the body differs (e.g. re-serialized)
+    headers = {**auth_headers, "Idempotency-Key": "push-1"}
+    await client.post("/api/v1/sync/push", json=_push_payload(), headers=headers)
+    replay = await client.post("/api/v1/sync/push", json=payload, headers=headers)
+    assert replay.headers.get("Idempotent-Replayed") == "true"
+
+
+@pytest.mark.asyncio
+async def test_pull_columnar_matches_rows(client, auth_headers, test_db, test_user):
+    """Columnar pages carry the same values as row pages, keyed once per table."""
+    await _seed_sessions(test_db, test_user, 3)
+
+    rows = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    for body in ({"format": "columnar"}, {"format": "columnar", "stream": True}):
+        response = await client.post("/api/v1/sync/pull", json=body, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        block = response.json()["changes"]["sessions"]["updated"]
+        decoded = [dict(zip(block["columns"], values)) for values in block["rows"]]
+        assert decoded == rows["changes"]["sessions"]["updated"]
+
+
+@pytest.mark.asyncio
+async def test_push_columnar_records(client, auth_headers):
+    record = _raw_session("col-1")
+    columns = list(record)
+    payload = _push_payload(sessions={"created": {"columns": columns, "rows": [list(record.values())]}})
+    response = await client.post("/api/v1/sync/push", json=payload, headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    assert [row["id"] for row in pulled["changes"]["sessions"]["updated"]] == ["col-1"]
+
+
+@pytest.mark.asyncio
+async def test_compressed_request_and_response(client, auth_headers, test_db, test_user):
+    import gzip
+    import json
+
+    await _seed_sessions(test_db, test_user, 20)
+    response = await client.post(
+        "/api/v1/sync/pull", json={}, headers={**auth_headers, "Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["changes"]["sessions"]["updated"]) == 20
+
+    body = gzip.compress(json.dumps(_push_payload(sessions={"created": [_raw_session("gz-1")]})).encode())
+    response = await client.post(
+        "/api/v1/sync/push",
+        content=body,
+        headers={**auth_headers, "Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200, response.text
+
+    response = await client.post(
+        "/api/v1/sync/push",
+        content=b"...",
+        headers={**auth_headers, "Content-Type": "application/json", "Content-Encoding": "br"},
+    )
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_compressed_request_size_limit(client, auth_headers, monkeypatch):
+    import gzip
+    import json
+    from app.core import compression
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "MAX_DECODED_BODY_BYTES", 64 * 1024)
+    headers = {**auth_headers, "Content-Type": "application/json"}
+    payload = json.dumps(_push_payload(sessions={"created": [_raw_session("gz-1")]})).encode()
+    response = await client.post("/api/v1/sync/push", content=gzip.compress(payload),
+                                 headers={**headers, "Content-Encoding": "gzip"})
+    assert response.status_code == 200, response.text
+
+    # Zeros compress about a thousandfold
+    bombs = {"gzip": gzip.compress(bytes(16 * 1024 * 1024))}
+    if compression.zstandard is not None:
+        bombs["zstd"] = compression.zstandard.ZstdCompressor().compress(bytes(16 * 1024 * 1024))
+    for encoding, bomb in bombs.items():
+        response = await client.post("/api/v1/sync/push", content=bomb, headers={**headers, "Content-Encoding": encoding})
+        assert response.status_code == 413, encoding
+
+
+@pytest.mark.asyncio
+async def test_pull_serializes_wire_values(client, auth_headers, test_db, test_user):
+    """Money is a number, timestamps are exact ms and JSON columns are text."""
+    from decimal import Decimal
+    from app.models.hand import Hand
+
+    created = datetime(2025, 3, 1, 12, 30, 15, 123000)
+    test_db.add(Hand(
+        id="h-wire", user_id=test_user.id, pot=Decimal("12.50"),
+        hero_cards=["As", "Kd"], community_cards=None, actions=[],
+        created_at=created, updated_at=created,
+    ))
+    await test_db.commit()
+
+    expected_ms = int((created - datetime(1970, 1, 1)).total_seconds() * 1000)
+    rows = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    hand = rows["changes"]["hands"]["updated"][0]
+    assert hand["pot"] == 12.5
+    assert hand["created_at"] == expected_ms
+    assert hand["cards"] == '["As", "Kd"]'
+    assert hand["community_cards"] is None
+    assert hand["actions"] == "[]"
+
+    columnar = (await client.post("/api/v1/sync/pull", json={"format": "columnar"}, headers=auth_headers)).json()
+    block = columnar["changes"]["hands"]["updated"]
+    decoded = dict(zip(block["columns"], block["rows"][0]))
+    assert decoded == hand
+    assert decoded["created_at"] == expected_ms
+
+
+@pytest.mark.asyncio
+async def test_subscribe_long_poll(client, auth_headers, test_user):
+    import asyncio
+    from app.services.notifications import hub
+
+    # Behind already: answered immediately
+    await client.post("/api/v1/sync/push", json=_push_payload(sessions={"created": [_raw_session("sub-1")]}), headers=auth_headers)
+    response = await client.get("/api/v1/sync/subscribe", params={"since": 0}, headers=auth_headers)
+    assert response.json() == {"changed": True, "timestamp": 1}
+
+    # Up to date and idle: times out unchanged
+    response = await client.get("/api/v1/sync/subscribe", params={"since": 1, "timeout": 0.05}, headers=auth_headers)
+    assert response.json() == {"changed": False, "timestamp": 1}
+    assert hub.subscriber_count(test_user.id) == 0
+
+    # Woken by a commit from another request
+    waiting = asyncio.create_task(
+        client.get("/api/v1/sync/subscribe", params={"since": 1, "timeout": 5}, headers=auth_headers)
+    )
+    while not hub.subscriber_count(test_user.id):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.05)
+    await client.post("/api/v1/sync/push", json=_push_payload(sessions={"created": [_raw_session("sub-2")]}), headers=auth_headers)
+    response = await asyncio.wait_for(waiting, 2)
+    assert response.json() == {"changed": True, "timestamp": 2}
+
+
+@pytest.mark.asyncio
+async def test_subscribe_event_stream():
+    import asyncio
+    from app.services.notifications import Subscription, stream_events
+
+    class FakeRequest:
+        async def is_disconnected(self):
+            return False
+
+    subscription = Subscription(user_id=1, seq=3)
+    events = stream_events(FakeRequest(), subscription, heartbeat=0.01, stale=True)
+    assert await events.__anext__() == b'event: change\ndata: {"timestamp": 3}\n\n'
+    assert await events.__anext__() == b": keep-alive\n\n"
+    subscription.notify(4)
+    assert await events.__anext__() == b'event: change\ndata: {"timestamp": 4}\n\n'
+    await events.aclose()
+
+
+class _SnapshotConnection:
+    """A real connection that records, instead of running, the Postgres snapshot statements."""
+
+    def __init__(self, conn, calls):
+        self._conn = conn
+        self.calls = calls
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def execution_options(self, **options):
+        self.calls.append(("options", options))
+        return self
+
+    async def scalar(self, statement, *args, **kwargs):
+        if str(statement) == "SELECT pg_export_snapshot()":
+            self.calls.append(("export", None))
+            return "00000003-0000001B-1"
+        return await self._conn.scalar(statement, *args, **kwargs)
+
+    async def execute(self, statement, *args, **kwargs):
+        if str(statement).startswith("SET TRANSACTION SNAPSHOT"):
+            self.calls.append(("import", str(statement)))
+            return None
+        return await self._conn.execute(statement, *args, **kwargs)
+
+
+class _SnapshotEngine:
+    def __init__(self, engine):
+        self._engine = engine
+        self.connections = []
+
+    @asynccontextmanager
+    async def connect(self):
+        async with self._engine.connect() as conn:
+            recorded = _SnapshotConnection(conn, [])
+            self.connections.append(recorded)
+            yield recorded
+
+
+@pytest.mark.asyncio
+async def test_collect_page_in_shared_snapshot(client, auth_headers, test_db, test_engine, test_user, monkeypatch):
+    """The Postgres path reads each table on its own connection in one exported snapshot."""
+    from app.services import sync
+    from app.services.sync import collect_page, start_pull
+
+    await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        sessions={"created": [_raw_session("s-1"), _raw_session("s-2")]},
+        transactions={"created": [{"id": "t-1", "type": "deposit", "amount": 500}]},
+    ))
+    pulled = (await client.post("/api/v1/sync/pull", json={}, headers=auth_headers)).json()
+    await client.post("/api/v1/sync/push", headers=auth_headers, json=_push_payload(
+        last_pulled_at=pulled["timestamp"], sessions={"deleted": ["s-2"]},
+    ))
+
+    sequential = await collect_page(test_db, test_user.id, await start_pull(test_db, test_user.id, 0, None))
+    engine = _SnapshotEngine(test_engine)
+    monkeypatch.setattr(sync, "dialect_name", lambda db: "postgresql")
+    monkeypatch.setattr(test_db, "bind", engine)
+    merged = await collect_page(test_db, test_user.id, await start_pull(test_db, test_user.id, 0, None))
+
+    assert merged == sequential
+    assert merged["sessions"]["updated"][0]["id"] == "s-1" and merged["sessions"]["deleted"] == ["s-2"]
+    exporter, *importers = engine.connections
+    assert len(importers) == len(sync.SYNC_TABLES) - 1
+    assert exporter.calls == [("options", {"isolation_level": "REPEATABLE READ"}), ("export", None)]
+    for conn in importers:
+        assert conn.calls == [
+            ("options", {"isolation_level": "REPEATABLE READ"}),
+            ("import", "SET TRANSACTION SNAPSHOT '00000003-0000001B-1'"),
+        ]
@@ -0,0 +1,28 @@
+"""Transaction endpoint tests."""
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_transactions_keyset_pages(client: AsyncClient, auth_headers):
+    """Created transactions come back newest first across cursor pages."""
+    created = []
+    for amount in ("100.00", "50.00", "25.00"):
+        response = await client.post(
+            "/api/v1/transactions/",
+            headers=auth_headers,
+            json={"type": "deposit", "amount": amount, "description": "top up"},
+        )
+        assert response.status_code == 201
+        created.append(response.json()["id"])
+
+    first = (await client.get("/api/v1/transactions/", headers=auth_headers, params={"limit": 2})).json()
+    assert len(first["items"]) == 2 and first["next_cursor"]
+    second = (await client.get(
+        "/api/v1/transactions/", headers=auth_headers, params={"limit": 2, "cursor": first["next_cursor"]}
+    )).json()
+    assert second["next_cursor"] is None
+    assert [item["id"] for item in first["items"] + second["items"]] == created[::-1]
+
+    stats = (await client.get("/api/v1/stats/", headers=auth_headers)).json()
+    assert float(stats["initial_bankroll"]) == 175.0
@@ -5,9 +5,11 @@ jest.mock('../model', () => ({
 
 // Create mock function for API
 const mockPost = jest.fn();
+const mockGet = jest.fn();
 jest.mock('../services/api', () => ({
     api: {
         post: (url: string, data: any) => mockPost(url, data),
+        get: (url: string, config: any) => mockGet(url, config),
     },
 }));
 
@@ -29,7 +31,7 @@ jest.mock('@nozbe/watermelondb/sync', () => ({
 }));
 
 // Import the module under test AFTER mocks are set up
-import { sync } from '../sync';
+import { sync, waitForChanges } from '../sync';
 import { synchronize } from '@nozbe/watermelondb/sync';
 
 describe('Sync Adapter', () => {
@@ -62,7 +64,7 @@ describe('Sync Adapter', () => {
 
             const result = await capturedConfig!.pullChanges({ lastPulledAt: 1234567890 });
 
-            expect(mockPost).toHaveBeenCalledWith('/sync/pull', { last_pulled_at: 1234567890 });
+            expect(mockPost).toHaveBeenCalledWith('/sync/pull', { last_pulled_at: 1234567890, format: 'columnar' });
             expect(result.changes).toEqual(mockChanges);
             expect(result.timestamp).toEqual(mockTimestamp);
         });
@@ -75,7 +77,52 @@ describe('Sync Adapter', () => {
             await sync();
             await capturedConfig!.pullChanges({ lastPulledAt: null });
 
-            expect(mockPost).toHaveBeenCalledWith('/sync/pull', { last_pulled_at: null });
+            expect(mockPost).toHaveBeenCalledWith('/sync/pull', { last_pulled_at: null, format: 'columnar' });
+        });
+
+        it('follows the cursor and merges every page', async () => {
+            const page = (ids: string[], cursor: string | null) => ({
+                data: {
+                    changes: { sessions: { created: [], updated: ids.map(id => ({ id })), deleted: [] } },
+                    timestamp: 42,
+                    cursor,
+                },
+            });
+            mockPost
+                .mockResolvedValueOnce(page(['a', 'b'], 'next'))
+                .mockResolvedValueOnce(page(['c'], null));
+
+            await sync();
+            const result = await capturedConfig!.pullChanges({ lastPulledAt: 7 });
+
+            expect(mockPost).toHaveBeenNthCalledWith(2, '/sync/pull', { last_pulled_at: 7, cursor: 'next' });
+            expect(result.changes.sessions.updated.map((r: any) => r.id)).toEqual(['a', 'b', 'c']);
+            expect(result.timestamp).toBe(42);
+        });
+
+        it('expands columnar blocks into records', async () => {
+            mockPost.mockResolvedValueOnce({
+                data: {
+                    changes: {
+                        hands: {
+                            created: { columns: ['id', 'cards'], rows: [] },
+                            updated: { columns: ['id', 'cards'], rows: [['h1', '["As","Kd"]'], ['h2', null]] },
+                            deleted: ['h3'],
+                        },
+                    },
+                    timestamp: 9,
+                    cursor: null,
+                },
+            });
+
+            await sync();
+            const result = await capturedConfig!.pullChanges({ lastPulledAt: null });
+
+            expect(result.changes.hands).toEqual({
+                created: [],
+                updated: [{ id: 'h1', cards: '["As","Kd"]' }, { id: 'h2', cards: null }],
+                deleted: ['h3'],
+            });
         });
     });
 
@@ -98,6 +145,40 @@ describe('Sync Adapter', () => {
         });
     });
 
+    describe('waitForChanges', () => {
+        it('subscribes past the timestamp of the last pull', async () => {
+            mockPost.mockResolvedValueOnce({
+                data: { changes: {}, timestamp: 17, cursor: null },
+            });
+            mockGet.mockResolvedValueOnce({ data: { changed: false, timestamp: 17 } });
+
+            await sync();
+            await capturedConfig!.pullChanges({ lastPulledAt: null });
+            const changed = await waitForChanges();
+
+            expect(changed).toBe(false);
+            expect(mockGet).toHaveBeenCalledWith('/sync/subscribe', expect.objectContaining({ params: { since: 17 } }));
+        });
+    });
+
+    describe('compacted checkpoint (410)', () => {
+        it('re-pulls everything with the replacement strategy instead of resetting', async () => {
+            (synchronize as jest.Mock).mockImplementationOnce(() =>
+                Promise.reject({ response: { status: 410 } })
+            );
+            mockPost.mockResolvedValueOnce({
+                data: { changes: {}, timestamp: 30, cursor: null },
+            });
+
+            await sync();
+            expect(synchronize).toHaveBeenCalledTimes(2);
+            const result: any = await capturedConfig!.pullChanges({ lastPulledAt: 12 });
+
+            expect(mockPost).toHaveBeenCalledWith('/sync/pull', { last_pulled_at: null, format: 'columnar' });
+            expect(result.experimentalStrategy).toBe('replacement');
+        });
+    });
+
     describe('Error Handling', () => {
         it('throws error when pullChanges fails', async () => {
             const networkError = new Error('Network Error');
@@ -1,6 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react'
 // import NetInfo from '@react-native-community/netinfo'
-import { sync } from '../sync'
+import { sync, waitForChanges } from '../sync'
 
 type SyncStatus = 'idle' | 'syncing' | 'synced' | 'error' | 'offline'
 
@@ -36,15 +36,38 @@ export function SyncProvider({ children }: { children: React.ReactNode }) {
     //     return () => unsubscribe()
     // }, [status])
 
-    // Auto-sync every 5 minutes when online
+    // Sync whenever the server reports new changes. The subscription is a
+    // long-poll that only returns when our data changed or its wait expires,
+    // so idle devices don't pull for remote changes.
     useEffect(() => {
         if (!isOnline) return
+        let active = true
 
+        const listen = async () => {
+            while (active) {
+                try {
+                    if (await waitForChanges()) {
+                        await triggerSync()
+                    }
+                } catch (err) {
+                    // Server unreachable: back off, then catch up with a sync
+                    await new Promise(resolve => setTimeout(resolve, 30 * 1000))
+                    if (active) await triggerSync()
+                }
+            }
+        }
+        listen()
+
+        // The subscription only sees server-side changes; local edits
+        // (including those made offline) still go up on a timer
         const interval = setInterval(() => {
             triggerSync()
         }, 5 * 60 * 1000) // 5 minutes
 
-        return () => clearInterval(interval)
+        return () => {
+            active = false
+            clearInterval(interval)
+        }
     }, [isOnline])
 
     const triggerSync = async () => {
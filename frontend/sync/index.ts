@@ -2,14 +2,99 @@ import { synchronize } from '@nozbe/watermelondb/sync'
 import { database } from '../model'
 import { api } from '../services/api' // We will create this next
 
+type TableChanges = { created: any[]; updated: any[]; deleted: string[] }
+type Changes = Record<string, TableChanges>
+type ColumnarBlock = { columns: string[]; rows: any[][] }
+
+// Expand a columnar block ({ columns, rows }) back into WatermelonDB records.
+// JSON columns arrive as the stored text, as in row pages, and pass through.
+function decodeRecords(block: ColumnarBlock | any[]): any[] {
+    if (Array.isArray(block)) return block
+    return block.rows.map(values => {
+        const record: Record<string, any> = {}
+        block.columns.forEach((column, index) => {
+            record[column] = values[index]
+        })
+        return record
+    })
+}
+
+function decodeChanges(changes: Record<string, any>): Changes {
+    const decoded: Changes = {}
+    for (const table of Object.keys(changes)) {
+        decoded[table] = {
+            created: decodeRecords(changes[table].created),
+            updated: decodeRecords(changes[table].updated),
+            deleted: changes[table].deleted,
+        }
+    }
+    return decoded
+}
+
+// Append one page of pulled changes onto the accumulated result
+function mergeChanges(into: Changes, page: Changes): Changes {
+    for (const table of Object.keys(page)) {
+        const target = into[table]
+        if (!target) {
+            into[table] = page[table]
+            continue
+        }
+        target.created.push(...page[table].created)
+        target.updated.push(...page[table].updated)
+        target.deleted.push(...page[table].deleted)
+    }
+    return into
+}
+
+// Change sequence of the last completed pull; what /sync/subscribe waits past
+let lastTimestamp = 0
+
+// Block until the server reports changes past our last pull (long-poll).
+// Resolves false when the server's wait times out with nothing new.
+export async function waitForChanges(): Promise<boolean> {
+    const response = await api.get('/sync/subscribe', {
+        params: { since: lastTimestamp },
+        // Longer than the server's default 25s wait
+        timeout: 35000,
+    })
+    return response.data.changed
+}
+
 export async function sync() {
+    try {
+        await runSynchronize(false)
+    } catch (error: any) {
+        // 410: the server compacted deletions past our checkpoint, so an
+        // incremental pull can no longer be trusted. Pull everything again
+        // and let WatermelonDB replace what the server no longer has; local
+        // changes not yet pushed are kept and pushed right after.
+        if (error?.response?.status !== 410) throw error
+        await runSynchronize(true)
+    }
+}
+
+async function runSynchronize(full: boolean) {
     await synchronize({
         database,
         pullChanges: async ({ lastPulledAt }: { lastPulledAt: number | null }) => {
+            const since = full ? null : lastPulledAt
             try {
-                const response = await api.post('/sync/pull', { last_pulled_at: lastPulledAt })
-                const { changes, timestamp } = response.data
-                return { changes, timestamp }
+                // The server pages large pulls; keep following the cursor until
+                // it comes back empty. Every page carries the same timestamp.
+                // Columnar pages send each table's column names once.
+                let response = await api.post('/sync/pull', { last_pulled_at: since, format: 'columnar' })
+                let { timestamp, cursor } = response.data
+                let changes = decodeChanges(response.data.changes)
+                while (cursor) {
+                    response = await api.post('/sync/pull', { last_pulled_at: since, cursor })
+                    changes = mergeChanges(changes, decodeChanges(response.data.changes))
+                    timestamp = response.data.timestamp
+                    cursor = response.data.cursor
+                }
+                lastTimestamp = timestamp
+                return full
+                    ? { changes, timestamp, experimentalStrategy: 'replacement' as const }
+                    : { changes, timestamp }
             } catch (error) {
                 console.error('Pull changes failed:', error)
                 throw error